@@ -0,0 +1,176 @@
+"""
+端到端流水线基准测试：在离线替身服务上依次运行 下载 → 合并 → 分析 → 保存 → 上传，
+报告每个阶段的耗时、请求数和峰值内存
+
+    python scripts/benchmark_pipeline.py --repeat 3 --latency 0.05
+    python scripts/benchmark_pipeline.py --stream --latency 0.2
+    python scripts/benchmark_pipeline.py --categories 全球风险情绪 --fail-rate 0.05
+
+所有文件写入临时目录，默认关闭HTTP缓存、本地序列存储和Yahoo方式记忆以测量冷启动；
+--warm 时各轮共用这些缓存，用于测量增量运行。
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import risk_matrix_calculator as rmc  # noqa: E402
+from offline_standin import StandinProcess  # noqa: E402
+
+STAGES = ('fetch', 'merge', 'analyze', 'stream', 'save', 'upload')
+
+
+def run_stage(name, func, server, trace=True):
+    """运行一个阶段，返回 (结果, 统计)"""
+    requests_before = server.stats()
+    if trace:
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - started
+    requests_after = server.stats()
+    stats = {
+        'seconds': round(seconds, 3),
+        'requests': {
+            key: requests_after.get(key, 0) - requests_before.get(key, 0)
+            for key in requests_after
+            if key != 'bytes_sent' and requests_after.get(key, 0) != requests_before.get(key, 0)
+        },
+        'bytes_sent': requests_after.get('bytes_sent', 0) - requests_before.get('bytes_sent', 0),
+        'peak_mb': round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 1) if trace else None
+    }
+    return result, stats
+
+
+def skip_after_fetch(report, loader):
+    """全部下载失败（如 --reset-rate 1.0）时不再保存和上传，只报告下载统计"""
+    print("⚠️ 没有可分析的数据，跳过保存与上传阶段")
+    report['fetch_metrics'] = loader.metrics.summary()['sources']
+    return report
+
+
+def run_pipeline(server, start_date, end_date, categories=None, parallel=False, trace=True, stream=False):
+    """运行一轮完整流水线，返回各阶段统计（stream 为 True 时下载/合并/分析合并为一个流水线阶段）"""
+    report = {}
+    loader = rmc.GlobalMacroDataLoader('offline-benchmark-key')
+    if stream:
+        (data, _, _), report['stream'] = run_stage(
+            'stream', lambda: rmc.stream_analysis(loader, start_date, end_date, categories), server, trace)
+        if data is None:
+            return skip_after_fetch(report, loader)
+        report['stream']['failed'] = data['metadata']['execution']['failed']
+    else:
+        all_data, report['fetch'] = run_stage(
+            'fetch', lambda: loader.download_all_data(start_date, end_date, categories), server, trace)
+
+        frames, report['merge'] = run_stage(
+            'merge', lambda: loader.create_frequency_frames(all_data), server, trace)
+        report['merge']['indicators'] = len(frames)
+        if not len(frames):
+            report['analyze'] = {'skipped': "没有数据", 'failed': []}
+            return skip_after_fetch(report, loader)
+
+        data, report['analyze'] = run_stage(
+            'analyze', lambda: rmc.RiskSentimentAnalyzer(frames).calculate_risk_matrix(parallel=parallel), server, trace)
+        report['analyze']['failed'] = data['metadata']['execution']['failed']
+
+    _, report['save'] = run_stage('save', lambda: rmc.save_risk_matrix(data), server, trace)
+
+    try:
+        from data_uploader import upload_to_cos
+    except ImportError as e:
+        print(f"⚠️ 跳过上传阶段: {e}")
+        report['upload'] = {'skipped': str(e)}
+    else:
+        results, report['upload'] = run_stage('upload', upload_to_cos, server, trace)
+        report['upload']['results'] = results
+
+    report['fetch_metrics'] = loader.metrics.summary()['sources']
+    return report
+
+
+def print_report(runs):
+    print("\n" + "=" * 72)
+    print(f"{'阶段':8} " + " ".join(f"{'第' + str(i + 1) + '轮':>20}" for i in range(len(runs))))
+    print("=" * 72)
+    for stage in STAGES:
+        cells = []
+        for run in runs:
+            stats = run.get(stage, {})
+            if 'seconds' not in stats:
+                cells.append(f"{'跳过':>20}")
+                continue
+            peak = f"{stats['peak_mb']:.0f}MB" if stats['peak_mb'] is not None else '-'
+            cells.append(f"{stats['seconds']:7.2f}s {sum(stats['requests'].values()):4}req {peak:>6}")
+        print(f"{stage:8} " + " ".join(cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="离线端到端流水线基准测试")
+    parser.add_argument('--start', default='2018-01-01', help="起始日期 (默认 2018-01-01)")
+    parser.add_argument('--end', default=None, help="结束日期 (默认今天)")
+    parser.add_argument('--categories', nargs='+', default=None, help="只下载指定分类")
+    parser.add_argument('--repeat', type=int, default=1, help="运行轮数")
+    parser.add_argument('--warm', action='store_true', help="各轮共用HTTP缓存、序列存储和方式记忆")
+    parser.add_argument('--parallel', action='store_true', help="并行执行分析")
+    parser.add_argument('--stream', action='store_true', help="流水线模式：边下载边分析")
+    parser.add_argument('--no-tracemalloc', action='store_true', help="不统计峰值内存（tracemalloc会拖慢运行）")
+    parser.add_argument('--snapshot', default=None, help="替身服务使用的数据快照（默认合成数据）")
+    parser.add_argument('--latency', type=float, default=0.0, help="替身服务每个请求的延迟（秒）")
+    parser.add_argument('--jitter', type=float, default=0.0, help="替身服务的随机延迟上限（秒）")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="替身服务返回503的比例")
+    parser.add_argument('--reset-rate', type=float, default=0.0, help="替身服务直接断开连接的比例")
+    parser.add_argument('--output', default="data/benchmark/pipeline-latest.json", help="结果JSON路径")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    snapshot = os.path.abspath(args.snapshot) if args.snapshot else None
+    end_date = args.end or datetime.now().strftime('%Y-%m-%d')
+    trace = not args.no_tracemalloc
+    workdir = tempfile.mkdtemp(prefix="risk-matrix-bench-")
+    cwd = os.getcwd()
+
+    server = StandinProcess(snapshot=snapshot, latency=args.latency, jitter=args.jitter,
+                            fail_rate=args.fail_rate, reset_rate=args.reset_rate).start()
+    os.environ.update(server.environ())
+    os.environ.update({'USE_PROXY': 'false', 'SERIES_STORE_PATH': os.path.join(workdir, 'store.sqlite')})
+    if not args.warm:
+        os.environ.update({'HTTP_CACHE': 'false', 'SERIES_STORE': 'false', 'YAHOO_METHOD_MEMORY': 'false'})
+    print(f"🧪 替身服务: {server.url}，工作目录: {workdir}")
+
+    runs = []
+    try:
+        os.chdir(workdir)
+        if trace:
+            tracemalloc.start()
+        for i in range(args.repeat):
+            print(f"\n🏁 第 {i + 1}/{args.repeat} 轮")
+            runs.append(run_pipeline(server, args.start, end_date, args.categories, args.parallel, trace, args.stream))
+    finally:
+        if trace:
+            tracemalloc.stop()
+        os.chdir(cwd)
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(runs)
+    result = {
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'runs': runs
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2, default=str)
+    print(f"\n✅ 基准结果已保存: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,75 +1,231 @@
 import os
 import json
+import gzip
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from qcloud_cos import CosConfig
 from qcloud_cos import CosS3Client
+from qcloud_cos.cos_exception import CosServiceError
 from datetime import datetime
 
-def upload_to_cos():
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 超过该大小的文件走分块上传，其余文件一次PUT完成
+MULTIPART_THRESHOLD = 20 * 1024 * 1024
+
+# latest 每天更新，CDN只短暂缓存并回源校验；按日期归档的文件当天之后基本不再变化
+CACHE_CONTROL = {
+    'latest': 'public, max-age=300, must-revalidate',
+    'dated': 'public, max-age=86400'
+}
+JSON_CONTENT_TYPE = 'application/json; charset=utf-8'
+
+
+def create_cos_client():
     """
-    上传数据文件到腾讯云COS
+    根据环境变量创建COS客户端，返回 (client, bucket, base_url)
+
+    设置 COS_DOMAIN（如 127.0.0.1:9000）和 COS_SCHEME=http 时连接本地的S3兼容服务，便于测试。
     """
-    # 从环境变量获取配置
     secret_id = os.environ.get('TENCENT_SECRET_ID')
     secret_key = os.environ.get('TENCENT_SECRET_KEY')
     region = os.environ.get('COS_REGION', 'ap-beijing')
     bucket = os.environ.get('COS_BUCKET_NAME')
-    
+    domain = os.environ.get('COS_DOMAIN')
+    scheme = os.environ.get('COS_SCHEME', 'https')
+
     if not all([secret_id, secret_key, bucket]):
         raise ValueError("缺少必要的环境变量配置")
-    
-    # 配置COS客户端
+
     config = CosConfig(
         Region=region,
         SecretId=secret_id,
-        SecretKey=secret_key
+        SecretKey=secret_key,
+        Scheme=scheme,
+        Domain=domain
     )
-    client = CosS3Client(config)
-    
-    # 上传文件列表
+    base_url = f"{scheme}://{domain}" if domain else f"https://{bucket}.cos.{region}.myqcloud.com"
+    return CosS3Client(config), bucket, base_url
+
+
+def file_md5(path):
+    """计算本地文件的MD5（十六进制）"""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compress_file(path, encoding):
+    """
+    写出预压缩副本（path.gz / path.br），返回副本路径；不支持的编码返回None
+
+    gzip头中的时间戳固定为0，相同内容每次压缩结果一致，不会破坏上传前的MD5比较。
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if encoding == 'gzip':
+        compressed, out_path = gzip.compress(data, compresslevel=9, mtime=0), f"{path}.gz"
+    elif encoding == 'br' and brotli is not None:
+        compressed, out_path = brotli.compress(data, quality=11), f"{path}.br"
+    else:
+        return None
+    with open(out_path, 'wb') as f:
+        f.write(compressed)
+    print(f"🗜️ {os.path.basename(out_path)}: {len(data) / 1024:.1f} KB -> {len(compressed) / 1024:.1f} KB")
+    return out_path
+
+
+def publish_variants(local_path, remote_path, cache_control, inline_gzip=False):
+    """
+    生成一个JSON文件的上传条目：原文件及其gzip/brotli预压缩副本
+
+    预压缩副本以 Content-Encoding 声明编码、Content-Type 仍为JSON，浏览器和requests会自动解压。
+    inline_gzip 为 True 时原路径直接上传gzip内容（带 Content-Encoding: gzip），不再单独上传未压缩版本。
+    """
+    if not os.path.exists(local_path):
+        return [{'local': local_path, 'remote': remote_path}]
+
+    entries = []
+    for encoding, suffix in (('gzip', '.gz'), ('br', '.br')):
+        compressed_path = compress_file(local_path, encoding)
+        if compressed_path is None:
+            continue
+        headers = {'ContentType': JSON_CONTENT_TYPE, 'ContentEncoding': encoding, 'CacheControl': cache_control}
+        entries.append({'local': compressed_path, 'remote': remote_path + suffix, 'headers': headers})
+        if inline_gzip and encoding == 'gzip':
+            entries.append({'local': compressed_path, 'remote': remote_path, 'headers': headers})
+
+    if not inline_gzip:
+        entries.insert(0, {
+            'local': local_path,
+            'remote': remote_path,
+            'headers': {'ContentType': JSON_CONTENT_TYPE, 'CacheControl': cache_control}
+        })
+    return entries
+
+
+def remote_md5(client, bucket, key):
+    """
+    通过HEAD请求获取远端对象的MD5，对象不存在时返回None
+
+    优先使用上传时写入的 x-cos-meta-md5；单次PUT上传的对象ETag即为内容MD5，
+    分块上传的ETag带有"-"后缀，无法比较。
+    """
+    try:
+        headers = client.head_object(Bucket=bucket, Key=key)
+    except CosServiceError as e:
+        if e.get_status_code() == 404:
+            return None
+        raise
+    headers = {k.lower(): v for k, v in headers.items()}
+    if headers.get('x-cos-meta-md5'):
+        return headers['x-cos-meta-md5']
+    etag = headers.get('etag', '').strip('"')
+    return etag if etag and '-' not in etag else None
+
+
+def upload_file(client, bucket, local_path, remote_path, acl='public-read', force=False, headers=None):
+    """
+    上传单个文件，远端内容相同时跳过
+
+    ACL、内容MD5以及 headers 中的 ContentType/ContentEncoding/CacheControl 随PUT请求头一起发送，
+    不再单独调用 put_object_acl。返回 'uploaded' / 'skipped' / 'missing' / 'failed'。
+    """
+    if not os.path.exists(local_path):
+        return 'missing'
+
+    try:
+        md5 = file_md5(local_path)
+        if not force and remote_md5(client, bucket, remote_path) == md5:
+            print(f"⏭️ 内容未变化，跳过: {remote_path}")
+            return 'skipped'
+
+        options = {
+            'ACL': acl,
+            'ContentType': JSON_CONTENT_TYPE if local_path.endswith('.json') else None,
+            **(headers or {}),
+            'Metadata': {'x-cos-meta-md5': md5}
+        }
+        options = {k: v for k, v in options.items() if v}
+        if os.path.getsize(local_path) > MULTIPART_THRESHOLD:
+            client.upload_file(
+                Bucket=bucket,
+                LocalFilePath=local_path,
+                Key=remote_path,
+                PartSize=10,
+                MAXThread=10,
+                **options
+            )
+        else:
+            with open(local_path, 'rb') as f:
+                client.put_object(Bucket=bucket, Body=f.read(), Key=remote_path, **options)
+        print(f"✅ 上传成功: {remote_path}")
+        return 'uploaded'
+
+    except Exception as e:
+        print(f"❌ 上传失败 {remote_path}: {str(e)}")
+        return 'failed'
+
+
+def upload_files(client, bucket, files_to_upload, max_workers=None, force=False):
+    """并发上传文件列表，返回 {remote: 状态}"""
+    if max_workers is None:
+        max_workers = int(os.environ.get('COS_UPLOAD_WORKERS', '4'))
+    if not files_to_upload:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(files_to_upload)))) as executor:
+        futures = {
+            file_info['remote']: executor.submit(
+                upload_file, client, bucket, file_info['local'], file_info['remote'],
+                force=force, headers=file_info.get('headers')
+            )
+            for file_info in files_to_upload
+        }
+        results = {remote: future.result() for remote, future in futures.items()}
+
+    for file_info in files_to_upload:
+        if results[file_info['remote']] == 'missing':
+            print(f"⚠️ 文件不存在: {file_info['local']}")
+    return results
+
+
+def upload_to_cos():
+    """
+    上传数据文件到腾讯云COS
+    """
+    client, bucket, base_url = create_cos_client()
+    force = os.environ.get('COS_FORCE_UPLOAD', 'false').lower() == 'true'
+
+    # 上传文件列表（含预压缩副本）
+    # COS_INLINE_GZIP=true 时 .json 路径直接存放gzip内容，依赖客户端按 Content-Encoding 解压
+    inline_gzip = os.environ.get('COS_INLINE_GZIP', 'false').lower() == 'true'
     today = datetime.now().strftime("%Y-%m-%d")
     files_to_upload = [
-        {
-            'local': f"data/risk-matrix-{today}.json",
-            'remote': f"data/risk-matrix/{today}.json"
-        },
-        {
-            'local': "data/risk-matrix-latest.json", 
-            'remote': "data/risk-matrix/latest.json"
-        }
+        *publish_variants(f"data/risk-matrix-{today}.json", f"data/risk-matrix/{today}.json",
+                          CACHE_CONTROL['dated'], inline_gzip),
+        *publish_variants("data/risk-matrix-latest.json", "data/risk-matrix/latest.json",
+                          CACHE_CONTROL['latest'], inline_gzip)
     ]
-    
-    for file_info in files_to_upload:
-        local_path = file_info['local']
-        remote_path = file_info['remote']
-        
-        if os.path.exists(local_path):
-            try:
-                response = client.upload_file(
-                    Bucket=bucket,
-                    LocalFilePath=local_path,
-                    Key=remote_path,
-                    PartSize=1,
-                    MAXThread=10
-                )
-                print(f"✅ 上传成功: {remote_path}")
-                
-                # 设置公共读权限
-                client.put_object_acl(
-                    Bucket=bucket,
-                    Key=remote_path,
-                    ACL='public-read'
-                )
-                
-            except Exception as e:
-                print(f"❌ 上传失败 {remote_path}: {str(e)}")
-        else:
-            print(f"⚠️ 文件不存在: {local_path}")
-    
+    if os.path.exists("data/risk-matrix-latest.min.json"):
+        files_to_upload += publish_variants("data/risk-matrix-latest.min.json", "data/risk-matrix/latest.min.json",
+                                            CACHE_CONTROL['latest'], inline_gzip)
+
+    results = upload_files(client, bucket, files_to_upload, force=force)
+    summary = {status: sum(1 for r in results.values() if r == status) for status in ('uploaded', 'skipped', 'failed')}
+    print(f"📦 上传完成: {json.dumps(summary, ensure_ascii=False)}")
+
     # 输出访问URL
-    base_url = f"https://{bucket}.cos.{region}.myqcloud.com"
     print(f"\n📍 数据访问地址:")
     print(f"最新数据: {base_url}/data/risk-matrix/latest.json")
     print(f"今日数据: {base_url}/data/risk-matrix/{today}.json")
+    print(f"压缩版本: {base_url}/data/risk-matrix/latest.json.gz" + (" / .br" if brotli else ""))
+    return results
 
 if __name__ == "__main__":
     upload_to_cos()
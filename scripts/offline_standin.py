@@ -0,0 +1,370 @@
+"""
+离线替身服务：在本地模拟 FRED、Yahoo Finance 图表接口和 COS（S3兼容）对象存储
+
+数据来自合成序列（见 synthetic_universe.py，按代码确定性生成）或已保存的数据快照，可注入延迟和失败，
+供 benchmark_pipeline.py 以及断网环境下的调试使用。
+
+    python scripts/offline_standin.py --port 8765 --latency 0.05 --fail-rate 0.02
+
+对应的环境变量：
+    FRED_API_ROOT=http://127.0.0.1:8765/fred
+    YAHOO_API_ROOT=http://127.0.0.1:8765/yahoo
+    COS_DOMAIN=127.0.0.1:8765 COS_SCHEME=http
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl, quote, unquote
+from urllib.request import Request, urlopen
+from xml.sax.saxutils import quoteattr
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from risk_matrix_calculator import DATA_CATEGORIES, load_snapshot, pd, np  # noqa: E402
+from synthetic_universe import synthetic_series  # noqa: E402
+
+FRED_FREQUENCY_SHORT = {'daily': 'D', 'weekly': 'W', 'monthly': 'M', 'quarterly': 'Q'}
+SYNTHETIC_START = '2000-01-03'
+
+
+def indicator_freq(symbol):
+    """从 DATA_CATEGORIES 查找指标频率，未配置的代码按日频处理"""
+    for cat_info in DATA_CATEGORIES.values():
+        info = cat_info['indicators'].get(symbol)
+        if info:
+            return info.get('freq', 'daily')
+    return 'daily'
+
+
+class FixtureStore:
+    """替身服务的数据源：优先使用快照中的序列，其余代码按需合成"""
+    def __init__(self, snapshot=None):
+        self.frames = load_snapshot(snapshot) if snapshot else None
+        self.cache = {}
+        self.updated = {}  # {symbol: last_updated}，供FRED序列信息接口使用
+        self.lock = threading.Lock()
+
+    def series(self, symbol, source='fred'):
+        """返回指标序列（不带时区的日期索引）；source 决定合成序列使用的交易日历"""
+        with self.lock:
+            if symbol not in self.cache:
+                if self.frames is not None and symbol in self.frames:
+                    series = self.frames.series(symbol)
+                else:
+                    series = synthetic_series(symbol, indicator_freq(symbol), SYNTHETIC_START, source=source)
+                    if series.index.tz is not None:
+                        series.index = series.index.tz_localize(None)
+                self.cache[symbol] = series.round(4)
+            return self.cache[symbol]
+
+    def last_updated(self, symbol):
+        return self.updated.get(symbol, '2024-01-02 07:30:00-06')
+
+    def touch(self, symbol, value=None):
+        """模拟数据源发布新数据：追加一个观测值并更新 last_updated"""
+        series = self.series(symbol)
+        step = series.index[-1] - series.index[-2] if len(series) > 1 else pd.Timedelta(days=1)
+        with self.lock:
+            self.cache[symbol] = pd.concat([series, pd.Series([value or series.iloc[-1]], index=[series.index[-1] + step])])
+            self.updated[symbol] = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S+00')
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    # ---------- 通用 ----------
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+        self.server.count('bytes_sent', len(body))
+
+    def inject(self):
+        """注入延迟和失败，返回True表示本次请求已按失败处理"""
+        server = self.server
+        if server.latency or server.jitter:
+            time.sleep(server.latency + random.uniform(0, server.jitter))
+        roll = random.random()
+        if roll < server.reset_rate:
+            # 不返回任何响应直接断开，客户端表现为连接错误
+            server.count('injected_resets')
+            self.close_connection = True
+            return True
+        if roll < server.reset_rate + server.fail_rate:
+            server.count('injected_failures')
+            self.send_body(503, b'Service Unavailable', 'text/plain')
+            return True
+        return False
+
+    def route(self):
+        parsed = urlparse(self.path)
+        return parsed.path, dict(parse_qsl(parsed.query))
+
+    def do_GET(self):
+        path, query = self.route()
+        if path == '/_stats':
+            return self.send_body(200, json.dumps(self.server.stats()).encode('utf-8'), 'application/json')
+        if path.startswith('/fred/') or path.startswith('/yahoo/'):
+            source = 'fred' if path.startswith('/fred/') else 'yahoo'
+            self.server.count(f'{source}_requests')
+            if self.inject():
+                return
+            if path == '/fred/series/observations':
+                return self.fred_observations(query)
+            if path == '/fred/series':
+                return self.fred_series_info(query)
+            if path.startswith('/yahoo/v8/finance/chart/'):
+                return self.yahoo_chart(unquote(path.rsplit('/', 1)[-1]), query)
+            return self.send_body(404, b'Not Found', 'text/plain')
+        self.cos_get(path)
+
+    def do_HEAD(self):
+        self.cos_get(self.route()[0])
+
+    def do_PUT(self):
+        self.cos_put(self.route()[0])
+
+    def do_POST(self):
+        # /_touch?symbol=X 模拟数据源发布新数据（见 FixtureStore.touch）
+        path, query = self.route()
+        if path == '/_touch' and query.get('symbol'):
+            self.server.fixtures.touch(query['symbol'])
+            return self.send_body(200, b'{}', 'application/json')
+        self.send_body(404, b'Not Found', 'text/plain')
+
+    # ---------- FRED ----------
+    def fred_observations(self, query):
+        symbol = query.get('series_id', '')
+        series = self.server.fixtures.series(symbol).loc[query.get('observation_start'):query.get('observation_end')]
+        dates = series.index.strftime('%Y-%m-%d')
+        values = ['.' if np.isnan(v) else repr(v) for v in series.to_numpy(dtype=float).tolist()]
+        rows = ''.join(
+            f'<observation realtime_start="{d}" realtime_end="{d}" date="{d}" value="{v}"/>'
+            for d, v in zip(dates, values)
+        )
+        body = f'<?xml version="1.0" encoding="utf-8" ?><observations count="{len(series)}">{rows}</observations>'
+        self.send_body(200, body.encode('utf-8'), 'text/xml; charset=UTF-8')
+
+    def fred_series_info(self, query):
+        symbol = query.get('series_id', '')
+        series = self.server.fixtures.series(symbol)
+        freq = indicator_freq(symbol)
+        attrs = {
+            'id': symbol,
+            'title': symbol,
+            'observation_start': f"{series.index[0]:%Y-%m-%d}",
+            'observation_end': f"{series.index[-1]:%Y-%m-%d}",
+            'frequency': freq.capitalize(),
+            'frequency_short': FRED_FREQUENCY_SHORT.get(freq, 'D'),
+            'units': 'Index',
+            'units_short': 'Index',
+            'seasonal_adjustment_short': 'NSA',
+            'last_updated': self.server.fixtures.last_updated(symbol)
+        }
+        attr_text = ' '.join(f'{k}={quoteattr(v)}' for k, v in attrs.items())
+        body = f'<?xml version="1.0" encoding="utf-8" ?><seriess><series {attr_text}/></seriess>'
+        self.send_body(200, body.encode('utf-8'), 'text/xml; charset=UTF-8')
+
+    # ---------- Yahoo ----------
+    def yahoo_chart(self, symbol, query):
+        series = self.server.fixtures.series(symbol, source='yahoo').dropna()
+        if 'period1' in query:
+            start = pd.Timestamp(int(query['period1']), unit='s')
+            end = pd.Timestamp(int(query.get('period2', time.time())), unit='s')
+            series = series[(series.index >= start.normalize()) & (series.index < end.normalize())]
+        # 时间戳取美东开盘时刻，与真实接口一致
+        opens = series.index + pd.Timedelta(hours=14, minutes=30)
+        timestamps = ((opens - pd.Timestamp(0)) // pd.Timedelta(seconds=1)).tolist()
+        values = [None if np.isnan(v) else float(v) for v in series.to_numpy()]
+        chart = {'chart': {'result': [{
+            'meta': {'symbol': symbol, 'currency': 'USD', 'instrumentType': 'INDEX', 'exchangeName': 'NYQ',
+                     'timezone': 'EST', 'gmtoffset': -18000, 'exchangeTimezoneName': 'America/New_York',
+                     'regularMarketPrice': values[-1] if values else None, 'dataGranularity': '1d',
+                     'range': '', 'validRanges': ['1d', '5d', '1mo', '1y', '5y', 'max']},
+            'timestamp': timestamps,
+            'indicators': {
+                'quote': [{'open': values, 'high': values, 'low': values, 'close': values,
+                           'volume': [0] * len(values)}],
+                'adjclose': [{'adjclose': values}]
+            }
+        }], 'error': None}}
+        self.send_body(200, json.dumps(chart).encode('utf-8'), 'application/json')
+
+    # ---------- COS ----------
+    def cos_get(self, path):
+        self.server.count(f'cos_{self.command.lower()}')
+        obj = self.server.objects.get(path)
+        if obj is None:
+            body = b'<?xml version="1.0" encoding="UTF-8"?><Error><Code>NoSuchKey</Code><Message>NoSuchKey</Message></Error>'
+            return self.send_body(404, body, 'application/xml')
+        self.send_body(200, obj['body'], obj['headers'].get('Content-Type', 'application/octet-stream'),
+                       {k: v for k, v in obj['headers'].items() if k != 'Content-Type'})
+
+    def cos_put(self, path):
+        self.server.count('cos_put')
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.inject():
+            return
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        headers = {k: v for k, v in self.headers.items()
+                   if k.lower().startswith('x-cos-meta-') or k in ('Content-Type', 'Content-Encoding', 'Cache-Control')}
+        headers['ETag'] = etag
+        self.server.objects[path] = {'body': body, 'headers': headers}
+        self.send_body(200, b'', 'text/plain', {'ETag': etag})
+
+
+def standin_environ(url):
+    """让主程序与上传脚本指向替身服务的环境变量"""
+    return {
+        'FRED_API_ROOT': f"{url}/fred",
+        'YAHOO_API_ROOT': f"{url}/yahoo",
+        'COS_DOMAIN': url.split('://', 1)[1],
+        'COS_SCHEME': 'http',
+        'COS_BUCKET_NAME': 'offline-1250000000',
+        'TENCENT_SECRET_ID': 'offline',
+        'TENCENT_SECRET_KEY': 'offline'
+    }
+
+
+class StandinServer(ThreadingHTTPServer):
+    """可在进程内启动的替身服务，stats() 返回各接口的请求计数"""
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, snapshot=None, latency=0.0, jitter=0.0,
+                 fail_rate=0.0, reset_rate=0.0, verbose=False):
+        super().__init__((host, port), StandinHandler)
+        self.fixtures = FixtureStore(snapshot)
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.reset_rate = reset_rate
+        self.verbose = verbose
+        self.objects = {}
+        self.counters = {}
+        self.counter_lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key, n=1):
+        with self.counter_lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def stats(self):
+        with self.counter_lock:
+            return dict(self.counters)
+
+    def environ(self):
+        return standin_environ(self.url)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class StandinProcess:
+    """在子进程中运行替身服务，避免与被测程序争用GIL或计入其内存统计"""
+    def __init__(self, snapshot=None, latency=0.0, jitter=0.0, fail_rate=0.0, reset_rate=0.0, port=None):
+        if port is None:
+            with socket.socket() as sock:
+                sock.bind(('127.0.0.1', 0))
+                port = sock.getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        self.args = [sys.executable, os.path.abspath(__file__), '--port', str(port),
+                     '--latency', str(latency), '--jitter', str(jitter),
+                     '--fail-rate', str(fail_rate), '--reset-rate', str(reset_rate)]
+        if snapshot:
+            self.args += ['--snapshot', snapshot]
+        self.process = None
+
+    def start(self, timeout=30):
+        self.process = subprocess.Popen(self.args, stdout=subprocess.DEVNULL)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                self.stats()
+                return self
+            except OSError:
+                if self.process.poll() is not None:
+                    raise RuntimeError(f"替身服务启动失败 (退出码 {self.process.returncode})")
+                time.sleep(0.1)
+        self.stop()
+        raise RuntimeError("替身服务启动超时")
+
+    def stats(self):
+        with urlopen(f"{self.url}/_stats", timeout=5) as response:
+            return json.load(response)
+
+    def touch(self, symbol):
+        """让替身服务中的指标发布一个新观测值"""
+        with urlopen(Request(f"{self.url}/_touch?symbol={quote(symbol)}", data=b'', method='POST'), timeout=5):
+            pass
+
+    def environ(self):
+        return standin_environ(self.url)
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+            self.process = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FRED / Yahoo / COS 离线替身服务")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--snapshot', default=None, help="使用数据快照中的序列（默认全部合成）")
+    parser.add_argument('--latency', type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument('--jitter', type=float, default=0.0, help="额外的随机延迟上限（秒）")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="返回503的请求比例")
+    parser.add_argument('--reset-rate', type=float, default=0.0, help="直接断开连接的请求比例")
+    parser.add_argument('--verbose', action='store_true', help="打印每个请求")
+    args = parser.parse_args(argv)
+
+    server = StandinServer(args.host, args.port, args.snapshot, args.latency, args.jitter,
+                           args.fail_rate, args.reset_rate, args.verbose)
+    print(f"🧪 离线替身服务已启动: {server.url}")
+    for key, value in server.environ().items():
+        print(f"   export {key}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 请求统计: {json.dumps(server.stats())}")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
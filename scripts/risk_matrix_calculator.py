@@ -1,15 +1,40 @@
-import pandas as pd
-import numpy as np
-import yfinance as yf
-import fredapi
+import importlib.util
+import sys
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED, TimeoutError as FuturesTimeout
+from collections import namedtuple
 from datetime import datetime, timedelta
+import argparse
+import bisect
+import operator
 import warnings
 import os
+import re
 import json
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import hashlib
+import sqlite3
+import xml.etree.ElementTree as ET
+from urllib.parse import urlparse, parse_qsl, urlencode, unquote
+
+
+def lazy_import(name):
+    """延迟导入：首次访问模块属性时才真正加载，list 等轻量命令无需等待 pandas/yfinance 的导入"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+yf = lazy_import('yfinance')
+requests = lazy_import('requests')
 warnings.filterwarnings('ignore')
 
 
@@ -117,22 +142,648 @@ DATA_CATEGORIES = {
 }
 
 
+# 令牌桶限速器 - 支持并发请求
+class TokenBucket:
+    """线程安全的令牌桶限速器"""
+    def __init__(self, rate, capacity):
+        self.rate = rate            # 每秒补充的令牌数
+        self.capacity = capacity    # 允许的突发请求数
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """获取一个令牌，令牌不足时等待，返回等待的秒数"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+# 下载阶段统计 - 记录每个请求与每个指标的耗时、重试和数据量
+class FetchMetrics:
+    """线程安全的下载统计，汇总为按数据源的直方图报告"""
+    LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30)                       # 秒
+    BYTES_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2)  # 字节
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = []   # 每次HTTP请求
+        self.symbols = []    # 每个指标的下载结果
+        self.sleeps = {}     # 各数据源在频次控制中等待的秒数
+
+    def response_hook(self, source):
+        """返回挂载到requests会话的响应钩子，记录延迟、重试次数和实际接收的字节数"""
+        def hook(response, *args, **kwargs):
+            retries = getattr(response.raw, 'retries', None)
+            self.record_request(
+                source,
+                symbol_from_url(response.url),
+                response.elapsed.total_seconds(),
+                len(retries.history) if retries is not None else 0,
+                self.bytes_received(response),
+                response.status_code,
+                getattr(response, 'from_cache', False)
+            )
+            return response
+        return hook
+
+    @staticmethod
+    def bytes_received(response):
+        """线路上接收的字节数（gzip等压缩编码时为压缩后大小）：优先取 Content-Length，否则取原始流读取位置"""
+        length = response.headers.get('Content-Length')
+        if length and length.isdigit():
+            return int(length)
+        response.content  # 读完响应体后原始流的位置才是接收的字节数
+        try:
+            return response.raw.tell()
+        except (AttributeError, OSError, ValueError):
+            return len(response.content or b'')
+
+    def record_request(self, source, symbol, latency, retries, bytes_received, status, cached=False):
+        with self.lock:
+            self.requests.append({
+                'source': source, 'symbol': symbol, 'latency': round(latency, 4), 'retries': retries,
+                'bytes_received': bytes_received, 'status': status, 'cached': cached
+            })
+
+    def record_symbol(self, source, symbol, seconds, points, method=None, error=None):
+        """记录单个指标的下载结果；method 为成功的获取方式（Yahoo回退链中的哪一种）"""
+        with self.lock:
+            self.symbols.append({
+                'source': source, 'symbol': symbol, 'seconds': round(seconds, 4), 'points': points,
+                'method': method, 'error': error
+            })
+
+    def record_sleep(self, source, seconds):
+        if seconds > 0:
+            with self.lock:
+                self.sleeps[source] = self.sleeps.get(source, 0.0) + seconds
+
+    @staticmethod
+    def histogram(values, buckets):
+        """按上界分桶计数，键为 "<=上界"，超出最后一个上界的计入 ">上界" """
+        counts = {f"<={bound}": 0 for bound in buckets}
+        counts[f">{buckets[-1]}"] = 0
+        for value in values:
+            index = bisect.bisect_left(buckets, value)
+            key = f"<={buckets[index]}" if index < len(buckets) else f">{buckets[-1]}"
+            counts[key] += 1
+        return counts
+
+    @staticmethod
+    def quantile(values, q):
+        if not values:
+            return None
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self):
+        """生成运行报告：按数据源汇总，附带每个指标的明细"""
+        with self.lock:
+            requests_log, symbols_log, sleeps = list(self.requests), list(self.symbols), dict(self.sleeps)
+
+        sources = {}
+        for source in sorted({r['source'] for r in requests_log} | {s['source'] for s in symbols_log} | set(sleeps)):
+            reqs = [r for r in requests_log if r['source'] == source]
+            network = [r for r in reqs if not r['cached']]
+            latencies = [r['latency'] for r in network]
+            syms = [s for s in symbols_log if s['source'] == source]
+            # 同一指标可能先经并发下载再逐个回退，按最终是否拿到数据计数（未更新而沿用本地存储的也算成功）
+            succeeded = {s['symbol'] for s in syms if s['points'] > 0 or s['method'] == 'unchanged'}
+            methods = {}
+            for s in syms:
+                if s['method']:
+                    methods[s['method']] = methods.get(s['method'], 0) + 1
+            sources[source] = {
+                'requests': len(reqs),
+                'cached': len(reqs) - len(network),
+                'http_errors': sum(1 for r in reqs if r['status'] >= 400),
+                'retries': sum(r['retries'] for r in reqs),
+                'retry_histogram': {str(n): sum(1 for r in reqs if r['retries'] == n)
+                                    for n in sorted({r['retries'] for r in reqs})},
+                'latency_s': {
+                    'total': round(sum(latencies), 3),
+                    'p50': self.quantile(latencies, 0.5),
+                    'p90': self.quantile(latencies, 0.9),
+                    'max': max(latencies) if latencies else None,
+                    'histogram': self.histogram(latencies, self.LATENCY_BUCKETS)
+                },
+                'bytes_received': {
+                    'total': sum(r['bytes_received'] for r in network),
+                    'histogram': self.histogram([r['bytes_received'] for r in network], self.BYTES_BUCKETS)
+                },
+                'rate_limit_sleep_s': round(sleeps.get(source, 0.0), 3),
+                'symbols': {
+                    'ok': len(succeeded),
+                    'failed': len({s['symbol'] for s in syms} - succeeded),
+                    'seconds': round(sum(s['seconds'] for s in syms), 3)
+                },
+                'methods': methods
+            }
+
+        return {
+            'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'wall_seconds': round(time.time() - self.started, 3),
+            'sources': sources,
+            'symbols': sorted(symbols_log, key=lambda s: -s['seconds'])
+        }
+
+
+# 增量刷新时向前回溯的天数，覆盖数据源对近期观测值的修订
+REFRESH_OVERLAP_DAYS = {
+    "daily": 7,
+    "weekly": 21,
+    "monthly": 100,
+    "quarterly": 200
+}
+
+
+# FRED序列信息中缓存的字段，last_updated 未变化说明没有新观测值或修订
+SERIES_INFO_FIELDS = ('last_updated', 'frequency', 'units')
+
+
+# 本地序列存储 - 支持增量更新
+class SeriesStore:
+    """基于SQLite的本地序列存储，保存每个指标的观测值及最后观测日期"""
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS observations ("
+                "symbol TEXT NOT NULL, date TEXT NOT NULL, value REAL, "
+                "PRIMARY KEY (symbol, date)) WITHOUT ROWID"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS series_meta ("
+                "symbol TEXT PRIMARY KEY, source TEXT, last_date TEXT, updated_at TEXT)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS series_info ("
+                "symbol TEXT PRIMARY KEY, last_updated TEXT, frequency TEXT, units TEXT, checked_at TEXT)"
+            )
+    
+    def last_date(self, symbol):
+        """返回已存储的最后观测日期，无记录时返回None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT last_date FROM series_meta WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        return pd.Timestamp(row[0]) if row and row[0] else None
+    
+    def load(self, symbol, start_date=None):
+        """读取指标序列（可指定起始日期）"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT date, value FROM observations WHERE symbol = ? AND date >= ? ORDER BY date",
+                (symbol, pd.Timestamp(start_date or '1900-01-01').strftime('%Y-%m-%d'))
+            ).fetchall()
+        if not rows:
+            return pd.Series(name=symbol, dtype=float)
+        dates, values = zip(*rows)
+        series = pd.Series(values, index=pd.DatetimeIndex(dates, name='date'), name=symbol, dtype=float)
+        return series
+    
+    def save(self, symbol, series, source):
+        """写入新观测值（同日期覆盖，以采纳数据修订）并更新最后观测日期"""
+        series = series.dropna()
+        if series.empty:
+            return
+        rows = [(symbol, d.strftime('%Y-%m-%d'), float(v)) for d, v in series.items()]
+        last_date = series.index.max().strftime('%Y-%m-%d')
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO observations (symbol, date, value) VALUES (?, ?, ?)", rows
+            )
+            self.conn.execute(
+                "INSERT INTO series_meta (symbol, source, last_date, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(symbol) DO UPDATE SET source = excluded.source, "
+                "last_date = MAX(series_meta.last_date, excluded.last_date), updated_at = excluded.updated_at",
+                (symbol, source, last_date, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            )
+    
+    def replace(self, symbol, series, source):
+        """删除指标已存储的全部观测值后写入 series（复权基准变化时整体替换历史）"""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM observations WHERE symbol = ?", (symbol,))
+            self.conn.execute("DELETE FROM series_meta WHERE symbol = ?", (symbol,))
+        self.save(symbol, series, source)
+    
+    def series_info(self, symbol):
+        """返回已存储观测值对应的数据源序列信息 {last_updated, frequency, units}，无记录时返回None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT last_updated, frequency, units FROM series_info WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        return dict(zip(SERIES_INFO_FIELDS, row)) if row else None
+    
+    def save_series_info(self, symbol, info):
+        """记录与已存储观测值对应的序列信息（观测值写入之后调用）"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO series_info (symbol, last_updated, frequency, units, checked_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (symbol, *(info.get(field) for field in SERIES_INFO_FIELDS),
+                 datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            )
+    
+    def close(self):
+        self.conn.close()
+
+
+def yahoo_error_is_permanent(error):
+    """代码不存在（404）或已退市的错误才说明该获取方式对此代码失效；限流、重试耗尽、空数据等视为暂时故障"""
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) == 404:
+        return True
+    message = str(error).lower()
+    return '404' in message or 'not found' in message or 'delisted' in message
+
+
+# Yahoo获取方式记忆 - 每个代码优先尝试上次成功的方式
+class YahooMethodMemory:
+    """记录每个Yahoo代码各获取方式的成败，持久化为JSON
+
+    连续 max_failures 次永久性失败（404/退市）的方式视为失效并跳过，retry_days 天后再重新尝试一次；
+    暂时故障只计入失败总数。所有方式都失效时仍保留一个方式，代码不会被整周跳过。
+    """
+    def __init__(self, path, max_failures=3, retry_days=7):
+        self.path = path
+        self.max_failures = max_failures
+        self.retry_days = retry_days
+        self.changed = False
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.symbols = json.load(f)
+        except (OSError, ValueError):
+            self.symbols = {}
+
+    def is_dead(self, stats, today):
+        if stats.get('consecutive_failures', 0) < self.max_failures:
+            return False
+        last_attempt = stats.get('last_attempt')
+        return last_attempt is not None and (today - pd.Timestamp(last_attempt)).days < self.retry_days
+
+    def order(self, symbol, methods, fallback=None):
+        """返回本次应尝试的方式：上次成功的方式在前，其余按默认顺序，失效方式跳过
+        
+        全部失效时返回上次成功的方式，没有则返回 fallback（默认第一个方式）。
+        """
+        memory = self.symbols.get(symbol, {})
+        stats = memory.get('methods', {})
+        today = pd.Timestamp(datetime.now().date())
+        live = [m for m in methods if not self.is_dead(stats.get(m, {}), today)]
+        preferred = memory.get('preferred')
+        if preferred in live:
+            live.remove(preferred)
+            live.insert(0, preferred)
+        if not live:
+            live = [preferred if preferred in methods else (fallback or methods[0])]
+        return live
+
+    def record(self, symbol, method, ok, permanent=False):
+        """记录一次尝试的结果，permanent 表示失败原因是代码不存在或已退市"""
+        memory = self.symbols.setdefault(symbol, {'preferred': None, 'methods': {}})
+        stats = memory['methods'].setdefault(method, {'ok': 0, 'fail': 0, 'consecutive_failures': 0})
+        stats['last_attempt'] = datetime.now().strftime('%Y-%m-%d')
+        if ok:
+            stats['ok'] += 1
+            stats['consecutive_failures'] = 0
+            memory['preferred'] = method
+        else:
+            stats['fail'] += 1
+            if permanent:
+                stats['consecutive_failures'] += 1
+        self.changed = True
+
+    def save(self):
+        if not self.changed:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        write_atomic(self.path, json.dumps(self.symbols, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8'))
+        self.changed = False
+
+
+# HTTP响应缓存有效期（秒），按指标频率区分
+HTTP_CACHE_TTL = {
+    "daily": 6 * 3600,
+    "weekly": 24 * 3600,
+    "monthly": 3 * 24 * 3600,
+    "quarterly": 7 * 24 * 3600
+}
+
+
+YAHOO_CHART_URL = "https://query2.finance.yahoo.com/v8/finance/chart/{symbol}"
+# 设置 YAHOO_API_ROOT 时，发往这些地址的请求改发到该地址（如本地离线替身服务）
+YAHOO_API_HOSTS = (
+    "https://query1.finance.yahoo.com", "https://query2.finance.yahoo.com", "https://fc.yahoo.com"
+)
+
+
+def symbol_from_url(url):
+    """从FRED/Yahoo请求URL中解析指标代码，无法识别时返回None"""
+    parsed = urlparse(url)
+    query = dict(parse_qsl(parsed.query))
+    if 'series_id' in query:
+        return query['series_id']
+    match = re.search(r'/finance/chart/([^/?]+)', parsed.path)
+    if match:
+        return unquote(match.group(1))
+    return None
+
+
+# HTTP响应缓存 - 支持ETag/Last-Modified条件请求
+class CachingHTTPAdapter:
+    """带磁盘缓存的传输适配器：有效期内直接返回缓存，过期后用条件请求重新验证
+    
+    实际请求委托给内部的 HTTPAdapter（不直接继承，以便 requests 可以延迟导入）。
+    """
+    def __init__(self, cache_dir, ttl_resolver, adapter=None, **kwargs):
+        self.adapter = adapter or requests.adapters.HTTPAdapter(**kwargs)
+        self.cache_dir = cache_dir
+        self.ttl_resolver = ttl_resolver  # url -> 有效期秒数，None表示不缓存
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def cache_url(url):
+        """缓存使用的URL，去掉api_key避免密钥写入磁盘"""
+        parsed = urlparse(url)
+        query = [(k, v) for k, v in parse_qsl(parsed.query) if k != 'api_key']
+        return parsed._replace(query=urlencode(query)).geturl()
+    
+    def _paths(self, url):
+        key = hashlib.sha256(self.cache_url(url).encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.json', base + '.body'
+    
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+            return meta, body
+        except (OSError, ValueError):
+            return None, None
+    
+    def _store(self, url, meta, body=None):
+        meta_path, body_path = self._paths(url)
+        if body is not None:
+            with open(body_path + '.tmp', 'wb') as f:
+                f.write(body)
+            os.replace(body_path + '.tmp', body_path)
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(meta_path + '.tmp', meta_path)
+    
+    def _cached_response(self, request, meta, body):
+        response = requests.Response()
+        response.status_code = meta['status']
+        response.reason = 'OK'
+        response.headers = requests.structures.CaseInsensitiveDict(meta['headers'])
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = body
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.from_cache = True
+        return response
+    
+    def send(self, request, **kwargs):
+        ttl = self.ttl_resolver(request.url) if request.method == 'GET' else None
+        if ttl is None:
+            return self.adapter.send(request, **kwargs)
+        
+        meta, body = self._load(request.url)
+        if meta is not None:
+            if time.time() - meta['stored_at'] < ttl:
+                return self._cached_response(request, meta, body)
+            # 缓存过期：支持时发送条件请求
+            if meta['headers'].get('ETag'):
+                request.headers['If-None-Match'] = meta['headers']['ETag']
+            if meta['headers'].get('Last-Modified'):
+                request.headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+        
+        try:
+            response = self.adapter.send(request, **kwargs)
+        except CircuitOpenError:
+            # 数据源已熔断：有过期缓存时沿用缓存
+            if meta is None:
+                raise
+            return self._cached_response(request, meta, body)
+        
+        if response.status_code == 304 and meta is not None:
+            response.close()
+            meta['stored_at'] = time.time()
+            self._store(request.url, meta)
+            return self._cached_response(request, meta, body)
+        
+        if response.status_code == 200:
+            # 内容已解压，去掉传输相关的头部
+            headers = {
+                k: v for k, v in response.headers.items()
+                if k.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')
+            }
+            meta = {
+                'url': self.cache_url(request.url),
+                'status': response.status_code,
+                'headers': headers,
+                'stored_at': time.time()
+            }
+            self._store(request.url, meta, response.content)
+        
+        return response
+    
+    def close(self):
+        self.adapter.close()
+
+
+# 数据源熔断器 - 代理或数据源不可达时快速失败
+class CircuitBreaker:
+    """连续 threshold 次连接失败后熔断，之后该数据源的请求直接失败，不再等待重试"""
+    def __init__(self, source, threshold=3):
+        self.source = source
+        self.threshold = threshold
+        self.failures = 0
+        self.total_failures = 0
+        self.tripped_at = None
+        self.last_error = None
+        self.skipped = []    # 熔断后被跳过的指标
+        self.lock = threading.Lock()
+
+    @property
+    def open(self):
+        return self.tripped_at is not None
+
+    def success(self):
+        with self.lock:
+            if not self.open:
+                self.failures = 0
+
+    def failure(self, error):
+        with self.lock:
+            self.failures += 1
+            self.total_failures += 1
+            self.last_error = str(error)
+            if not self.open and self.failures >= self.threshold:
+                self.tripped_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                print(f"🔌 {self.source} 连续 {self.failures} 次连接失败，已熔断，其余指标使用本地数据")
+
+    def skip(self, symbol):
+        with self.lock:
+            self.skipped.append(symbol)
+
+    def status(self, available=()):
+        """熔断状态；被跳过的指标按是否有本地数据分为 store / unavailable"""
+        return {
+            'state': 'tripped' if self.open else 'ok',
+            'tripped_at': self.tripped_at,
+            'consecutive_failures': self.failures,
+            'last_error': self.last_error,
+            'fallback_store': [s for s in self.skipped if s in available],
+            'unavailable': [s for s in self.skipped if s not in available]
+        }
+
+
+class RewritingHTTPAdapter:
+    """把请求URL的前缀替换为其他地址后再发送，缓存和统计仍以原URL为准"""
+    def __init__(self, adapter, prefixes):
+        self.adapter = adapter
+        self.prefixes = prefixes  # {原前缀: 新前缀}
+
+    def send(self, request, **kwargs):
+        for old, new in self.prefixes.items():
+            if request.url.startswith(old):
+                request = request.copy()
+                request.url = new + request.url[len(old):]
+                break
+        return self.adapter.send(request, **kwargs)
+
+    def close(self):
+        self.adapter.close()
+
+
+class CircuitOpenError(Exception):
+    """数据源已熔断"""
+
+
+class GuardedHTTPAdapter:
+    """在传输适配器外层接入熔断器：连接失败（重试耗尽后）计数，熔断后直接抛出 CircuitOpenError
+
+    放在传输层是因为 yfinance 会吞掉请求异常，只在调用方无法区分"无数据"和"连不上"。
+    """
+    def __init__(self, adapter, breaker):
+        self.adapter = adapter
+        self.breaker = breaker
+
+    def send(self, request, **kwargs):
+        if self.breaker.open:
+            raise CircuitOpenError(f"{self.breaker.source} 已熔断: {self.breaker.last_error}")
+        try:
+            response = self.adapter.send(request, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            self.breaker.failure(e)
+            raise
+        self.breaker.success()
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+# 通过requests会话访问FRED的客户端
+def create_session_fred(api_key, session):
+    """创建复用requests会话的FRED客户端，以便挂载重试与缓存适配器
+    
+    fredapi 在此处才导入；请求实现以实例属性的方式替换其基于urlopen的 __fetch_data。
+    设置 FRED_API_ROOT 时请求发往该地址（如本地离线替身服务）。
+    """
+    import fredapi
+    fred = fredapi.Fred(api_key=api_key)
+    fred.session = session
+    if os.environ.get('FRED_API_ROOT'):
+        fred.root_url = os.environ['FRED_API_ROOT'].rstrip('/')
+    
+    def fetch_data(url):
+        try:
+            response = session.get(url, params={'api_key': api_key}, timeout=30)
+        except requests.RequestException as e:
+            # 异常信息中包含完整URL，屏蔽API Key后再抛出
+            raise type(e)(str(e).replace(api_key, '***')) from None
+        try:
+            root = ET.fromstring(response.content)
+        except ET.ParseError:
+            raise ValueError(f"FRED响应解析失败 (HTTP {response.status_code})")
+        if response.status_code != 200:
+            raise ValueError(root.get('message'))
+        return root
+    
+    fred._Fred__fetch_data = fetch_data
+    return fred
+
+
 # 数据管理基类 - 增强版
 class DataManager:
-    def __init__(self, fred_api_key, alpha_vantage_key=None):
+    # 扩展的符号修正映射
+    yahoo_symbol_corrections = {
+        "DX-Y.NYB": "DX=F",
+       # "^MOVE": "^TNX",
+      #  "^SKEW": "^VIX",  # 如果SKEW不可用，用VIX代替
+    }
+    
+    def __init__(self, fred_api_key, alpha_vantage_key=None, check_fred=False):
         self.fred_api_key = fred_api_key
         self.alpha_key = alpha_vantage_key
         self.last_request_time = {}
+        self.rate_limit_lock = threading.Lock()
+        self.metrics = FetchMetrics()
+        
+        # 熔断器：连续 CIRCUIT_BREAKER_THRESHOLD 次连接失败后，该数据源其余指标不再请求
+        threshold = int(os.environ.get('CIRCUIT_BREAKER_THRESHOLD', '3'))
+        self.breakers = {source: CircuitBreaker(source, threshold) for source in ('fred', 'yahoo')}
+        
+        # 令牌桶配置 (每秒速率, 突发容量)
+        # FRED配额为每个Key 120次/分钟: 10 + 1.8*60 = 118，任意一分钟内不超过配额
+        # Yahoo并发下载的每个请求都取令牌：平均速率与 rate_limit 的0.2秒间隔相同，突发容量等于并发线程数
+        self.token_buckets = {
+            'fred': TokenBucket(rate=1.8, capacity=10),
+            'yahoo': TokenBucket(rate=5, capacity=8)
+        }
+        self.fred_max_workers = int(os.environ.get('FRED_MAX_WORKERS', '4'))
         
-        # 初始化FRED API
+        # HTTP响应缓存，FRED与Yahoo会话共用
+        self.http_cache_dir = None
+        if os.environ.get('HTTP_CACHE', 'true') == 'true':
+            self.http_cache_dir = os.environ.get('HTTP_CACHE_DIR', 'data/cache/http')
+        
+        # 初始化FRED API（check_fred 为 True 时才发请求验证Key，否则在首次下载时暴露问题）
         self.fred_available = False
         if fred_api_key:
             try:
-                self.fred = fredapi.Fred(api_key=fred_api_key)
-                # 测试API key是否有效
-                test = self.fred.get_series('GDP', limit=1)
+                self.fred = create_session_fred(fred_api_key, session=self.create_fred_session())
+                if check_fred:
+                    self.fred.get_series('GDP', limit=1)
+                    print(f"✅ FRED API连接成功 (Key: {fred_api_key[:8]}...{fred_api_key[-4:]})")
+                else:
+                    print(f"✅ FRED API已配置 (Key: {fred_api_key[:8]}...{fred_api_key[-4:]})")
                 self.fred_available = True
-                print(f"✅ FRED API连接成功 (Key: {fred_api_key[:8]}...{fred_api_key[-4:]})")
             except Exception as e:
                 self.fred_available = False
                 print(f"❌ FRED API连接失败: {str(e)}")
@@ -142,38 +793,88 @@ class DataManager:
                     print("   请确保API Key已激活")
         else:
             print("⚠️  未提供FRED API Key，将跳过FRED数据")
+        
+        # 初始化Yahoo Finance会话
+        self.yahoo_session = self.create_yahoo_session()
+    
+    def get_proxy_url(self):
+        """读取代理配置，未启用代理时返回None"""
+        if os.environ.get('USE_PROXY') != 'true':
+            return None
+        proxy_host = os.environ.get('PROXY_HOST', '127.0.0.1')
+        proxy_port = os.environ.get('PROXY_PORT', '1080')
+        return f'socks5://{proxy_host}:{proxy_port}'
+    
+    def get_indicator_info(self, symbol):
+        """查找指标配置"""
+        for cat_info in DATA_CATEGORIES.values():
+            if symbol in cat_info.get('indicators', {}):
+                return cat_info['indicators'][symbol]
+        return {}
+    
+    def http_cache_ttl(self, url):
+        """根据请求对应指标的频率确定缓存有效期，只缓存行情/序列接口，其余请求返回None（不缓存）"""
+        symbol = symbol_from_url(url)
+        # cookie、crumb、consent 等会话请求不能落盘：crumb 跨进程复用时对应的 cookie 已不存在，会导致401
+        if symbol is None:
+            return None
+        # FRED序列信息用于判断是否有新数据，不按指标频率长时间缓存
+        if urlparse(url).path.rstrip('/').endswith('/fred/series'):
+            return HTTP_CACHE_TTL['daily']
+        corrected = {v: k for k, v in self.yahoo_symbol_corrections.items()}
+        freq = self.get_indicator_info(corrected.get(symbol, symbol)).get('freq', 'daily')
+        return HTTP_CACHE_TTL.get(freq, HTTP_CACHE_TTL['daily'])
+    
+    def create_http_adapter(self, source):
+        """创建带重试策略与熔断器（启用缓存时带HTTP缓存）的传输适配器"""
+        from urllib3.util.retry import Retry
+        retry_strategy = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+        )
+        adapter = requests.adapters.HTTPAdapter(max_retries=retry_strategy)
+        yahoo_root = os.environ.get('YAHOO_API_ROOT')
+        if source == 'yahoo' and yahoo_root:
+            adapter = RewritingHTTPAdapter(adapter, {host: yahoo_root.rstrip('/') for host in YAHOO_API_HOSTS})
+        adapter = GuardedHTTPAdapter(adapter, self.breakers[source])
+        if self.http_cache_dir:
+            return CachingHTTPAdapter(self.http_cache_dir, self.http_cache_ttl, adapter=adapter)
+        return adapter
+    
+    def source_status(self, available=()):
+        """各数据源的熔断状态，available 为最终有数据的指标集合"""
+        return {source: breaker.status(available) for source, breaker in self.breakers.items()}
+    
+    def create_fred_session(self):
+        """创建FRED API会话（直连）"""
+        session = requests.Session()
+        adapter = self.create_http_adapter('fred')
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.hooks['response'].append(self.metrics.response_hook('fred'))
+        return session
+    
     def create_yahoo_session(self):
         """创建带代理的Yahoo Finance会话"""
-        import requests
-        from requests.adapters import HTTPAdapter
-        from urllib3.util.retry import Retry
-        
         session = requests.Session()
         
         # 检查是否需要使用代理
-        if os.environ.get('USE_PROXY') == 'true':
-            proxy_host = os.environ.get('PROXY_HOST', '127.0.0.1')
-            proxy_port = os.environ.get('PROXY_PORT', '1080')
-            
-            proxies = {
-                'http': f'socks5://{proxy_host}:{proxy_port}',
-                'https': f'socks5://{proxy_host}:{proxy_port}'
+        proxy_url = self.get_proxy_url()
+        if proxy_url:
+            session.proxies = {
+                'http': proxy_url,
+                'https': proxy_url
             }
-            session.proxies = proxies
-            print(f"🌐 Yahoo Finance使用代理: {proxy_host}:{proxy_port}")
+            print(f"🌐 Yahoo Finance使用代理: {proxy_url}")
         else:
             print("🌐 Yahoo Finance使用直连")
         
-        # 设置重试策略
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-        )
-        
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        # 设置重试策略、熔断器与响应缓存
+        adapter = self.create_http_adapter('yahoo')
         session.mount("http://", adapter)
         session.mount("https://", adapter)
+        session.hooks['response'].append(self.metrics.response_hook('yahoo'))
         
         # 设置请求头
         session.headers.update({
@@ -183,7 +884,7 @@ class DataManager:
         return session
         
     def rate_limit(self, source, min_interval=0.5):
-        """增强的频次控制"""
+        """增强的频次控制（加锁，多线程调用时同一数据源的请求间隔仍不小于设定值）"""
         intervals = {
             'fred': 0.6,
             'yahoo': 0.2,
@@ -191,39 +892,534 @@ class DataManager:
         }
         
         interval = intervals.get(source, min_interval)
-        now = time.time()
-        
-        if source in self.last_request_time:
-            elapsed = now - self.last_request_time[source]
-            if elapsed < interval:
-                time.sleep(interval - elapsed)
-        
-        self.last_request_time[source] = time.time()
+        with self.rate_limit_lock:
+            now = time.time()
+            
+            if source in self.last_request_time:
+                elapsed = now - self.last_request_time[source]
+                if elapsed < interval:
+                    time.sleep(interval - elapsed)
+                    self.metrics.record_sleep(source, interval - elapsed)
+            
+            self.last_request_time[source] = time.time()
+    
+    def acquire_token(self, source):
+        """令牌桶频次控制：允许多个请求同时在途，整体速率不超过数据源配额"""
+        bucket = self.token_buckets.get(source)
+        if bucket is None:
+            self.rate_limit(source)
+        else:
+            self.metrics.record_sleep(source, bucket.acquire())
+
+# 各频率一年对应的观测数，用于把"N年"窗口换算为观测个数
+PERIODS_PER_YEAR = {'daily': 252, 'weekly': 52, 'monthly': 12, 'quarterly': 4}
+
+
+def rolling_percentile(values, window, min_periods=None):
+    """滚动百分位排名（0-1，并列取平均排名），可一次计算多列
+    
+    values 为 Series/DataFrame 或一维/二维数组（每列一个指标）。底层使用 pandas 的
+    rolling rank，它在窗口内维护有序跳表，复杂度 O(n·log w)，窗口加长到3年/5年也不会明显变慢。
+    NaN 不参与计数；当前值为NaN或窗口内有效值少于 min_periods（默认等于 window）时结果为NaN。
+    """
+    if isinstance(values, (pd.Series, pd.DataFrame)):
+        return values.rolling(window, min_periods=min_periods).rank(pct=True)
+    values = np.asarray(values, dtype=float)
+    frame = pd.DataFrame(values.reshape(len(values), -1))
+    result = frame.rolling(window, min_periods=min_periods).rank(pct=True).to_numpy()
+    return result[:, 0] if values.ndim == 1 else result
+
+
+def infer_frequency(series):
+    """根据观测间隔的中位数推断数据频率"""
+    if len(series) < 2:
+        return 'daily'
+    median_interval = series.index.to_series().diff().median()
+    if median_interval <= pd.Timedelta(days=4):
+        return 'daily'
+    elif median_interval <= pd.Timedelta(days=10):
+        return 'weekly'
+    elif median_interval <= pd.Timedelta(days=45):
+        return 'monthly'
+    return 'quarterly'
+
+
+# 按频率分区的数据容器
+class FrequencyFrames:
+    """按频率分区的稠密数据容器
+    
+    每个指标只保存自身的有效观测值（已去除NaN），同频指标可按需组合为稠密DataFrame，
+    避免日度/周度/月度/季度混合在一张宽表中产生大量NaN。
+    """
+    def __init__(self, series=None, freqs=None, categories=None):
+        self._series = {}
+        self._freqs = {}
+        self._categories = {}
+        self._frames = {}
+        self.attrs = {}
+        freqs = freqs or {}
+        categories = categories or {}
+        for symbol, data in (series or {}).items():
+            self.add(symbol, data, freqs.get(symbol), categories.get(symbol))
+    
+    @classmethod
+    def from_dataframe(cls, df, freqs=None, categories=None):
+        """由宽表DataFrame构建（每列单独去除NaN）"""
+        frames = cls({col: df[col] for col in df.columns}, freqs, categories)
+        frames.attrs = dict(df.attrs)
+        return frames
+    
+    def add(self, symbol, series, freq=None, category=None):
+        """添加或替换一个指标序列"""
+        clean = series.dropna()
+        clean.name = symbol
+        freq = freq or infer_frequency(clean)
+        old_freq = self._freqs.get(symbol)
+        self._series[symbol] = clean
+        self._freqs[symbol] = freq
+        self._categories[symbol] = category
+        self._frames.pop(freq, None)
+        self._frames.pop(old_freq, None)
+    
+    @property
+    def columns(self):
+        return pd.Index(list(self._series))
+    
+    def __contains__(self, symbol):
+        return symbol in self._series
+    
+    def __len__(self):
+        return len(self._series)
+    
+    def __getitem__(self, symbol):
+        return self._series[symbol]
+    
+    def series(self, symbol):
+        """返回指标的有效观测序列（无NaN），不存在时返回空序列"""
+        if symbol in self._series:
+            return self._series[symbol]
+        return pd.Series(name=symbol, dtype=float)
+    
+    def freq(self, symbol):
+        return self._freqs.get(symbol)
+    
+    def category(self, symbol):
+        return self._categories.get(symbol)
+    
+    @property
+    def freqs(self):
+        """包含的频率（按首次出现顺序）"""
+        return list(dict.fromkeys(self._freqs.values()))
+    
+    def symbols(self, freq=None):
+        if freq is None:
+            return list(self._series)
+        return [s for s, f in self._freqs.items() if f == freq]
+    
+    def frame(self, freq):
+        """同频指标组成的稠密DataFrame（按需构建并缓存）"""
+        if freq not in self._frames:
+            members = {s: self._series[s] for s in self.symbols(freq)}
+            self._frames[freq] = pd.DataFrame(members).sort_index() if members else pd.DataFrame()
+        return self._frames[freq]
+    
+    @property
+    def last_date(self):
+        """所有指标中最新的观测日期"""
+        dates = [s.index[-1] for s in self._series.values() if len(s) > 0]
+        return max(dates) if dates else None
+    
+    def to_wide(self):
+        """合并为一张宽表（用于CSV/Excel等导出）"""
+        if not self._series:
+            return pd.DataFrame()
+        df = pd.DataFrame(self._series).sort_index()
+        df.attrs = dict(self.attrs)
+        return df
+    
+    def memory_usage(self):
+        """数据占用的字节数"""
+        return sum(s.memory_usage(index=True, deep=False) for s in self._series.values())
+    
+    def truncate(self, end):
+        """截取到指定日期（含）为止的数据，用于历史回放"""
+        end = pd.Timestamp(end)
+        frames = FrequencyFrames()
+        for symbol, series in self._series.items():
+            frames.add(symbol, series.loc[:end], self._freqs[symbol], self._categories[symbol])
+        frames.attrs = dict(self.attrs)
+        return frames
+    
+    def to_long(self):
+        """转为长表 (symbol, freq, category, date, value)，用于快照存储"""
+        parts = [
+            pd.DataFrame({
+                'symbol': symbol,
+                'freq': self._freqs[symbol],
+                'category': self._categories[symbol],
+                'date': series.index,
+                'value': series.to_numpy(dtype=float)
+            })
+            for symbol, series in self._series.items()
+        ]
+        columns = ['symbol', 'freq', 'category', 'date', 'value']
+        long = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+        return long.astype({'symbol': 'category', 'freq': 'category', 'category': 'category'})[columns]
+    
+    @classmethod
+    def from_long(cls, long, attrs=None):
+        """由 to_long 格式的长表重建"""
+        frames = cls()
+        for symbol, group in long.groupby('symbol', sort=False, observed=True):
+            category = group['category'].iloc[0]
+            series = pd.Series(group['value'].to_numpy(), index=pd.DatetimeIndex(group['date'], name='date'))
+            frames.add(symbol, series, group['freq'].iloc[0], None if pd.isna(category) else category)
+        frames.attrs = dict(attrs or {})
+        return frames
+
+
+# ==================== 数据快照 ====================
+# fetch阶段写出的快照，分析阶段可直接读取而无需重新下载
+SNAPSHOT_DIR = "data/snapshot"
+SNAPSHOT_ATTRS_KEY = b'risk_matrix_attrs'
+
+
+def snapshot_path(date="latest", output_dir=SNAPSHOT_DIR, fmt=None):
+    """快照文件路径，fmt 为 parquet/feather，默认读取环境变量 SNAPSHOT_FORMAT"""
+    fmt = fmt or os.environ.get('SNAPSHOT_FORMAT', 'parquet')
+    return os.path.join(output_dir, f"risk-data-{date}.{fmt}")
+
+
+def frames_to_arrow(frames, extra_metadata=None):
+    """把 FrequencyFrames 转为 Arrow 长表，表级元数据记录 frames.attrs（及 extra_metadata）"""
+    import pyarrow as pa
+    
+    table = pa.Table.from_pandas(frames.to_long(), preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SNAPSHOT_ATTRS_KEY] = json.dumps(frames.attrs, ensure_ascii=False, default=str).encode('utf-8')
+    metadata.update(extra_metadata or {})
+    return table.replace_schema_metadata(metadata)
+
+
+def save_snapshot(frames, output_dir=SNAPSHOT_DIR, date=None, fmt=None):
+    """把数据写为按日期命名的快照（Parquet/Feather 长表），latest 链接到同一文件，返回文件路径"""
+    date = date or datetime.now().strftime("%Y-%m-%d")
+    os.makedirs(output_dir, exist_ok=True)
+    path = snapshot_path(date, output_dir, fmt)
+    latest_path = snapshot_path("latest", output_dir, fmt)
+    
+    table = frames_to_arrow(frames)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    if path.endswith('.feather'):
+        from pyarrow import feather
+        feather.write_feather(table, tmp_path)
+    else:
+        import pyarrow.parquet as pq
+        pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+    link_atomic(path, latest_path)
+    print(f"💾 数据快照已保存: {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+    return path
+
+
+def load_snapshot(path=None):
+    """读取快照为 FrequencyFrames，默认读取最新快照"""
+    path = path or snapshot_path()
+    if path.endswith('.feather'):
+        from pyarrow import feather
+        table = feather.read_table(path)
+    else:
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+    raw_attrs = (table.schema.metadata or {}).get(SNAPSHOT_ATTRS_KEY)
+    attrs = json.loads(raw_attrs.decode('utf-8')) if raw_attrs else {}
+    frames = FrequencyFrames.from_long(table.to_pandas(), attrs)
+    print(f"📂 已加载数据快照: {path} ({len(frames)} 个指标)")
+    return frames
+
+
+# ==================== 数据导出 ====================
+# main() 输出的数据文件：默认只写 Parquet 长表（与快照格式相同，附带 DATA_CATEGORIES 中的指标说明），
+# CSV 和 Excel 报告需要宽表，按需生成，可通过参数或环境变量 DATA_EXPORT_FORMATS（逗号分隔）指定
+EXPORT_FORMATS = ('parquet', 'feather', 'csv', 'excel')
+EXPORT_EXTENSIONS = {'parquet': 'parquet', 'feather': 'feather', 'csv': 'csv', 'excel': 'xlsx'}
+# 长表导出的表级元数据中记录指标说明（indicator_metadata）的键
+INDICATORS_METADATA_KEY = b'risk_matrix_indicators'
+WIDE_EXPORT_FORMATS = ('csv', 'excel')
+
+
+def export_formats(formats=None):
+    """解析导出格式列表，未指定时读取环境变量 DATA_EXPORT_FORMATS（默认 parquet）"""
+    if formats is None:
+        formats = os.getenv('DATA_EXPORT_FORMATS', 'parquet').split(',')
+    formats = [fmt.strip().lower() for fmt in formats if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in EXPORT_FORMATS]
+    if unknown:
+        raise ValueError(f"未知的导出格式: {', '.join(unknown)}，可选: {', '.join(EXPORT_FORMATS)}")
+    return formats
+
+
+def indicator_metadata(symbols):
+    """按 DATA_CATEGORIES 返回各指标的说明 {symbol: {name, category, source, freq}}"""
+    metadata = {}
+    for category, cat_info in DATA_CATEGORIES.items():
+        for symbol, info in cat_info['indicators'].items():
+            if symbol in symbols and symbol not in metadata:
+                metadata[symbol] = {
+                    'name': info['name'],
+                    'category': category,
+                    'source': info.get('source', 'unknown'),
+                    'freq': info.get('freq', 'unknown')
+                }
+    return metadata
+
+
+def data_quality_table(df):
+    """一次向量化计算各列的数据点、缺失情况以及首末有效日期"""
+    valid = df.notna().to_numpy()
+    has_data = valid.any(axis=0)
+    first = valid.argmax(axis=0)
+    last = len(df) - 1 - valid[::-1].argmax(axis=0)
+    dates = df.index.strftime('%Y-%m-%d').to_numpy(dtype=object)
+    first_dates = np.full(len(df.columns), 'N/A', dtype=object)
+    last_dates = first_dates.copy()
+    first_dates[has_data] = dates[first[has_data]]
+    last_dates[has_data] = dates[last[has_data]]
+    data_points = valid.sum(axis=0)
+    missing = len(df) - data_points
+    return pd.DataFrame({
+        'Indicator': df.columns,
+        'Data_Points': data_points,
+        'Missing_Count': missing,
+        'Missing_Pct': (missing / max(len(df), 1) * 100).round(2),
+        'First_Date': first_dates,
+        'Last_Date': last_dates
+    })
+
+
+def frames_quality_table(frames):
+    """各指标的频率、数据点数以及首末观测日期（按各自频率的有效观测计算，不经过宽表）"""
+    symbols = frames.symbols()
+    series_list = [frames.series(s) for s in symbols]
+    return pd.DataFrame({
+        'Indicator': symbols,
+        'Category': [frames.category(s) for s in symbols],
+        'Freq': [frames.freq(s) for s in symbols],
+        'Data_Points': [len(s) for s in series_list],
+        'First_Date': [s.index[0] if len(s) else pd.NaT for s in series_list],
+        'Last_Date': [s.index[-1] if len(s) else pd.NaT for s in series_list]
+    })
+
+
+def excel_report_sheets(df):
+    """Excel报告的工作表定义 [(名称, 表头, 行迭代器)]，按行生成以便流式写出"""
+    quality = data_quality_table(df)
+    data_points = dict(zip(quality['Indicator'], quality['Data_Points']))
+    
+    # 数据：NaN写为空单元格，日期索引写为Excel日期
+    values = df.to_numpy(dtype=float)
+    cells = values.astype(object)
+    cells[np.isnan(values)] = None
+    data_rows = (
+        [timestamp, *row] for timestamp, row in zip(df.index.to_pydatetime(), cells.tolist())
+    )
+    
+    # 指标说明
+    indicator_rows = (
+        [symbol, info['name'], category, info.get('source', 'unknown'), info.get('freq', 'unknown'),
+         symbol in data_points, int(data_points.get(symbol, 0))]
+        for category, cat_info in DATA_CATEGORIES.items()
+        for symbol, info in cat_info['indicators'].items()
+    )
+    
+    return [
+        ('Data', [df.index.name or '', *df.columns], data_rows),
+        ('Indicators', ['Symbol', 'Name', 'Category', 'Source', 'Frequency', 'Available', 'Data_Points'],
+         indicator_rows),
+        ('Data_Quality', list(quality.columns), (row for row in quality.itertuples(index=False, name=None)))
+    ]
+
+
+def write_excel_report(df, path, engine=None):
+    """流式写出Excel报告：数据、指标说明和数据质量三个工作表
+    
+    engine 为 xlsxwriter（constant_memory 逐行写出）或 openpyxl（write_only 模式），
+    默认读取环境变量 EXCEL_ENGINE，未安装 xlsxwriter 时使用 openpyxl。返回实际使用的引擎。
+    """
+    engine = engine or os.getenv('EXCEL_ENGINE', 'xlsxwriter')
+    if engine == 'xlsxwriter':
+        try:
+            import xlsxwriter
+        except ImportError:
+            print("⚠️ 未安装xlsxwriter，改用openpyxl写出Excel")
+            engine = 'openpyxl'
+    
+    sheets = excel_report_sheets(df)
+    if engine == 'xlsxwriter':
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+        for name, header, rows in sheets:
+            worksheet = workbook.add_worksheet(name)
+            worksheet.write_row(0, 0, header)
+            for row_index, row in enumerate(rows, start=1):
+                for col_index, value in enumerate(row):
+                    if value is None:
+                        continue
+                    if isinstance(value, datetime):
+                        worksheet.write_datetime(row_index, col_index, value, date_format)
+                    else:
+                        worksheet.write(row_index, col_index, value)
+        workbook.close()
+    elif engine == 'openpyxl':
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        for name, header, rows in sheets:
+            worksheet = workbook.create_sheet(name)
+            worksheet.append(header)
+            for row in rows:
+                worksheet.append(row)
+        workbook.save(path)
+    else:
+        raise ValueError(f"未知的Excel引擎: {engine}，可选: xlsxwriter, openpyxl")
+    return engine
+
+
+def export_dataframe(df, formats, output_dir=".", timestamp=None):
+    """把宽表导出为 CSV/Excel 报告，文件名为 global_macro_data_{timestamp}.{ext}，返回 {格式: 路径}
+    
+    Parquet/Feather 只写长表（见 export_frames）。
+    """
+    unsupported = [fmt for fmt in formats if fmt not in WIDE_EXPORT_FORMATS]
+    if unsupported:
+        raise ValueError(f"宽表只导出 {', '.join(WIDE_EXPORT_FORMATS)}，{', '.join(unsupported)} 请使用 export_frames")
+    timestamp = timestamp or datetime.now().strftime('%Y%m%d_%H%M%S')
+    os.makedirs(output_dir, exist_ok=True)
+    written = {}
+
+    for fmt in formats:
+        path = os.path.join(output_dir, f"global_macro_data_{timestamp}.{EXPORT_EXTENSIONS[fmt]}")
+        started = time.perf_counter()
+        if fmt == 'csv':
+            df.to_csv(path)
+        else:
+            write_excel_report(df, path)
+        written[fmt] = path
+        print(f"✅ {fmt.upper()}数据已保存: {path} ({os.path.getsize(path) / 1024:.0f} KB, "
+              f"{time.perf_counter() - started:.2f}s)")
+    return written
+
+
+def export_frames(frames, formats=None, output_dir=".", timestamp=None):
+    """导出下载数据，返回 {格式: 路径}
+    
+    parquet/feather 写长表 (symbol, freq, category, date, value)，不构建宽表；
+    只有请求 csv/excel 时才合并宽表交给 export_dataframe。
+    """
+    formats = export_formats(formats)
+    timestamp = timestamp or datetime.now().strftime('%Y%m%d_%H%M%S')
+    os.makedirs(output_dir, exist_ok=True)
+    written = {}
+    
+    long_formats = [fmt for fmt in formats if fmt not in WIDE_EXPORT_FORMATS]
+    if long_formats:
+        metadata = json.dumps(indicator_metadata(set(frames.columns)), ensure_ascii=False)
+        table = frames_to_arrow(frames, {INDICATORS_METADATA_KEY: metadata.encode('utf-8')})
+    for fmt in long_formats:
+        path = os.path.join(output_dir, f"global_macro_data_{timestamp}.{EXPORT_EXTENSIONS[fmt]}")
+        started = time.perf_counter()
+        if fmt == 'parquet':
+            import pyarrow.parquet as pq
+            pq.write_table(table, path)
+        else:
+            from pyarrow import feather
+            feather.write_feather(table, path)
+        written[fmt] = path
+        print(f"✅ {fmt.upper()}数据已保存: {path} ({os.path.getsize(path) / 1024:.0f} KB, "
+              f"{time.perf_counter() - started:.2f}s)")
+    
+    wide_formats = [fmt for fmt in formats if fmt in WIDE_EXPORT_FORMATS]
+    if wide_formats:
+        written.update(export_dataframe(frames.to_wide(), wide_formats, output_dir, timestamp))
+    return written
+
+
+def merge_saved_config(config_file="data_config.json"):
+    """把配置文件中保存的分类和指标合并到 DATA_CATEGORIES"""
+    if not os.path.exists(config_file):
+        return
+    try:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            saved_config = json.load(f)
+        # 合并保存的配置和默认配置
+        for category, info in saved_config.items():
+            if category in DATA_CATEGORIES:
+                DATA_CATEGORIES[category]['indicators'].update(info.get('indicators', {}))
+            else:
+                DATA_CATEGORIES[category] = info
+        print(f"✅ 已加载配置文件: {config_file}")
+    except Exception as e:
+        print(f"⚠️  配置文件加载失败: {e}")
+
+
+def list_categories():
+    """列出所有分类"""
+    print("\n📁 可用分类:")
+    for category, info in DATA_CATEGORIES.items():
+        indicator_count = len(info.get("indicators", {}))
+        description = info.get("description", "")
+        print(f"   {category}: {indicator_count} 个指标 - {description}")
+
+
+def list_indicators(category=None):
+    """列出指标"""
+    if category and category in DATA_CATEGORIES:
+        categories = {category: DATA_CATEGORIES[category]}
+    else:
+        categories = DATA_CATEGORIES
+    
+    for cat_name, cat_info in categories.items():
+        print(f"\n📊 {cat_name}:")
+        for symbol, info in cat_info.get("indicators", {}).items():
+            print(f"   {symbol:15} - {info['name']} ({info['source']})")
+
 
 # 主数据下载类 - 完善版
 class GlobalMacroDataLoader(DataManager):
-    def __init__(self, fred_api_key=None, alpha_vantage_key=None):
-        super().__init__(fred_api_key, alpha_vantage_key)
+    def __init__(self, fred_api_key=None, alpha_vantage_key=None, check_fred=False):
+        super().__init__(fred_api_key, alpha_vantage_key, check_fred)
         self.data_cache = {}
         self.config_file = "data_config.json"
+        
+        # 本地序列存储：只下载上次观测日期之后的增量数据
+        self.store = None
+        if os.environ.get('SERIES_STORE', 'true') == 'true':
+            self.store = SeriesStore(os.environ.get('SERIES_STORE_PATH', 'data/cache/series_store.sqlite'))
+        
+        # FRED序列信息预检：低频指标先请求序列信息，last_updated 与本地存储一致时不再下载观测值
+        self.fred_info_freqs = set()
+        if self.store is not None and os.environ.get('FRED_INFO_CHECK', 'true') == 'true':
+            self.fred_info_freqs = {
+                f.strip() for f in os.environ.get('FRED_INFO_CHECK_FREQS', 'weekly,monthly,quarterly').split(',')
+            }
+        self.fred_pending_info = {}  # {symbol: 序列信息}，观测值写入存储后再记录
+        
+        # Yahoo并发下载配置（环境变量沿用 YAHOO_BATCH/YAHOO_BATCH_SIZE 的名称）
+        self.yahoo_concurrent = os.environ.get('YAHOO_BATCH', 'true') == 'true'
+        self.yahoo_chunk_size = int(os.environ.get('YAHOO_BATCH_SIZE', '50'))
+        self.yahoo_prefetched = None  # 整轮并发预取的结果 {symbol: Series}
+        
+        # 逐个下载时记住每个代码可用的获取方式
+        self.yahoo_methods = None
+        if os.environ.get('YAHOO_METHOD_MEMORY', 'true') == 'true':
+            self.yahoo_methods = YahooMethodMemory(
+                os.environ.get('YAHOO_METHOD_MEMORY_PATH', 'data/cache/yahoo_methods.json'),
+                max_failures=int(os.environ.get('YAHOO_METHOD_MAX_FAILURES', '3'))
+            )
         self.load_or_create_config()
         
     def load_or_create_config(self):
         """加载或创建配置文件"""
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    saved_config = json.load(f)
-                # 合并保存的配置和默认配置
-                for category, info in saved_config.items():
-                    if category in DATA_CATEGORIES:
-                        DATA_CATEGORIES[category]['indicators'].update(info.get('indicators', {}))
-                    else:
-                        DATA_CATEGORIES[category] = info
-                print(f"✅ 已加载配置文件: {self.config_file}")
-            except Exception as e:
-                print(f"⚠️  配置文件加载失败: {e}")
-        
+        merge_saved_config(self.config_file)
         self.save_config()
     
     def save_config(self):
@@ -272,23 +1468,11 @@ class GlobalMacroDataLoader(DataManager):
     
     def list_categories(self):
         """列出所有分类"""
-        print("\n📁 可用分类:")
-        for category, info in DATA_CATEGORIES.items():
-            indicator_count = len(info.get("indicators", {}))
-            description = info.get("description", "")
-            print(f"   {category}: {indicator_count} 个指标 - {description}")
+        list_categories()
     
     def list_indicators(self, category=None):
         """列出指标"""
-        if category and category in DATA_CATEGORIES:
-            categories = {category: DATA_CATEGORIES[category]}
-        else:
-            categories = DATA_CATEGORIES
-        
-        for cat_name, cat_info in categories.items():
-            print(f"\n📊 {cat_name}:")
-            for symbol, info in cat_info.get("indicators", {}).items():
-                print(f"   {symbol:15} - {info['name']} ({info['source']})")
+        list_indicators(category)
     
     def normalize_series_timezone(self, series, symbol):
         """统一时区处理"""
@@ -309,8 +1493,8 @@ class GlobalMacroDataLoader(DataManager):
         
         return series
         
-    def download_fred_data(self, symbols, start_date, end_date):
-        """下载FRED数据"""
+    def download_fred_data(self, symbols, start_date, end_date, start_dates=None):
+        """下载FRED数据（start_dates可为每个指标单独指定起始日期）"""
         results = {}
         
         if not self.fred_available:
@@ -319,100 +1503,271 @@ class GlobalMacroDataLoader(DataManager):
                 results[symbol] = pd.Series(name=symbol)
             return results
             
-        print(f"📊 正在从FRED下载 {len(symbols)} 个指标...")
-        success_count = 0
+        start_dates = start_dates or {}
+        workers = min(self.fred_max_workers, len(symbols))
+        mode = f"并发 {workers} 线程" if workers > 1 else "顺序"
+        print(f"📊 正在从FRED下载 {len(symbols)} 个指标 ({mode})...")
+        
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(self._fetch_fred_symbol, symbol, start_dates.get(symbol, start_date), end_date): symbol
+                    for symbol in symbols
+                }
+                fetched = {futures[future]: future.result() for future in as_completed(futures)}
+        else:
+            fetched = {
+                symbol: self._fetch_fred_symbol(symbol, start_dates.get(symbol, start_date), end_date)
+                for symbol in symbols
+            }
         
+        # 按原始顺序组装结果
+        success_count = 0
         for symbol in symbols:
-            try:
-                self.rate_limit('fred')
-                data = self.fred.get_series(symbol, start=start_date, end=end_date)
-                data = self.normalize_series_timezone(data, symbol)
+            data = fetched[symbol]
+            if data is None:
+                results[symbol] = pd.Series(name=symbol)
+            else:
                 results[symbol] = data
                 success_count += 1
-                print(f"  ✅ {symbol}: {len(data)} 数据点")
-            except Exception as e:
-                print(f"  ❌ {symbol}: {str(e)}")
-                results[symbol] = pd.Series(name=symbol)
         
         print(f"FRED数据下载完成: {success_count}/{len(symbols)} 成功")
         return results
     
+    def _fetch_fred_symbol(self, symbol, start_date, end_date):
+        """下载单个FRED指标，可在线程池中并发调用，失败时返回None
+        
+        序列信息预检判定未更新时返回空序列，由 merge_with_store 沿用本地存储的数据。
+        """
+        started = time.perf_counter()
+        if self.breakers['fred'].open:
+            self.breakers['fred'].skip(symbol)
+            self.metrics.record_symbol('fred', symbol, 0.0, 0, error="熔断跳过")
+            return None
+        try:
+            info = self.check_fred_series_info(symbol)
+            if info is not None and info == self.store.series_info(symbol):
+                self.metrics.record_symbol('fred', symbol, time.perf_counter() - started, 0, method='unchanged')
+                print(f"  ⏭️ {symbol}: 未更新 (last_updated {info['last_updated']})，沿用本地存储")
+                return pd.Series(name=symbol, dtype=float)
+            
+            self.acquire_token('fred')
+            data = self.fred.get_series(symbol, observation_start=start_date, observation_end=end_date)
+            data = self.normalize_series_timezone(data, symbol)
+            if info is not None:
+                self.fred_pending_info[symbol] = info
+            self.metrics.record_symbol('fred', symbol, time.perf_counter() - started, len(data))
+            print(f"  ✅ {symbol}: {len(data)} 数据点")
+            return data
+        except Exception as e:
+            self.metrics.record_symbol('fred', symbol, time.perf_counter() - started, 0, error=str(e))
+            print(f"  ❌ {symbol}: {str(e)}")
+            return None
+    
+    def check_fred_series_info(self, symbol):
+        """请求FRED序列信息（last_updated/frequency/units），仅对 fred_info_freqs 中的频率进行
+        
+        不需要预检或请求失败时返回None，调用方照常下载观测值。
+        """
+        freq = self.get_indicator_info(symbol).get('freq', 'daily')
+        if freq not in self.fred_info_freqs:
+            return None
+        try:
+            self.acquire_token('fred')
+            info = self.fred.get_series_info(symbol)
+        except Exception as e:
+            print(f"  ⚠️ {symbol}: 序列信息获取失败，直接下载观测值 ({e})")
+            return None
+        return {field: info.get(field) for field in SERIES_INFO_FIELDS}
+    
     def download_yahoo_data(self, symbols, start_date, end_date, price_type="Close"):
         """下载Yahoo Finance数据"""
         results = {}
         
-        # 扩展的符号修正映射
-        symbol_corrections = {
-            "DX-Y.NYB": "DX=F",
-           # "^MOVE": "^TNX",
-          #  "^SKEW": "^VIX",  # 如果SKEW不可用，用VIX代替
-        }
-        
-        corrected_symbols = []
-        symbol_map = {}
-        
-        for symbol in symbols:
-            if symbol in symbol_corrections:
-                corrected_symbol = symbol_corrections[symbol]
-                corrected_symbols.append(corrected_symbol)
-                symbol_map[corrected_symbol] = symbol
-                print(f"  📝 符号修正: {symbol} -> {corrected_symbol}")
-            else:
-                corrected_symbols.append(symbol)
-                symbol_map[symbol] = symbol
-        
-        print(f"📈 正在从Yahoo Finance下载 {len(corrected_symbols)} 个指标...")
-        success_count = 0
-        
-        for symbol in corrected_symbols:
-            try:
-                self.rate_limit('yahoo')
-                ticker = yf.Ticker(symbol,session=self.yahoo_session)
-                
-                # 多种数据获取方式
-                data = None
-                methods = [
-                    lambda: ticker.history(
-                        start=start_date, 
-                        end=end_date,
-                        auto_adjust=True,
-                        prepost=False,
-                        actions=False
-                    )[price_type],
-                    lambda: yf.download(
-                        symbol, 
-                        start=start_date, 
-                        end=end_date,
-                        progress=False
-                    )[price_type],
-                    lambda: ticker.history(period="5y")[price_type].loc[start_date:end_date]
-                ]
-                
-                for method in methods:
-                    try:
-                        data = method()
-                        if not data.empty:
-                            break
-                    except:
+        # 并发下载：整轮预取命中的直接使用，否则按本分类并发请求
+        if self.yahoo_prefetched is not None:
+            results.update({s: self.yahoo_prefetched[s] for s in symbols if s in self.yahoo_prefetched})
+        elif self.yahoo_concurrent and len(symbols) > 1:
+            results.update(self.download_yahoo_concurrent(symbols, start_date, end_date, price_type))
+        
+        # 仅并发下载中缺失的指标回退到逐个下载（依次尝试多种获取方式）
+        pending = [s for s in symbols if s not in results]
+        if results:
+            print(f"  📦 并发下载命中 {len(results)}/{len(symbols)} 个，{len(pending)} 个回退逐个下载")
+        
+        print(f"📈 正在从Yahoo Finance下载 {len(pending)} 个指标...")
+        success_count = 0
+        for symbol in pending:
+            data = self._fetch_yahoo_symbol(symbol, start_date, end_date, price_type)
+            if data is None:
+                results[symbol] = pd.Series(name=symbol)
+            else:
+                results[symbol] = data
+                success_count += 1
+        
+        if self.yahoo_methods:
+            self.yahoo_methods.save()
+        success_count += len(symbols) - len(pending)
+        print(f"Yahoo数据下载完成: {success_count}/{len(symbols)} 成功")
+        return {symbol: results[symbol] for symbol in symbols}
+    
+    def _fetch_yahoo_symbol(self, symbol, start_date, end_date, price_type="Close"):
+        """下载单个Yahoo指标，依次尝试多种获取方式，失败时返回None"""
+        started = time.perf_counter()
+        ticker_symbol = self.yahoo_symbol_corrections.get(symbol, symbol)
+        if ticker_symbol != symbol:
+            print(f"  📝 符号修正: {symbol} -> {ticker_symbol}")
+        
+        breaker = self.breakers['yahoo']
+        if breaker.open:
+            breaker.skip(symbol)
+            self.metrics.record_symbol('yahoo', symbol, 0.0, 0, error="熔断跳过")
+            return None
+        try:
+            self.rate_limit('yahoo')
+            ticker = yf.Ticker(ticker_symbol, session=self.yahoo_session)
+            
+            # 多种数据获取方式（按记忆调整顺序：上次成功的方式优先，近期连续失败的方式跳过）
+            data = None
+            succeeded = None
+            methods = {
+                'history': lambda: ticker.history(
+                    start=start_date, 
+                    end=end_date,
+                    auto_adjust=True,
+                    prepost=False,
+                    actions=False
+                )[price_type],
+                'download': lambda: yf.download(
+                    ticker_symbol, 
+                    start=start_date, 
+                    end=end_date,
+                    progress=False
+                )[price_type],
+                'chart': lambda: self.fetch_yahoo_chart(ticker_symbol, start_date, end_date, price_type)
+            }
+            # 全部方式失效时保留请求最少的图表接口
+            order = (self.yahoo_methods.order(ticker_symbol, list(methods), fallback='chart')
+                     if self.yahoo_methods else list(methods))
+            if len(order) < len(methods):
+                print(f"  ⏭️ {symbol}: 跳过近期失效的方式 {', '.join(m for m in methods if m not in order)}")
+            
+            for name in order:
+                if breaker.open:
+                    break
+                failures_before = breaker.total_failures
+                error = None
+                try:
+                    data = methods[name]()
+                    ok = not data.empty
+                except Exception as e:
+                    data, ok, error = None, False, e
+                # 连接失败不记入；只有404/退市才累计为该方式失效
+                if self.yahoo_methods and (ok or breaker.total_failures == failures_before):
+                    self.yahoo_methods.record(ticker_symbol, name, ok,
+                                              permanent=error is not None and yahoo_error_is_permanent(error))
+                if ok:
+                    succeeded = name
+                    break
+            
+            if succeeded is None and breaker.open:
+                breaker.skip(symbol)
+            
+            if data is not None and not data.empty:
+                data = self.normalize_series_timezone(data, symbol)
+                self.metrics.record_symbol('yahoo', symbol, time.perf_counter() - started,
+                                           len(data), method=succeeded)
+                print(f"  ✅ {symbol}: {len(data)} 数据点")
+                return data
+            self.metrics.record_symbol('yahoo', symbol, time.perf_counter() - started, 0, error="无数据")
+            print(f"  ❌ {symbol}: 无数据")
+            return None
+        except Exception as e:
+            self.metrics.record_symbol('yahoo', symbol, time.perf_counter() - started, 0, error=str(e))
+            print(f"  ❌ {symbol}: {str(e)}")
+            return None
+    
+    def fetch_yahoo_chart(self, symbol, start_date, end_date, price_type="Close"):
+        """直接请求Yahoo图表接口，只获取 [start_date, end_date) 区间的日线
+        
+        Close 取复权收盘价，与 history(auto_adjust=True) 一致；日期为交易所当地日期。
+        """
+        params = {
+            'period1': int(pd.Timestamp(start_date, tz='UTC').timestamp()),
+            'period2': int(pd.Timestamp(end_date, tz='UTC').timestamp()),
+            'interval': '1d',
+            'includeAdjustedClose': 'true'
+        }
+        response = self.yahoo_session.get(YAHOO_CHART_URL.format(symbol=symbol), params=params, timeout=30)
+        response.raise_for_status()
+        chart = response.json()['chart']
+        if chart.get('error') or not chart.get('result'):
+            raise ValueError((chart.get('error') or {}).get('description', '无数据'))
+        
+        result = chart['result'][0]
+        indicators = result.get('indicators', {})
+        if price_type == 'Close' and indicators.get('adjclose'):
+            values = indicators['adjclose'][0]['adjclose']
+        else:
+            values = indicators['quote'][0][price_type.lower()]
+        timezone = result.get('meta', {}).get('exchangeTimezoneName') or 'UTC'
+        index = pd.to_datetime(result.get('timestamp') or [], unit='s', utc=True).tz_convert(timezone).normalize()
+        return pd.Series(values, index=index, dtype=float).dropna()
+    
+    def download_yahoo_concurrent(self, symbols, start_date, end_date, price_type="Close"):
+        """并发下载Yahoo Finance数据：每个代码一次日线请求（请求数与逐个下载相同），
+        按 yahoo_chunk_size 分组，组内在共享会话上以8个线程并发执行，每个请求从Yahoo令牌桶取令牌限速
+        
+        返回 {symbol: Series}，缺失或为空的指标不包含在结果中
+        """
+        # 修正后代码相同的指标只请求一次
+        symbols = list({self.yahoo_symbol_corrections.get(s, s): s for s in symbols}.values())
+        results = {}
+        
+        print(f"📦 正在并发下载 {len(symbols)} 个Yahoo指标...")
+        for i in range(0, len(symbols), self.yahoo_chunk_size):
+            chunk = symbols[i:i + self.yahoo_chunk_size]
+            # yfinance的多代码下载本质上是逐代码并发请求图表接口，且不接受会话参数；
+            # 这里在共享会话上并发执行，使代理、重试与HTTP缓存同样生效。
+            # 延迟导入在主线程完成：LazyLoader 被多个线程同时首次访问时可能得到未初始化的模块
+            yf.Ticker
+            with ThreadPoolExecutor(max_workers=min(len(chunk), 8)) as executor:
+                futures = {
+                    executor.submit(self._fetch_yahoo_history, symbol, start_date, end_date, price_type): symbol
+                    for symbol in chunk
+                }
+                for future in as_completed(futures):
+                    symbol = futures[future]
+                    data = future.result()
+                    if data is None or data.empty:
                         continue
-                
-                if data is not None and not data.empty:
-                    original_symbol = symbol_map[symbol]
-                    data = self.normalize_series_timezone(data, original_symbol)
-                    results[original_symbol] = data
-                    success_count += 1
-                    print(f"  ✅ {original_symbol}: {len(data)} 数据点")
-                else:
-                    print(f"  ❌ {symbol_map[symbol]}: 无数据")
-                    results[symbol_map[symbol]] = pd.Series(name=symbol_map[symbol])
-                    
-            except Exception as e:
-                print(f"  ❌ {symbol_map[symbol]}: {str(e)}")
-                results[symbol_map[symbol]] = pd.Series(name=symbol_map[symbol])
+                    results[symbol] = self.normalize_series_timezone(data.copy(), symbol)
         
-        print(f"Yahoo数据下载完成: {success_count}/{len(corrected_symbols)} 成功")
+        print(f"  📦 并发下载完成: {len(results)}/{len(symbols)} 个指标有数据")
         return results
     
+    def _fetch_yahoo_history(self, symbol, start_date, end_date, price_type="Close"):
+        """并发下载中的单代码请求（按修正后的代码请求，统计记在原始指标代码下），失败时返回None"""
+        if self.breakers['yahoo'].open:
+            return None
+        ticker = self.yahoo_symbol_corrections.get(symbol, symbol)
+        self.acquire_token('yahoo')
+        started = time.perf_counter()
+        try:
+            history = yf.Ticker(ticker, session=self.yahoo_session).history(
+                start=start_date,
+                end=end_date,
+                auto_adjust=True,
+                prepost=False,
+                actions=False
+            )
+            data = history[price_type].dropna()
+            self.metrics.record_symbol('yahoo', symbol, time.perf_counter() - started, len(data), method='concurrent')
+            return data
+        except Exception as e:
+            self.metrics.record_symbol('yahoo', symbol, time.perf_counter() - started, 0, method=None, error=str(e))
+            return None
+    
     def calculate_derived_indicators(self, data_dict):
         """计算衍生指标"""
         derived = {}
@@ -456,12 +1811,12 @@ class GlobalMacroDataLoader(DataManager):
             if 'VIXCLS' in data_dict:
                 vix = data_dict['VIXCLS'].dropna()
                 if len(vix) > 252:  # 至少一年的数据
-                    derived['VIX_PERCENTILE_1Y'] = vix.rolling(252).rank(pct=True) * 100
+                    derived['VIX_PERCENTILE_1Y'] = rolling_percentile(vix, PERIODS_PER_YEAR['daily']) * 100
                     derived['VIX_PERCENTILE_1Y'].name = 'VIX_PERCENTILE_1Y'
                     print("  ✅ 计算VIX一年百分位数")
             
             # 美元强弱指数 (如果有多个汇率)
-            fx_pairs = ['EUR=X', 'JPY=X', 'GBP=X', 'CNY=X']
+            fx_pairs = list(DERIVED_INPUTS['USD_STRENGTH_INDEX'])
             available_fx = [pair for pair in fx_pairs if pair in data_dict and not data_dict[pair].empty]
             if len(available_fx) >= 2:
                 fx_data = pd.DataFrame({pair: data_dict[pair] for pair in available_fx}).dropna()
@@ -520,7 +1875,8 @@ class GlobalMacroDataLoader(DataManager):
             'download_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'total_indicators': len(df.columns),
             'date_range': f"{df.index.min()} to {df.index.max()}",
-            'categories': list(DATA_CATEGORIES.keys())
+            'categories': list(DATA_CATEGORIES.keys()),
+            'sources': self.source_status(set(df.columns))
         }
         
         # 打印数据质量信息
@@ -536,13 +1892,46 @@ class GlobalMacroDataLoader(DataManager):
         print(f"✅ 数据合并完成! ({df.shape[0]} 行 × {df.shape[1]} 列)")
         return df
     
-    def download_category_data(self, category, start_date, end_date):
-        """按分类下载数据"""
+    def prepare_series(self, series, symbol):
+        """统一时区、去除重复日期（保留最后一个）并按日期排序"""
+        series = self.normalize_series_timezone(series, symbol)
+        if series.index.has_duplicates:
+            series = series[~series.index.duplicated(keep='last')]
+        return series.sort_index()
+    
+    def create_frequency_frames(self, data_dict):
+        """创建按频率分区的分析数据容器（供分析器使用）"""
+        print("\n🔄 正在按频率整理数据...")
+        frames = FrequencyFrames()
+        for category, cat_data in data_dict.items():
+            for symbol, series in cat_data.items():
+                if series.empty:
+                    continue
+                freq = self.get_indicator_info(symbol).get('freq')
+                frames.add(symbol, self.prepare_series(series, symbol), freq, category)
+        
+        frames.attrs = {
+            'download_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'total_indicators': len(frames),
+            'categories': list(DATA_CATEGORIES.keys()),
+            'sources': self.source_status(set(frames.columns))
+        }
+        
+        for freq in frames.freqs:
+            frame = frames.frame(freq)
+            print(f"   {freq:10}: {frame.shape[1]:3} 个指标 × {frame.shape[0]:6,} 行")
+        print(f"✅ 数据整理完成! ({len(frames)} 个指标, {frames.memory_usage() / 1024:.0f} KB)")
+        return frames
+    
+    def download_category_data(self, category, start_date, end_date, symbols=None):
+        """按分类下载数据（symbols 指定时只下载其中的指标）"""
         if category not in DATA_CATEGORIES:
             raise ValueError(f"未知分类: {category}. 可用分类: {list(DATA_CATEGORIES.keys())}")
         
         cat_info = DATA_CATEGORIES[category]
-        indicators = cat_info['indicators']
+        indicators = {
+            symbol: info for symbol, info in cat_info['indicators'].items() if symbols is None or symbol in symbols
+        }
         
         print(f"\n{'='*60}")
         print(f"📡 下载 {category} 数据")
@@ -561,20 +1950,91 @@ class GlobalMacroDataLoader(DataManager):
         
         results = {}
         
-        # 下载FRED数据
+        # 下载FRED数据（有本地存储时每个指标只请求增量区间）
         if fred_symbols:
-            fred_data = self.download_fred_data(fred_symbols, start_date, end_date)
+            fred_starts = self.get_fetch_starts(fred_symbols, start_date)
+            fred_data = self.download_fred_data(fred_symbols, start_date, end_date, start_dates=fred_starts)
             results.update(fred_data)
         
-        # 下载Yahoo数据
+        # 下载Yahoo数据（同一请求只能使用一个起始日期，按起始日期分组）
         if yahoo_symbols:
-            yahoo_data = self.download_yahoo_data(yahoo_symbols, start_date, end_date)
-            results.update(yahoo_data)
+            yahoo_starts = self.get_fetch_starts(yahoo_symbols, start_date)
+            for fetch_start in sorted(set(yahoo_starts.values())):
+                group = [s for s in yahoo_symbols if yahoo_starts[s] == fetch_start]
+                yahoo_data = self.download_yahoo_data(group, fetch_start, end_date)
+                results.update(yahoo_data)
         
-        return results
+        if self.store is not None:
+            results = self.merge_with_store(results, start_date, end_date)
+        
+        return {symbol: results[symbol] for symbol in indicators if symbol in results}
+    
+    def get_fetch_starts(self, symbols, start_date):
+        """计算每个指标的下载起始日期：有本地存储时为 最后观测日期 - 回溯天数"""
+        starts = {}
+        for symbol in symbols:
+            starts[symbol] = start_date
+            last_date = self.store.last_date(symbol) if self.store is not None else None
+            if last_date is not None:
+                freq = self.get_indicator_info(symbol).get('freq', 'daily')
+                overlap = REFRESH_OVERLAP_DAYS.get(freq, REFRESH_OVERLAP_DAYS['daily'])
+                starts[symbol] = max(pd.Timestamp(start_date), last_date - timedelta(days=overlap)).strftime('%Y-%m-%d')
+        
+        incremental = [s for s in symbols if starts[s] != start_date]
+        if incremental:
+            print(f"  🗄️ 增量更新 {len(incremental)}/{len(symbols)} 个指标，最早自 {min(starts[s] for s in incremental)} 起")
+        return starts
+    
+    def adjustment_changed(self, symbol, fresh):
+        """Yahoo复权价在分红/拆股后整体改变：比较回溯区间内新旧数据，不一致时返回True
+        
+        已存储的最后一个观测日可能是盘中价格，不参与比较。
+        """
+        stored = self.store.load(symbol, fresh.index.min())
+        if len(stored) < 2:
+            return False
+        stored = stored.iloc[:-1]
+        fresh = fresh.dropna()
+        fresh = pd.Series(fresh.values, index=pd.DatetimeIndex(fresh.index).normalize().tz_localize(None))
+        common = stored.index.intersection(fresh.index)
+        if common.empty:
+            return False
+        return not np.allclose(stored[common].values, fresh[common].values, rtol=1e-6, atol=0)
+    
+    def merge_with_store(self, results, start_date, end_date=None):
+        """将新下载的数据写入本地存储，再读出完整历史序列；下载失败或未更新时沿用已存储的数据
+        
+        Yahoo指标的回溯区间与已存储数据不一致（复权基准变化）时，重新下载完整历史并整体替换，
+        避免新旧复权基准的数据拼接在一起。
+        """
+        end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+        merged = {}
+        for symbol, fresh in results.items():
+            source = self.get_indicator_info(symbol).get('source', 'yahoo').lower()
+            info = self.fred_pending_info.pop(symbol, None)
+            if not fresh.empty and source != 'fred' and self.adjustment_changed(symbol, fresh):
+                print(f"  🔁 {symbol}: 复权数据与本地存储不一致，重新下载完整历史")
+                full = self._fetch_yahoo_symbol(symbol, start_date, end_date)
+                if full is not None and not full.empty:
+                    self.store.replace(symbol, full, source)
+                    merged[symbol] = self.store.load(symbol, start_date)
+                else:
+                    # 完整历史下载失败时不拼接不同复权基准的数据，本次沿用已存储的历史
+                    merged[symbol] = self.store.load(symbol, start_date)
+                continue
+            if not fresh.empty:
+                self.store.save(symbol, fresh, source)
+                if info is not None:
+                    self.store.save_series_info(symbol, info)
+            history = self.store.load(symbol, start_date)
+            merged[symbol] = history if not history.empty else fresh
+        return merged
     
-    def download_all_data(self, start_date='2018-01-01', end_date=None, categories=None):
-        """下载所有或指定分类的数据"""
+    def download_all_data(self, start_date='2018-01-01', end_date=None, categories=None, symbols=None):
+        """下载所有或指定分类的数据
+        
+        symbols 为按需下载计划（见 plan_fetch），指定时只下载其中的指标，没有计划内指标的分类整体跳过。
+        """
         if end_date is None:
             end_date = datetime.now().strftime('%Y-%m-%d')
         
@@ -588,18 +2048,37 @@ class GlobalMacroDataLoader(DataManager):
         
         all_data = {}
         
+        # 整轮并发预取所有Yahoo指标，各分类下载时直接取用
+        if self.yahoo_concurrent:
+            yahoo_symbols = [
+                symbol
+                for category in categories if category in DATA_CATEGORIES
+                for symbol, info in DATA_CATEGORIES[category]['indicators'].items()
+                if info.get('source', 'yahoo').lower() != 'fred' and (symbols is None or symbol in symbols)
+            ]
+            if yahoo_symbols:
+                self.yahoo_prefetched = {}
+                yahoo_starts = self.get_fetch_starts(yahoo_symbols, start_date)
+                for fetch_start in sorted(set(yahoo_starts.values())):
+                    group = [s for s in yahoo_symbols if yahoo_starts[s] == fetch_start]
+                    self.yahoo_prefetched.update(self.download_yahoo_concurrent(group, fetch_start, end_date))
+        
         for category in categories:
             if category not in DATA_CATEGORIES:
                 print(f"⚠️  跳过未知分类: {category}")
                 continue
+            if symbols is not None and not any(s in symbols for s in DATA_CATEGORIES[category]['indicators']):
+                continue
                 
             try:
-                category_data = self.download_category_data(category, start_date, end_date)
+                category_data = self.download_category_data(category, start_date, end_date, symbols)
                 all_data[category] = category_data
                 time.sleep(1)  # API限制缓冲
             except Exception as e:
                 print(f"❌ 下载 {category} 时出错: {str(e)}")
         
+        self.yahoo_prefetched = None
+        
         # 计算衍生指标
         flat_data = {}
         for cat_data in all_data.values():
@@ -612,6 +2091,107 @@ class GlobalMacroDataLoader(DataManager):
         
         return all_data
 
+    def stream_all_data(self, start_date='2018-01-01', end_date=None, categories=None, symbols=None):
+        """流式下载：每个指标下载完成即产出 (分类, 指标代码, 序列)，不等待所在分类或其他数据源
+        
+        FRED指标在线程池中并发请求（令牌桶限速），Yahoo指标在另一个线程中依次请求
+        （开启并发下载时按组产出），分类之间不再等待。产出的序列已与本地存储合并并经过
+        prepare_series 整理，下载失败的指标产出空序列；全部指标到达后最后产出衍生指标。
+        symbols 为按需下载计划（见 plan_fetch），指定时只下载其中的指标。
+        """
+        if end_date is None:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+        
+        if categories is None:
+            categories = list(DATA_CATEGORIES.keys())
+        elif isinstance(categories, str):
+            categories = [categories]
+        
+        print(f"📅 数据时间范围: {start_date} 至 {end_date}")
+        print(f"📁 流式下载分类: {categories}")
+        
+        indicators = {}
+        for category in categories:
+            if category not in DATA_CATEGORIES:
+                print(f"⚠️  跳过未知分类: {category}")
+                continue
+            for symbol in DATA_CATEGORIES[category]['indicators']:
+                if symbols is None or symbol in symbols:
+                    indicators.setdefault(symbol, category)
+        
+        fred_symbols = [s for s in indicators if self.get_indicator_info(s).get('source', 'yahoo').lower() == 'fred']
+        yahoo_symbols = [s for s in indicators if s not in fred_symbols]
+        starts = self.get_fetch_starts(list(indicators), start_date)
+        
+        started = time.perf_counter()
+        fred_executor = ThreadPoolExecutor(max_workers=max(1, self.fred_max_workers))
+        yahoo_executor = ThreadPoolExecutor(max_workers=1)
+        # future -> (是否并发下载的一组, 指标列表)
+        futures = {}
+        unavailable = []
+        if fred_symbols and not self.fred_available:
+            print("⚠️  FRED API不可用，跳过FRED数据")
+            unavailable = fred_symbols
+        else:
+            for symbol in fred_symbols:
+                future = fred_executor.submit(self._fetch_fred_symbol, symbol, starts[symbol], end_date)
+                futures[future] = (False, [symbol])
+        
+        if self.yahoo_concurrent and len(yahoo_symbols) > 1:
+            for fetch_start in sorted({starts[s] for s in yahoo_symbols}):
+                group = [s for s in yahoo_symbols if starts[s] == fetch_start]
+                for i in range(0, len(group), self.yahoo_chunk_size):
+                    chunk = group[i:i + self.yahoo_chunk_size]
+                    futures[yahoo_executor.submit(self.download_yahoo_concurrent, chunk, fetch_start, end_date)] = (True, chunk)
+        else:
+            for symbol in yahoo_symbols:
+                future = yahoo_executor.submit(self._fetch_yahoo_symbol, symbol, starts[symbol], end_date)
+                futures[future] = (False, [symbol])
+        
+        flat_data = {}
+        
+        def finish(symbol, series):
+            series = pd.Series(name=symbol) if series is None else series
+            if self.store is not None:
+                series = self.merge_with_store({symbol: series}, start_date, end_date)[symbol]
+            if not series.empty:
+                series = self.prepare_series(series, symbol)
+            flat_data[symbol] = series
+            return indicators[symbol], symbol, series
+        
+        try:
+            for symbol in unavailable:
+                yield finish(symbol, None)
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    grouped, symbols = futures.pop(future)
+                    if not grouped:
+                        yield finish(symbols[0], future.result())
+                        continue
+                    # 并发下载中缺失的指标回退到逐个下载
+                    fetched = future.result()
+                    for symbol in symbols:
+                        if symbol not in fetched:
+                            retry = yahoo_executor.submit(self._fetch_yahoo_symbol, symbol, starts[symbol], end_date)
+                            futures[retry] = (False, [symbol])
+                    for symbol in symbols:
+                        if symbol in fetched:
+                            yield finish(symbol, fetched[symbol])
+        finally:
+            # 消费方提前退出时不再等待剩余请求
+            fred_executor.shutdown(wait=False, cancel_futures=True)
+            yahoo_executor.shutdown(wait=False, cancel_futures=True)
+            if self.yahoo_methods:
+                self.yahoo_methods.save()
+        
+        success_count = sum(1 for series in flat_data.values() if not series.empty)
+        print(f"✅ 流式下载完成: {success_count}/{len(indicators)} 成功 ({time.perf_counter() - started:.1f}s)")
+        
+        if success_count:
+            for symbol, series in self.calculate_derived_indicators(flat_data).items():
+                yield '衍生指标', symbol, self.prepare_series(series, symbol)
+
 def get_fred_api_key():
     """智能获取FRED API Key"""
     # 方法1: 从环境变量获取
@@ -627,8 +2207,8 @@ def get_fred_api_key():
     
     return api_key if api_key else None
 
-# 增强的使用函数
-def main():
+def create_loader(check_fred=False):
+    """创建数据加载器并显示可用分类"""
     print("🚀 全球宏观数据下载系统启动")
     print("="*60)
     
@@ -638,127 +2218,477 @@ def main():
     if not FRED_API_KEY or FRED_API_KEY == "your_api_key_here":
         FRED_API_KEY = get_fred_api_key()
     
-    loader = GlobalMacroDataLoader(FRED_API_KEY)
+    loader = GlobalMacroDataLoader(FRED_API_KEY, check_fred=check_fred)
     
     # 显示可用分类和指标
     loader.list_categories()
+    return loader
+
+# 增强的使用函数
+def main(start_date='2018-01-01', end_date=None, categories=None, check_fred=False, exports=None, symbols=None,
+         output_dir="data", latest=True):
+    """下载数据并输出质量报告和数据文件，返回 (frames, all_data, loader)
+    
+    数据按频率整理为 FrequencyFrames，不再合并稀疏宽表（仅导出 csv/excel 时临时构建）。
     
-    # 下载数据
-    start_date = '2018-01-01'  # 缩短时间范围以提高下载成功率
-    end_date = datetime.now().strftime('%Y-%m-%d')
+    exports 为导出格式列表（parquet/feather/csv/excel），默认读取环境变量 DATA_EXPORT_FORMATS；
+    symbols 为按需下载计划（见 plan_fetch），默认下载分类中的全部指标；
+    下载统计写入 output_dir，latest 为 False 时不更新 fetch-metrics-latest.json。
+    """
+    loader = create_loader(check_fred)
     
-    # 可以选择特定分类下载
-    # categories = ['全球风险情绪', '信用与流动性']  # 指定分类
-    categories = None  # 下载所有分类
+    # 下载数据（默认从2018年开始，缩短时间范围以提高下载成功率；categories 为 None 时下载所有分类）
+    end_date = end_date or datetime.now().strftime('%Y-%m-%d')
     
-    all_data = loader.download_all_data(start_date, end_date, categories)
+    all_data = loader.download_all_data(start_date, end_date, categories, symbols)
+    try:
+        save_fetch_metrics(loader.metrics, output_dir, latest=latest)
+    except Exception as e:
+        print(f"⚠️ 下载统计保存失败: {e}")
     
-    # 创建分析DataFrame
-    df = loader.create_analysis_dataframe(all_data)
+    # 按频率整理数据
+    frames = loader.create_frequency_frames(all_data)
     
-    if df.empty:
-        print("❌ 创建DataFrame失败")
-        return None, all_data
+    if not len(frames):
+        print("❌ 没有有效数据")
+        return None, all_data, loader
     
     # 数据质量报告
     print("\n" + "="*60)
     print("📊 数据质量报告")
     print("="*60)
     
-    # 缺失值分析
-    missing_summary = df.isnull().sum().sort_values(ascending=False)
-    print("缺失值情况（前10）:")
-    for col, missing in missing_summary.head(10).items():
-        missing_pct = missing / len(df) * 100 if len(df) > 0 else 0
-        print(f"   {col:25}: {missing:5,} ({missing_pct:5.1f}%)")
+    quality = frames_quality_table(frames)
+    print("数据点最少的指标（前10）:")
+    for row in quality.nsmallest(10, 'Data_Points').itertuples(index=False):
+        print(f"   {row.Indicator:25}: {row.Data_Points:6,} ({row.Freq}, 最新 {row.Last_Date.strftime('%Y-%m-%d')})")
     
     print(f"\n📈 数据概况:")
-    print(f"   时间范围: {df.index.min().strftime('%Y-%m-%d')} 至 {df.index.max().strftime('%Y-%m-%d')}")
-    print(f"   指标数量: {len(df.columns)}")
-    print(f"   观察值: {df.shape[0]:,} 行 × {df.shape[1]} 列")
-    print(f"   数据密度: {(1 - df.isnull().sum().sum() / df.size) * 100:.1f}%")
+    print(f"   时间范围: {quality['First_Date'].min().strftime('%Y-%m-%d')} 至 "
+          f"{quality['Last_Date'].max().strftime('%Y-%m-%d')}")
+    print(f"   指标数量: {len(frames)} "
+          f"({', '.join(f'{freq} {n}' for freq, n in quality['Freq'].value_counts().items())})")
+    print(f"   观察值: {quality['Data_Points'].sum():,} 个")
+    print(f"   内存占用: {frames.memory_usage() / 1024:.0f} KB")
     
-    # 保存数据
+    # 保存数据（默认只写Parquet长表，CSV/Excel按需生成宽表）
     try:
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        csv_filename = f'global_macro_data_{timestamp}.csv'
-        excel_filename = f'global_macro_data_{timestamp}.xlsx'
-        
-        df.to_csv(csv_filename)
-        print(f"✅ CSV数据已保存: {csv_filename}")
-        
-        # Excel格式，包含指标说明
-        with pd.ExcelWriter(excel_filename, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Data')
-            
-            # 指标说明
-            indicator_info = []
-            for category, cat_info in DATA_CATEGORIES.items():
-                for symbol, info in cat_info['indicators'].items():
-                    indicator_info.append({
-                        'Symbol': symbol,
-                        'Name': info['name'],
-                        'Category': category,
-                        'Source': info.get('source', 'unknown'),
-                        'Frequency': info.get('freq', 'unknown'),
-                        'Available': symbol in df.columns,
-                        'Data_Points': len(df[symbol].dropna()) if symbol in df.columns else 0
-                    })
-            
-            pd.DataFrame(indicator_info).to_excel(writer, sheet_name='Indicators', index=False)
-            
-            # 数据质量汇总
-            quality_df = pd.DataFrame({
-                'Indicator': df.columns,
-                'Data_Points': df.count(),
-                'Missing_Count': df.isnull().sum(),
-                'Missing_Pct': (df.isnull().sum() / len(df) * 100).round(2),
-                'First_Date': [df[col].dropna().index.min().strftime('%Y-%m-%d') 
-                              if not df[col].dropna().empty else 'N/A' for col in df.columns],
-                'Last_Date': [df[col].dropna().index.max().strftime('%Y-%m-%d') 
-                             if not df[col].dropna().empty else 'N/A' for col in df.columns]
-            })
-            quality_df.to_excel(writer, sheet_name='Data_Quality', index=False)
-        
-        print(f"✅ Excel数据已保存: {excel_filename}")
-        
+        export_frames(frames, exports)
     except Exception as e:
         print(f"❌ 保存文件时出错: {str(e)}")
     
-    return df, all_data, loader
+    return frames, all_data, loader
 
 
 
 
 
-# 运行代码
-if __name__ == "__main__":
-    df, raw_data, loader = main()
-    if df is not None:
-        show_analysis_summary(df)
-        
-    # 显示使用示例
-    print("\n💡 要查看使用示例，请运行: example_usage()")
+# 第三框架：全球风险情绪指标专业解读（JSON版本）
 
+# 标准统计特征的回看位置，与 _calculate_change 的 periods 参数含义一致
+FEATURE_CHANGE_PERIODS = {
+    "change_1w": -5,
+    "change_1m": -21,
+    "change_3m": -63,
+    "change_1y": -252
+}
+FEATURE_DIFF_PERIODS = {
+    "diff_1d": -2,
+    "diff_1w": -5,
+    "diff_1m": -21,
+    "diff_1y": -252
+}
+# 长周期滚动百分位排名（按 rank(pct=True) 口径，并列取平均）
+FEATURE_PERCENTILE_YEARS = (3, 5)
+FEATURE_PERCENTILE_COLUMNS = [f"percentile_{n}y" for n in FEATURE_PERCENTILE_YEARS]
 
 
+def compute_series_features(frames, symbols=None):
+    """一次向量化计算所有指标的标准统计特征
+    
+    将各指标最近的观测值右对齐到同一个矩阵中，按列运算得到：最新值、
+    1周/1月/3月/1年变化率（%）、同期水平差值、1年百分位、最新值的3年/5年百分位排名、
+    MA20和5日波动率（差分标准差）。
+    返回以指标代码为索引的DataFrame。
+    """
+    symbols = [s for s in (frames.columns if symbols is None else symbols) if len(frames.series(s)) > 0]
+    columns = ['latest', 'count', *FEATURE_CHANGE_PERIODS, *FEATURE_DIFF_PERIODS,
+               'percentile_1y', *FEATURE_PERCENTILE_COLUMNS, 'ma_20', 'volatility_5d']
+    if not symbols:
+        return pd.DataFrame(columns=columns, dtype=float, index=pd.Index([], name='symbol'))
+    
+    series_list = [frames.series(s) for s in symbols]
+    counts = np.array([len(s) for s in series_list])
+    # 近一年（按日期）的观测数，包含当前值
+    counts_1y = np.array([
+        len(s) - s.index.searchsorted(s.index[-1] - pd.DateOffset(years=1)) for s in series_list
+    ])
+    
+    # 3年/5年百分位的窗口按各指标频率换算为观测个数
+    windows = {
+        f"percentile_{n}y": np.array([n * PERIODS_PER_YEAR.get(frames.freq(s), PERIODS_PER_YEAR['daily'])
+                                      for s in symbols])
+        for n in FEATURE_PERCENTILE_YEARS
+    }
+    
+    # 右对齐的尾部观测值矩阵，不足部分为NaN
+    width = int(max(-min(FEATURE_CHANGE_PERIODS.values()) + 1, counts_1y.max(),
+                    max(w.max() for w in windows.values())))
+    tail = np.full((len(symbols), width), np.nan)
+    for i, s in enumerate(series_list):
+        values = s.to_numpy(dtype=float)[-width:]
+        tail[i, width - len(values):] = values
+    latest = tail[:, -1]
+    
+    features = {'latest': latest, 'count': counts}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for name, periods in FEATURE_CHANGE_PERIODS.items():
+            past = tail[:, periods]
+            valid = (counts >= -periods) & (past != 0)
+            features[name] = np.where(valid, (latest - past) / past * 100, 0.0)
+        for name, periods in FEATURE_DIFF_PERIODS.items():
+            features[name] = np.where(counts >= -periods, latest - tail[:, periods], 0.0)
+        
+        in_last_year = np.arange(width)[None, :] >= (width - counts_1y)[:, None]
+        features['percentile_1y'] = ((tail <= latest[:, None]) & in_last_year).sum(axis=1) / counts_1y * 100
+        features['ma_20'] = np.where(counts >= 20, np.nanmean(tail[:, -20:], axis=1), latest)
+        features['volatility_5d'] = np.where(
+            counts > 5, np.std(np.diff(tail[:, -6:], axis=1), axis=1, ddof=1), 0.0
+        )
+    
+        # 长周期百分位只需最新值在窗口内的排名（与 rolling_percentile 口径一致：并列取平均排名），
+        # 历史不足一个窗口时为NaN
+        for name, window in windows.items():
+            in_window = np.arange(width)[None, :] >= (width - window)[:, None]
+            below = ((tail < latest[:, None]) & in_window).sum(axis=1)
+            equal = ((tail == latest[:, None]) & in_window).sum(axis=1)
+            features[name] = np.where(counts >= window, (below + (equal + 1) / 2) / window * 100, np.nan)
+    
+    return pd.DataFrame(features, index=pd.Index(symbols, name='symbol'))[columns]
 
 
-# 第三框架：全球风险情绪指标专业解读（JSON版本）
-import pandas as pd
-import numpy as np
-import json
-import os
-from datetime import datetime
+# 风险矩阵分析器注册表：JSON输出键 -> 分析方法名及其读取的指标，顺序即 main_indicators 的输出顺序
+# inputs 供流水线模式判断分析方法何时可以执行（见 stream_analysis）
+AnalyzerSpec = namedtuple('AnalyzerSpec', ['key', 'method', 'inputs'])
+
+ANALYZER_REGISTRY = [
+    AnalyzerSpec("vix", "analyze_vix", ("VIXCLS",)),
+    AnalyzerSpec("fed_rrp", "analyze_fed_rrp", ("RRPONTSYD",)),
+    AnalyzerSpec("dollar_index", "analyze_dollar_index", ("DX-Y.NYB",)),
+    AnalyzerSpec("walcl", "analyze_walcl", ("WALCL",)),
+    AnalyzerSpec("skew", "analyze_skew", ("^SKEW",)),
+    AnalyzerSpec("move", "analyze_move", ("^MOVE",)),
+    AnalyzerSpec("t10y2y", "analyze_yield_curve_t10y2y", ("T10Y2Y",)),
+    AnalyzerSpec("hy_spread", "analyze_hy_credit_spread", ("BAMLH0A0HYM2",)),
+    AnalyzerSpec("nfci", "analyze_nfci", ("NFCI",)),
+    AnalyzerSpec("sofr", "analyze_sofr", ("SOFR", "IORB")),
+    # 大宗商品
+    AnalyzerSpec("wti_crude", "analyze_wti_crude", ("CL=F",)),
+    AnalyzerSpec("gold", "analyze_gold_futures", ("GC=F",)),
+    AnalyzerSpec("copper", "analyze_copper_futures", ("HG=F",)),
+    AnalyzerSpec("natural_gas", "analyze_natural_gas", ("NG=F",)),
+    AnalyzerSpec("soybean", "analyze_soybean", ("ZS=F",)),
+    AnalyzerSpec("corn", "analyze_corn", ("ZC=F",)),
+    AnalyzerSpec("wheat", "analyze_wheat", ("ZW=F",)),
+    AnalyzerSpec("dbc", "analyze_dbc_etf", ("DBC",)),
+    # 汇率与加密货币
+    AnalyzerSpec("jpy", "analyze_jpy_usd", ("JPY=X",)),
+    AnalyzerSpec("eur", "analyze_eur_usd", ("EUR=X",)),
+    AnalyzerSpec("cny", "analyze_cny_usd", ("CNY=X",)),
+    #AnalyzerSpec("gbp", "analyze_gbp_usd", ("GBP=X",)),
+    AnalyzerSpec("btc", "analyze_btc_usd", ("BTC-USD",)),
+    AnalyzerSpec("eth", "analyze_eth_usd", ("ETH-USD",)),
+    AnalyzerSpec("sol", "analyze_sol_usd", ("SOL-USD",)),
+    # 经济政策不确定性
+    AnalyzerSpec("world_epu", "analyze_world_epu", ("WLEMUINDXD",)),
+    AnalyzerSpec("us_epu", "analyze_us_epu", ("USEPUINDXD",)),
+    AnalyzerSpec("fiscal_balance", "analyze_us_fiscal_balance", ("MTSDS133FMS",)),
+    AnalyzerSpec("consumer_sentiment", "analyze_michigan_consumer_sentiment", ("UMCSENT",)),
+    AnalyzerSpec("inflation_expectation_5y", "analyze_5y_inflation_expectation", ("T5YIE",)),
+    # 宏观经济
+    AnalyzerSpec("core_cpi", "analyze_core_cpi", ("CPILFESL",)),
+    AnalyzerSpec("nonfarm", "analyze_nonfarm_payrolls", ("PAYEMS",)),
+    AnalyzerSpec("trade_balance", "analyze_trade_balance", ("BOPGSTB",)),
+    AnalyzerSpec("china_exports", "analyze_china_exports", ("EXPCH",)),
+    AnalyzerSpec("china_imports", "analyze_china_imports", ("IMPCH",)),
+]
+
+# 这些输出在风险矩阵JSON中一直是单元素列表 [{...}]，保持原有结构以兼容下游消费者
+LIST_WRAPPED_OUTPUTS = ('core_cpi', 'nonfarm', 'trade_balance', 'china_exports')
+
+# 衍生指标读取的指标（计算见 GlobalMacroDataLoader.calculate_derived_indicators）
+DERIVED_INPUTS = {
+    'T10Y2Y_CALC': ('DGS10', 'DGS2'),
+    'HY_IG_SPREAD': ('BAMLH0A0HYM2', 'BAMLC0A0CM'),
+    'BRENT_WTI_SPREAD': ('BZ=F', 'CL=F'),
+    'VIX_PERCENTILE_1Y': ('VIXCLS',),
+    'USD_STRENGTH_INDEX': ('EUR=X', 'JPY=X', 'GBP=X', 'CNY=X'),
+}
+# 代表完整风险矩阵（全部分析器）的输出名
+RISK_MATRIX_OUTPUT = 'risk_matrix'
+
+
+def select_analyzers(outputs=None):
+    """按输出名选出要执行的分析器（保持注册表顺序），outputs 为空或包含 risk_matrix 时返回全部
+    
+    衍生指标不在风险矩阵中，不能作为输出名（需要衍生指标序列时使用 fetch 导出）。
+    """
+    known = {spec.key for spec in ANALYZER_REGISTRY} | {RISK_MATRIX_OUTPUT}
+    derived = [output for output in outputs or () if output in DERIVED_INPUTS]
+    if derived:
+        raise ValueError(f"衍生指标不属于风险矩阵: {', '.join(derived)}（请使用 fetch 导出衍生指标序列）")
+    unknown = [output for output in outputs or () if output not in known]
+    if unknown:
+        raise ValueError(f"未知的输出: {', '.join(unknown)}. 可用: {RISK_MATRIX_OUTPUT}, "
+                         f"分析器 {[spec.key for spec in ANALYZER_REGISTRY]}")
+    if not outputs or RISK_MATRIX_OUTPUT in outputs:
+        return ANALYZER_REGISTRY
+    return [spec for spec in ANALYZER_REGISTRY if spec.key in outputs]
+
+
+def plan_fetch(outputs=None, categories=None):
+    """按需下载计划：生成指定输出所需的最小指标集合
+    
+    outputs 可包含分析器键（如 vix、sofr）、衍生指标代码（如 T10Y2Y_CALC）或 risk_matrix，
+    默认 risk_matrix。返回按 DATA_CATEGORIES 顺序排列的指标代码列表，未知的输出名抛出 ValueError。
+    """
+    outputs = [RISK_MATRIX_OUTPUT] if not outputs else list(outputs)
+    analyzers = {spec.key: spec for spec in ANALYZER_REGISTRY}
+    needed = set()
+    for output in outputs:
+        if output == RISK_MATRIX_OUTPUT:
+            needed.update(symbol for spec in ANALYZER_REGISTRY for symbol in spec.inputs)
+        elif output in analyzers:
+            needed.update(analyzers[output].inputs)
+        elif output in DERIVED_INPUTS:
+            needed.update(DERIVED_INPUTS[output])
+        else:
+            raise ValueError(f"未知的输出: {output}. 可用: {RISK_MATRIX_OUTPUT}, "
+                             f"分析器 {list(analyzers)}, 衍生指标 {list(DERIVED_INPUTS)}")
+    
+    if isinstance(categories, str):
+        categories = [categories]
+    available = [
+        symbol
+        for category, info in DATA_CATEGORIES.items() if categories is None or category in categories
+        for symbol in info['indicators']
+    ]
+    plan = [symbol for symbol in available if symbol in needed]
+    print(f"🧭 按需下载 {len(plan)}/{len(available)} 个指标（{', '.join(outputs)}），"
+          f"跳过 {len(available) - len(plan)} 个未被使用的指标")
+    return plan
+
+
+# 各分析方法的阈值/制度表，默认读取脚本同目录的 regime_bands.json（可用 REGIME_BANDS_PATH 指定）
+# 每个指标下 ladders 的每一项对应分析方法中的一组 if/elif 判定：bands 按顺序匹配，
+# when 为 "<"/"<="/">"/">=" 加阈值，最后一项为 "else"；fields 为该组判定输出的字段。
+# backfill 描述历史回填时 regime 判定所用的输入（见 regime_input）。
+REGIME_BANDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "regime_bands.json")
+
+BAND_OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+class BandClassifier:
+    """由一组顺序判定的阈值区间编译成的分类器
+    
+    单变量的 if/elif 阈值判定总是把数轴划分为若干区间：编译时取所有阈值作为断点，
+    对每个断点及相邻断点之间的开区间按原顺序判定一次，得到每段对应的结果。
+    分类时只需一次二分查找（标量用 bisect，数组用 np.searchsorted），NaN 取 else 的结果。
+    threshold_names 按区间顺序为各阈值命名（null 表示不输出），命名的阈值即分析结果中的 thresholds。
+    """
+    def __init__(self, name, fields, bands, threshold_names=None):
+        self.name = name
+        self.fields = list(fields)
+        self.outcomes = []
+        rules = []
+        values = []
+        for band in bands:
+            outcome = tuple(band[field] for field in self.fields)
+            if set(band) - {"when"} != set(self.fields):
+                raise ValueError(f"阈值表 {name} 的区间字段与 fields 不一致: {band}")
+            self.outcomes.append(outcome)
+            when = band["when"].split()
+            if when != ["else"]:
+                if len(when) != 2 or when[0] not in BAND_OPERATORS:
+                    raise ValueError(f"阈值表 {name} 的判定条件无法解析: {band['when']}")
+                rules.append((BAND_OPERATORS[when[0]], float(when[1])))
+                values.append(json.loads(when[1]))
+        if len(rules) != len(self.outcomes) - 1:
+            raise ValueError(f"阈值表 {name} 需要以且仅以最后一项 else 结尾")
+        threshold_names = threshold_names or []
+        if threshold_names and len(threshold_names) != len(values):
+            raise ValueError(f"阈值表 {name} 的 threshold_names 数量与阈值个数不一致")
+        # 阈值按表中的写法输出（整数保持整数）
+        self.thresholds = {key: value for key, value in zip(threshold_names, values) if key is not None}
+        self.default = len(rules)
+        
+        def evaluate(value):
+            for index, (compare, threshold) in enumerate(rules):
+                if compare(value, threshold):
+                    return index
+            return self.default
+        
+        # 断点 b0<b1<...：区段依次为 (-inf,b0), {b0}, (b0,b1), {b1}, ..., (b_last, inf)
+        self.breakpoints = sorted({threshold for _, threshold in rules})
+        points = self.breakpoints
+        samples = [points[0] - 1 if points else 0.0]
+        for i, point in enumerate(points):
+            upper = points[i + 1] if i + 1 < len(points) else point + 1
+            samples += [point, (point + upper) / 2]
+        self.segments = [evaluate(value) for value in samples]
+        self._breakpoints_array = None
+        self._segments_array = None
+    
+    def index(self, value):
+        """标量分类，返回区间序号"""
+        value = float(value)
+        if value != value:
+            return self.default
+        i = bisect.bisect_left(self.breakpoints, value)
+        on_point = i < len(self.breakpoints) and self.breakpoints[i] == value
+        return self.segments[2 * i + 1 if on_point else 2 * i]
+    
+    def indices(self, values):
+        """数组分类，返回区间序号数组"""
+        if self._breakpoints_array is None:
+            self._breakpoints_array = np.asarray(self.breakpoints, dtype=float)
+            self._segments_array = np.asarray(self.segments)
+        values = np.asarray(values, dtype=float)
+        points = self._breakpoints_array
+        i = np.searchsorted(points, values, side='left')
+        on_point = (i < len(points)) & (points[np.minimum(i, len(points) - 1)] == values) if len(points) else False
+        result = self._segments_array[np.where(on_point, 2 * i + 1, 2 * i)]
+        return np.where(np.isnan(values), self.default, result)
+    
+    def labels(self, values, field):
+        """数组分类，返回指定字段的取值数组"""
+        position = self.fields.index(field)
+        choices = np.array([outcome[position] for outcome in self.outcomes], dtype=object)
+        return choices[self.indices(values)]
+    
+    def __call__(self, value):
+        """标量分类，按 fields 顺序返回各字段取值（只有一个字段时直接返回该值）"""
+        outcome = self.outcomes[self.index(value)]
+        return outcome if len(outcome) > 1 else outcome[0]
+
+
+_regime_tables = {}
+
+
+def load_regime_bands(path=None):
+    """读取阈值/制度表并编译各组判定，结果按路径缓存"""
+    path = path or os.environ.get('REGIME_BANDS_PATH') or REGIME_BANDS_PATH
+    if path not in _regime_tables:
+        with open(path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+        tables = {}
+        for key, spec in raw.items():
+            ladders = {
+                name: BandClassifier(f"{key}.{name}", ladder["fields"], ladder["bands"], ladder.get("threshold_names"))
+                for name, ladder in spec.get("ladders", {}).items()
+            }
+            tables[key] = {**spec, "ladders": ladders}
+        _regime_tables[path] = tables
+    return _regime_tables[path]
+
+
+def regime_input(series, spec):
+    """按阈值表 backfill 中的 input 定义，计算序列每个观测点上用于判定制度的数值
+    
+    input 为 value（默认）时取 当前值/divisor；为 change 时取 periods 个观测前的变化率（%），
+    有效观测不足 min_count 时记为0（与 _calculate_change 一致）。
+    """
+    values = series.to_numpy(dtype=float)
+    if spec.get("input", "value") == "change":
+        periods = spec["periods"]
+        # iloc[periods] 相对当前值（iloc[-1]）向前 |periods|-1 个观测
+        lag = -periods - 1
+        past = np.full(len(values), np.nan)
+        # 观测数不超过 lag 时没有可比的过去值，保持NaN
+        if lag < len(values):
+            past[lag:] = values[:len(values) - lag]
+        counts = np.arange(1, len(values) + 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = (values - past) / past * 100
+        valid = (counts >= spec.get("min_count", -periods)) & (past != 0)
+        values = np.where(valid, change, 0.0)
+    return values / spec.get("divisor", 1)
+
+
+def backfill_regimes(frames, start=None, end=None, keys=None, tables=None):
+    """一次向量化计算历史上每个日期的各指标制度，返回按日期索引的分类表
+    
+    每个指标在自身观测日上判定制度，之后向前填充到所有日期（与当日运行分析器得到的结果一致）。
+    """
+    tables = load_regime_bands() if tables is None else tables
+    keys = [key for key in tables if "regime" in tables[key]["ladders"]] if keys is None else keys
+    columns = {}
+    for key in keys:
+        spec = tables[key]
+        series = frames.series(spec["symbol"])
+        if len(series) == 0:
+            continue
+        backfill = spec.get("backfill", {})
+        labels = spec["ladders"]["regime"].labels(regime_input(series, backfill), "regime")
+        # 观测数少于 min_obs 时分析方法返回数据不足，没有制度结果
+        labels[:backfill.get("min_obs", 2) - 1] = None
+        columns[key] = pd.Series(labels, index=series.index)
+    
+    if not columns:
+        return pd.DataFrame()
+    table = pd.DataFrame(columns).sort_index().ffill()
+    table = table.loc[pd.Timestamp(start) if start else None:pd.Timestamp(end) if end else None]
+    table.index.name = 'date'
+    return table.astype('category')
+
 
 class RiskSentimentAnalyzer:
     """全球风险情绪指标分析器"""
     
-    def __init__(self):
-        # 直接使用已下载的数据
-        self.data = df  # 第一框架的数据
+    def __init__(self, data):
+        """data 可以是 FrequencyFrames 或任意以日期为索引、指标代码为列的DataFrame"""
+        # 按频率分区存储，各指标序列已去除NaN
+        self.data = data if isinstance(data, FrequencyFrames) else FrequencyFrames.from_dataframe(data)
         self.config = DATA_CATEGORIES  # 第一框架的配置
-        print(f"📊 风险情绪分析器启动 - 数据截至: {self.data.index.max().strftime('%Y-%m-%d')}")
+        # 预先计算所有指标的标准统计特征，各分析方法直接查表
+        self.features = compute_series_features(self.data)
+        # 编译后的阈值/制度表
+        self.bands = load_regime_bands()
+        last_date = self.data.last_date
+        print(f"📊 风险情绪分析器启动 - "
+              + (f"数据截至: {last_date.strftime('%Y-%m-%d')}" if last_date is not None else "等待数据流入"))
+    
+    def add_series(self, symbol, series, freq=None, category=None):
+        """加入（或替换）一个指标序列，并只为该指标重新计算统计特征（流水线模式逐个到达时使用）"""
+        self.data.add(symbol, series, freq, category)
+        features = compute_series_features(self.data, [symbol])
+        rest = self.features.drop(symbol, errors='ignore')
+        self.features = features if rest.empty else pd.concat([rest, features])
+    
+    def classify(self, name, value):
+        """按阈值表 "指标.判定组" 对数值分类，返回该组 fields 对应的取值"""
+        key, ladder = name.split('.', 1)
+        return self.bands[key]["ladders"][ladder](value)
+    
+    def thresholds(self, name):
+        """阈值表 "指标.判定组" 中命名的阈值 {名称: 数值}，用于输出 thresholds"""
+        key, ladder = name.split('.', 1)
+        return dict(self.bands[key]["ladders"][ladder].thresholds)
+    
+    def backfill_regimes(self, start=None, end=None, keys=None):
+        """历史各日期的制度表（见 backfill_regimes）"""
+        return backfill_regimes(self.data, start, end, keys, self.bands)
+    
+    @classmethod
+    def from_snapshot(cls, path=None, as_of=None):
+        """由fetch阶段保存的数据快照创建分析器，as_of 指定时只使用该日期及之前的数据"""
+        frames = load_snapshot(path)
+        return cls(frames.truncate(as_of) if as_of else frames)
     
     def _calculate_change(self, series, periods):
         """计算变化率的辅助方法"""
@@ -798,34 +2728,20 @@ class RiskSentimentAnalyzer:
         if 'VIXCLS' not in self.data.columns:
             return {"status": "unavailable", "message": "VIX数据不可用"}
         
-        series = self.data['VIXCLS'].dropna()
+        series = self.data.series('VIXCLS')
         if len(series) == 0:
             return {"status": "no_data"}
             
         current = series.iloc[-1]
+        features = self.features.loc['VIXCLS']
         
         # 统计分析
         percentile_1y = (series.tail(252) <= current).mean() * 100 if len(series) >= 252 else 50
         change_1w = ((current - series.iloc[-6]) / series.iloc[-6] * 100) if len(series) > 5 else 0
-        change_1m = ((current - series.iloc[-21]) / series.iloc[-21] * 100) if len(series) > 20 else 0
+        change_1m = features['change_1m']
         
         # VIX制度分析
-        if current < 15:
-            regime = "低波动制度"
-            risk_assessment = "投资者风险偏好极高，但尾部风险积累"
-            market_implication = "流动性充裕环境下的风险积累期，警惕均值回归"
-        elif current < 25:
-            regime = "正常波动制度" 
-            risk_assessment = "市场风险定价功能正常"
-            market_implication = "投资者情绪相对均衡，市场结构稳定"
-        elif current < 40:
-            regime = "压力波动制度"
-            risk_assessment = "系统性压力显现，风险厌恶情绪升温"
-            market_implication = "市场结构调整期，资产重新定价"
-        else:
-            regime = "恐慌波动制度"
-            risk_assessment = "流动性危机概率显著上升"
-            market_implication = "强制去杠杆环境，资本配置效率急剧下降"
+        regime, risk_assessment, market_implication = self.classify("vix.regime", current)
         
         return {
             "indicator": "VIX波动率指数",
@@ -840,11 +2756,7 @@ class RiskSentimentAnalyzer:
             "regime": regime,
             "risk_assessment": risk_assessment,
             "market_implication": market_implication,
-            "thresholds": {
-                "low_volatility": 15,
-                "normal": 25,
-                "stress": 40
-            }
+            "thresholds": self.thresholds("vix.regime")
         }
 
     def analyze_fed_rrp(self):
@@ -852,33 +2764,19 @@ class RiskSentimentAnalyzer:
         if 'RRPONTSYD' not in self.data.columns:
             return {"status": "unavailable", "message": "美联储逆回购数据不可用"}
         
-        series = self.data['RRPONTSYD'].dropna()
+        series = self.data.series('RRPONTSYD')
         if len(series) == 0:
             return {"status": "no_data"}
             
         current = series.iloc[-1]
+        features = self.features.loc['RRPONTSYD']
         current_trillion = current / 1000  # 转换为万亿美元
         
         # 变动分析
-        change_1m = ((current - series.iloc[-21]) / series.iloc[-21] * 100) if len(series) > 20 else 0
+        change_1m = features['change_1m']
         
         # 制度分析
-        if current_trillion < 0.5:
-            regime = "正常流动性传导"
-            policy_signal = "货币政策传导机制有效，银行风险偏好正常"
-            systemic_risk = "低"
-        elif current_trillion < 1.5:
-            regime = "适度流动性堆积"
-            policy_signal = "银行体系谨慎但功能正常"
-            systemic_risk = "中低"
-        elif current_trillion < 2.5:
-            regime = "显著流动性回流"
-            policy_signal = "货币政策传导受阻，银行风险偏好收缩"
-            systemic_risk = "中等"
-        else:
-            regime = "极端流动性淤积"
-            policy_signal = "货币政策几乎失效，银行体系功能障碍"
-            systemic_risk = "高"
+        regime, policy_signal, systemic_risk = self.classify("fed_rrp.regime", current_trillion)
         
         return {
             "indicator": "美联储逆回购余额",
@@ -891,11 +2789,7 @@ class RiskSentimentAnalyzer:
             },
             "regime": regime,
             "policy_signal": policy_signal,
-            "thresholds": {
-                "normal": 0.5,
-                "moderate": 1.5,
-                "significant": 2.5
-            }
+            "thresholds": self.thresholds("fed_rrp.regime")
         }
 
     def analyze_dollar_index(self):
@@ -903,84 +2797,34 @@ class RiskSentimentAnalyzer:
         if 'DX-Y.NYB' not in self.data.columns:
             return {"status": "unavailable", "message": "美元指数数据不可用"}
         
-        series = self.data['DX-Y.NYB'].dropna()
+        series = self.data.series('DX-Y.NYB')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        current_date = series.index[-1]
+        features = self.features.loc['DX-Y.NYB']
         
         # 基于日期索引的统计分析
-        one_year_ago = current_date - pd.DateOffset(years=1)
-        data_in_last_year = series[series.index >= one_year_ago]
-        percentile_1y = (data_in_last_year <= current).mean() * 100 if len(data_in_last_year) > 0 else 50
+        percentile_1y = features['percentile_1y']
         
         # 计算变化率
-        change_1w = self._calculate_change(series, -5)   # 约1周
-        change_1m = self._calculate_change(series, -21)  # 约1个月
-        change_1y = self._calculate_change(series, -252) # 约1年
+        change_1w = features['change_1w']  # 约1周
+        change_1m = features['change_1m']  # 约1个月
+        change_1y = features['change_1y']  # 约1年
         
         # 趋势分析
-        ma_20 = series.rolling(20).mean().iloc[-1] if len(series) >= 20 else current
+        ma_20 = features['ma_20']
         trend_direction = "上升" if current > ma_20 else "下降"
        
         # 美元指数全球金融条件分析
         # 美元指数全球金融条件分析（专业版）
-        if current < 90:
-            regime = "深度弱势区间"
-            risk_assessment = "反映美国相对增长疲软或极度宽松货币政策"
-            market_implication = "利好新兴市场资本流入，大宗商品计价优势，但可能隐含美国经济结构性担忧"
-        elif current < 95:
-            regime = "温和弱势区间" 
-            risk_assessment = "全球风险偏好回升，利差交易活跃"
-            market_implication = "支持风险资产表现，新兴市场融资条件改善，企业海外收入折算压力"
-        elif current < 100:
-            regime = "中性偏低区间"
-            risk_assessment = "反映相对均衡的全球增长预期"
-            market_implication = "跨境资本流动相对稳定，汇率波动率处于正常范围"
-        elif current < 105:
-            regime = "中性偏强区间"
-            risk_assessment = "美国经济增长相对稳健，利率优势显现"
-            market_implication = "美元资产吸引力提升，但新兴市场面临温和资本流出压力"
-        elif current < 110:
-            regime = "强势区间"
-            risk_assessment = "美国经济相对优势明显，避险需求或政策分化驱动"
-            market_implication = "全球美元流动性收紧，新兴市场债务偿付压力增大，大宗商品承压"
-        elif current < 115:
-            regime = "极端强势区间"
-            risk_assessment = "通常伴随全球风险厌恶或主要央行政策严重分化"
-            market_implication = "可能引发新兴市场汇率危机，全球贸易融资成本显著上升"
-        else:
-            regime = "历史异常高位"
-            risk_assessment = "反映系统性危机或极度政策不确定性"
-            market_implication = "全球美元荒风险，跨境资本流动停滞，亟需央行政策协调"
+        regime, risk_assessment, market_implication = self.classify("dollar_index.regime", current)
                
         # 趋势判断（基于月度变化）
-        if change_1m > 8:
-            trend = "快速升值"
-            trend_implication = "美联储政策急剧收紧，全球避险需求激增"
-        elif change_1m > 3:
-            trend = "温和升值"
-            trend_implication = "美国相对经济强势，资本回流美国"
-        elif change_1m < -8:
-            trend = "快速贬值"
-            trend_implication = "美联储政策转向宽松，全球风险偏好回升"
-        elif change_1m < -3:
-            trend = "温和贬值"
-            trend_implication = "美国经济相对疲弱，全球流动性改善"
-        else:
-            trend = "基本稳定"
-            trend_implication = "汇率政策保持稳定，市场预期一致"
+        trend, trend_implication = self.classify("dollar_index.trend", change_1m)
     
         # 政策含义分析
-        if current > 115:
-            policy_implication = "美联储可能面临政策两难，需要在抗通胀与维护金融稳定间平衡"
-        elif current > 105:
-            policy_implication = "美国货币政策相对收紧，需要关注新兴市场溢出效应"
-        elif current < 95:
-            policy_implication = "美国货币政策相对宽松，需要警惕输入性通胀风险"
-        else:
-            policy_implication = "货币政策立场中性，政策传导机制相对正常"
+        policy_implication = self.classify("dollar_index.policy_implication", current)
         
         return {
             "indicator": "美元指数(DXY)",
@@ -1001,13 +2845,7 @@ class RiskSentimentAnalyzer:
             "market_implication": market_implication,
             "trend_implication": trend_implication,
             "policy_implication": policy_implication,
-            "thresholds": {
-                "extreme_weak": 90,
-                "weak": 95,
-                "balanced": 105,
-                "strong": 115,
-                "extreme_strong": 125
-            }
+            "thresholds": self.thresholds("dollar_index.regime")
         }
 
     def analyze_walcl(self):  # 修正：添加 self 参数
@@ -1015,13 +2853,13 @@ class RiskSentimentAnalyzer:
         if 'WALCL' not in self.data.columns:
             return {"status": "unavailable", "message": "WALCL数据不可用"}
         
-        series = self.data['WALCL'].dropna()
+        series = self.data.series('WALCL')
         if len(series) < 2:  # 至少需要2个数据点才能计算变化
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
+        features = self.features.loc['WALCL']
         current_trillion = current / 1_000_000  # 转换为万亿美元
-        current_date = series.index[-1]
         
         # 检测数据频率
         freq = self._detect_frequency(series)
@@ -1039,49 +2877,18 @@ class RiskSentimentAnalyzer:
             change_1y = self._calculate_change(series, -12) # 前12个月度点
         else:
             # 默认按日度处理或其他频率
-            change_1w = self._calculate_change(series, -5)  # 约1周
-            change_1m = self._calculate_change(series, -21) # 约1个月
-            change_1y = self._calculate_change(series, -252) # 约1年
+            change_1w = features['change_1w']  # 约1周
+            change_1m = features['change_1m']  # 约1个月
+            change_1y = features['change_1y']  # 约1年
         
         # 计算1年百分位（基于日期）
-        one_year_ago = current_date - pd.DateOffset(years=1)
-        data_in_last_year = series[series.index >= one_year_ago]
-        percentile_1y = (data_in_last_year <= current).mean() * 100 if len(data_in_last_year) > 0 else 50
+        percentile_1y = features['percentile_1y']
         
         # WALCL流动性制度分析
-        if current_trillion > 8.0:
-            regime = "极度宽松流动性"
-            risk_assessment = "央行资产负债表极度扩张，潜在通胀压力"
-            market_implication = "流动性驱动市场，资产价格可能脱离基本面"
-        elif current_trillion > 6.5:
-            regime = "宽松流动性"
-            risk_assessment = "流动性环境充裕，支持风险资产表现"
-            market_implication = "央行政策支持下的风险偏好环境"
-        elif current_trillion > 4.0:
-            regime = "正常流动性"
-            risk_assessment = "资产负债表规模处于历史常态区间"
-            market_implication = "市场流动性条件相对均衡"
-        else:
-            regime = "紧缩流动性"
-            risk_assessment = "央行资产负债表收缩，流动性收紧"
-            market_implication = "去杠杆环境，需要警惕流动性风险"
+        regime, risk_assessment, market_implication = self.classify("walcl.regime", current_trillion)
         
         # 趋势判断（基于1个月变化）
-        if change_1m > 5.0:
-            trend = "快速扩张"
-            trend_implication = "央行正在积极投放流动性"
-        elif change_1m > 1.0:
-            trend = "温和扩张" 
-            trend_implication = "流动性环境逐步改善"
-        elif change_1m < -5.0:
-            trend = "快速收缩"
-            trend_implication = "量化紧缩正在进行中"
-        elif change_1m < -1.0:
-            trend = "温和收缩"
-            trend_implication = "流动性环境逐步收紧"
-        else:
-            trend = "基本稳定"
-            trend_implication = "资产负债表规模保持稳定"
+        trend, trend_implication = self.classify("walcl.trend", change_1m)
         
         return {
             "indicator": "美联储资产负债表规模",
@@ -1110,57 +2917,26 @@ class RiskSentimentAnalyzer:
         if '^SKEW' not in self.data.columns:
             return {"status": "unavailable", "message": "SKEW数据不可用"}
         
-        series = self.data['^SKEW'].dropna()
+        series = self.data.series('^SKEW')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        current_date = series.index[-1]
+        features = self.features.loc['^SKEW']
         
         # 基于日期索引的统计分析
-        one_year_ago = current_date - pd.DateOffset(years=1)
-        data_in_last_year = series[series.index >= one_year_ago]
-        percentile_1y = (data_in_last_year <= current).mean() * 100 if len(data_in_last_year) > 0 else 50
+        percentile_1y = features['percentile_1y']
         
         # 计算变化率（日度数据）
-        change_1w = self._calculate_change(series, -5)   # 约1周
-        change_1m = self._calculate_change(series, -21)  # 约1个月
-        change_1y = self._calculate_change(series, -252) # 约1年
+        change_1w = features['change_1w']  # 约1周
+        change_1m = features['change_1m']  # 约1个月
+        change_1y = features['change_1y']  # 约1年
         
         # SKEW市场情绪分析
-        if current > 150:
-            regime = "极端尾部风险预期"
-            risk_assessment = "市场预期极端事件概率显著上升"
-            market_implication = "投资者对冲需求强烈，恐慌情绪蔓延"
-        elif current > 140:
-            regime = "高尾部风险预期"
-            risk_assessment = "市场对黑天鹅事件担忧加剧"
-            market_implication = "风险偏好下降，避险情绪升温"
-        elif current > 130:
-            regime = "中性偏谨慎"
-            risk_assessment = "市场对风险保持警惕"
-            market_implication = "投资者情绪谨慎，波动可能增加"
-        else:
-            regime = "正常风险预期"
-            risk_assessment = "市场风险预期处于正常范围"
-            market_implication = "情绪相对稳定，市场运行正常"
+        regime, risk_assessment, market_implication = self.classify("skew.regime", current)
         
         # 趋势判断
-        if change_1m > 10:
-            trend = "快速上升"
-            trend_implication = "市场恐慌情绪迅速升温"
-        elif change_1m > 3:
-            trend = "温和上升"
-            trend_implication = "风险担忧逐步增加"
-        elif change_1m < -10:
-            trend = "快速下降"
-            trend_implication = "市场恐慌情绪缓解"
-        elif change_1m < -3:
-            trend = "温和下降"
-            trend_implication = "风险担忧逐步减轻"
-        else:
-            trend = "基本稳定"
-            trend_implication = "市场情绪保持稳定"
+        trend, trend_implication = self.classify("skew.trend", change_1m)
         
         return {
             "indicator": "SKEW偏度指数",
@@ -1178,11 +2954,7 @@ class RiskSentimentAnalyzer:
             "risk_assessment": risk_assessment,
             "market_implication": market_implication,
             "trend_implication": trend_implication,
-            "thresholds": {
-                "extreme_risk": 150,
-                "high_risk": 140,
-                "cautious": 130
-            }
+            "thresholds": self.thresholds("skew.regime")
         }
 
     def analyze_move(self):
@@ -1190,61 +2962,26 @@ class RiskSentimentAnalyzer:
         if '^MOVE' not in self.data.columns:
             return {"status": "unavailable", "message": "MOVE数据不可用"}
         
-        series = self.data['^MOVE'].dropna()
+        series = self.data.series('^MOVE')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        current_date = series.index[-1]
+        features = self.features.loc['^MOVE']
         
         # 基于日期索引的统计分析
-        one_year_ago = current_date - pd.DateOffset(years=1)
-        data_in_last_year = series[series.index >= one_year_ago]
-        percentile_1y = (data_in_last_year <= current).mean() * 100 if len(data_in_last_year) > 0 else 50
+        percentile_1y = features['percentile_1y']
         
         # 计算变化率
-        change_1w = self._calculate_change(series, -5)   # 约1周
-        change_1m = self._calculate_change(series, -21)  # 约1个月
-        change_1y = self._calculate_change(series, -252) # 约1年
+        change_1w = features['change_1w']  # 约1周
+        change_1m = features['change_1m']  # 约1个月
+        change_1y = features['change_1y']  # 约1年
         
         # MOVE债券市场情绪分析
-        if current > 140:
-            regime = "极端债券波动制度"
-            risk_assessment = "债券市场面临极端压力，流动性危机风险"
-            market_implication = "利率环境高度不确定，债券投资组合面临重大损失风险"
-        elif current > 120:
-            regime = "高债券波动制度"
-            risk_assessment = "债券市场波动剧烈，利率风险显著上升"
-            market_implication = "货币政策预期分化，固收资产配置需谨慎"
-        elif current > 100:
-            regime = "中等债券波动制度"
-            risk_assessment = "债券市场存在一定压力"
-            market_implication = "利率环境存在不确定性，关注央行政策信号"
-        elif current > 80:
-            regime = "正常债券波动制度"
-            risk_assessment = "债券市场波动处于正常范围"
-            market_implication = "利率环境相对稳定，债券配置环境良好"
-        else:
-            regime = "低债券波动制度"
-            risk_assessment = "债券市场异常平静，可能存在风险积累"
-            market_implication = "利率环境过于稳定，警惕均值回归风险"
+        regime, risk_assessment, market_implication = self.classify("move.regime", current)
         
         # 趋势判断
-        if change_1m > 15:
-            trend = "快速上升"
-            trend_implication = "债券市场恐慌情绪快速蔓延"
-        elif change_1m > 5:
-            trend = "温和上升"
-            trend_implication = "债券市场风险担忧逐步增加"
-        elif change_1m < -15:
-            trend = "快速下降"
-            trend_implication = "债券市场风险情绪快速缓解"
-        elif change_1m < -5:
-            trend = "温和下降"
-            trend_implication = "债券市场恐慌情绪逐步减轻"
-        else:
-            trend = "基本稳定"
-            trend_implication = "债券市场情绪保持稳定"
+        trend, trend_implication = self.classify("move.trend", change_1m)
     
         return {
             "indicator": "MOVE债券波动率指数",
@@ -1262,124 +2999,44 @@ class RiskSentimentAnalyzer:
             "risk_assessment": risk_assessment,
             "market_implication": market_implication,
             "trend_implication": trend_implication,
-            "thresholds": {
-                "extreme_volatility": 140,
-                "high_volatility": 120,
-                "moderate_volatility": 100,
-                "normal_volatility": 80
-            }
+            "thresholds": self.thresholds("move.regime")
         }
     def analyze_yield_curve_t10y2y(self):
         """分析T10Y2Y收益率曲线（10年期-2年期国债收益率利差）"""
         if 'T10Y2Y' not in self.data.columns:
             return {"status": "unavailable", "message": "T10Y2Y收益率利差数据不可用"}
         
-        series = self.data['T10Y2Y'].dropna()
+        series = self.data.series('T10Y2Y')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        current_date = series.index[-1]
+        features = self.features.loc['T10Y2Y']
         
         # 基于日期索引的统计分析
-        one_year_ago = current_date - pd.DateOffset(years=1)
-        data_in_last_year = series[series.index >= one_year_ago]
-        percentile_1y = (data_in_last_year <= current).mean() * 100 if len(data_in_last_year) > 0 else 50
+        percentile_1y = features['percentile_1y']
         
         # 计算变化率（基点变化更有意义）
-        change_1w_bp = (current - series.iloc[-5]) * 100 if len(series) > 5 else 0  # 转换为基点
-        change_1m_bp = (current - series.iloc[-21]) * 100 if len(series) > 21 else 0
-        change_1y_bp = (current - series.iloc[-252]) * 100 if len(series) > 252 else 0
+        change_1w_bp = features['diff_1w'] * 100  # 转换为基点
+        change_1m_bp = features['diff_1m'] * 100
+        change_1y_bp = features['diff_1y'] * 100
     
         # 计算百分比变化（用于趋势判断）
-        change_1w = self._calculate_change(series, -5)   # 约1周
-        change_1m = self._calculate_change(series, -21)  # 约1个月
-        change_1y = self._calculate_change(series, -252) # 约1年
+        change_1w = features['change_1w']  # 约1周
+        change_1m = features['change_1m']  # 约1个月
+        change_1y = features['change_1y']  # 约1年
     
         # 收益率曲线形态与货币政策传导效率分析
-        if current < -1.0:
-            regime = "深度倒挂制度"
-            risk_assessment = "货币政策传导严重失效，经济衰退风险极高"
-            market_implication = "银行净息差压缩至危险水平，信贷投放意愿极低"
-            policy_transmission = "极度无效"
-            recession_probability = "极高(>80%)"
-        elif current < -0.5:
-            regime = "倒挂制度"
-            risk_assessment = "货币政策传导效率显著下降，衰退信号强烈"
-            market_implication = "银行盈利能力受损，流动性传导受阻"
-            policy_transmission = "严重受阻"
-            recession_probability = "很高(60-80%)"
-        elif current < 0:
-            regime = "轻微倒挂制度"
-            risk_assessment = "货币政策传导开始受阻，经济放缓信号"
-            market_implication = "银行业务模式面临挑战，信贷增长放缓"
-            policy_transmission = "受阻"
-            recession_probability = "较高(30-60%)"
-        elif current < 0.5:
-            regime = "平坦化制度"
-            risk_assessment = "货币政策传导效率偏低，增长动能不足"
-            market_implication = "银行净息差收窄，风险偏好谨慎"
-            policy_transmission = "低效"
-            recession_probability = "中等(10-30%)"
-        elif current < 1.5:
-            regime = "正常陡峭制度"
-            risk_assessment = "货币政策传导机制正常，经济增长预期健康"
-            market_implication = "银行盈利模式可持续，流动性传导顺畅"
-            policy_transmission = "有效"
-            recession_probability = "较低(<10%)"
-        elif current < 2.5:
-            regime = "陡峭制度"
-            risk_assessment = "货币政策传导效率较高，通胀预期可能上升"
-            market_implication = "银行净息差扩大，信贷投放积极"
-            policy_transmission = "高效"
-            recession_probability = "很低(<5%)"
-        else:
-            regime = "过度陡峭制度"
-            risk_assessment = "可能存在通胀失控风险或流动性过度宽松"
-            market_implication = "金融条件过度宽松，资产泡沫风险上升"
-            policy_transmission = "过度宽松"
-            recession_probability = "极低但通胀风险高"
+        regime, risk_assessment, market_implication, policy_transmission, recession_probability = self.classify("t10y2y.regime", current)
     
         # 趋势判断（基于基点变化）
-        if change_1m_bp > 50:
-            trend = "快速陡峭化"
-            trend_implication = "通胀预期快速上升或货币政策转向宽松"
-        elif change_1m_bp > 20:
-            trend = "温和陡峭化"
-            trend_implication = "经济预期改善，长端利率上升"
-        elif change_1m_bp < -50:
-            trend = "快速平坦化"
-            trend_implication = "衰退预期强化或央行政策收紧预期"
-        elif change_1m_bp < -20:
-            trend = "温和平坦化"
-            trend_implication = "增长担忧上升，避险需求增加"
-        else:
-            trend = "基本稳定"
-            trend_implication = "市场对货币政策和经济前景预期稳定"
+        trend, trend_implication = self.classify("t10y2y.trend", change_1m_bp)
     
         # 系统性风险评估
-        if current < -0.5:
-            systemic_risk = "高"
-            liquidity_risk = "信贷紧缩风险高，银行体系脆弱性上升"
-        elif current < 0:
-            systemic_risk = "中高"
-            liquidity_risk = "流动性传导机制受损，需密切关注"
-        elif current < 0.5:
-            systemic_risk = "中等"
-            liquidity_risk = "流动性传导效率偏低但可控"
-        else:
-            systemic_risk = "低"
-            liquidity_risk = "流动性传导机制运行良好"
+        systemic_risk, liquidity_risk = self.classify("t10y2y.systemic_risk", current)
         
         # 政策含义
-        if current < -0.5:
-            policy_implication = "央行应考虑降息或量化宽松，避免经济硬着陆"
-        elif current < 0:
-            policy_implication = "央行政策空间有限，需要创新货币政策工具"
-        elif current > 2.5:
-            policy_implication = "央行可能需要收紧政策，防范通胀和资产泡沫"
-        else:
-            policy_implication = "货币政策立场相对合适，保持观察"
+        policy_implication = self.classify("t10y2y.policy_implication", current)
     
         return {
             "indicator": "T10Y2Y收益率利差",
@@ -1405,14 +3062,7 @@ class RiskSentimentAnalyzer:
             "recession_probability": recession_probability,
             "systemic_risk": systemic_risk,
             "liquidity_risk": liquidity_risk,
-            "thresholds": {
-                "deep_inversion": -1.0,
-                "inversion": -0.5,
-                "slight_inversion": 0,
-                "flat": 0.5,
-                "normal_steep": 1.5,
-                "steep": 2.5
-            }
+            "thresholds": self.thresholds("t10y2y.regime")
         }
 
     def analyze_hy_credit_spread(self):
@@ -1420,61 +3070,26 @@ class RiskSentimentAnalyzer:
         if 'BAMLH0A0HYM2' not in self.data.columns:
             return {"status": "unavailable", "message": "高收益债信用利差数据不可用"}
         
-        series = self.data['BAMLH0A0HYM2'].dropna()
+        series = self.data.series('BAMLH0A0HYM2')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        current_date = series.index[-1]
+        features = self.features.loc['BAMLH0A0HYM2']
         
         # 统计分析
-        one_year_ago = current_date - pd.DateOffset(years=1)
-        data_in_last_year = series[series.index >= one_year_ago]
-        percentile_1y = (data_in_last_year <= current).mean() * 100 if len(data_in_last_year) > 0 else 50
+        percentile_1y = features['percentile_1y']
         
         # 变化率计算（基点）
-        change_1w_bp = (current - series.iloc[-5]) * 100 if len(series) > 5 else 0
-        change_1m_bp = (current - series.iloc[-21]) * 100 if len(series) > 21 else 0
-        change_1m = self._calculate_change(series, -21)
+        change_1w_bp = features['diff_1w'] * 100
+        change_1m_bp = features['diff_1m'] * 100
+        change_1m = features['change_1m']
         
         # 信用风险制度分析
-        if current > 10.0:
-            regime = "信用危机制度"
-            risk_assessment = "系统性信用风险爆发，经济衰退概率极高"
-            market_implication = "高收益债大面积违约，流动性枯竭"
-        elif current > 7.0:
-            regime = "高信用压力制度"
-            risk_assessment = "信用环境严重恶化，违约率快速上升"
-            market_implication = "信用收缩加剧，融资成本飙升"
-        elif current > 5.0:
-            regime = "信用收紧制度"
-            risk_assessment = "信用风险溢价上升，市场风险偏好下降"
-            market_implication = "企业融资难度增加，投资活动放缓"
-        elif current > 3.0:
-            regime = "正常信用制度"
-            risk_assessment = "信用环境基本健康，风险可控"
-            market_implication = "企业融资环境正常，经济增长稳定"
-        else:
-            regime = "宽松信用制度"
-            risk_assessment = "信用环境过度宽松，可能积累风险"
-            market_implication = "资本追逐收益，资产泡沫风险上升"
+        regime, risk_assessment, market_implication = self.classify("hy_spread.regime", current)
     
         # 趋势判断
-        if change_1m_bp > 100:
-            trend = "快速扩大"
-            trend_implication = "信用风险快速恶化，市场恐慌蔓延"
-        elif change_1m_bp > 50:
-            trend = "温和扩大"
-            trend_implication = "信用担忧上升，风险溢价增加"
-        elif change_1m_bp < -100:
-            trend = "快速收窄"
-            trend_implication = "信用环境快速改善，风险偏好回升"
-        elif change_1m_bp < -50:
-            trend = "温和收窄"
-            trend_implication = "信用条件逐步改善，市场信心恢复"
-        else:
-            trend = "基本稳定"
-            trend_implication = "信用环境保持稳定"
+        trend, trend_implication = self.classify("hy_spread.trend", change_1m_bp)
     
         return {
             "indicator": "美国高收益债信用利差",
@@ -1492,12 +3107,7 @@ class RiskSentimentAnalyzer:
             "risk_assessment": risk_assessment,
             "market_implication": market_implication,
             "trend_implication": trend_implication,
-            "thresholds": {
-                "crisis": 10.0,
-                "high_stress": 7.0,
-                "tightening": 5.0,
-                "normal": 3.0
-            }
+            "thresholds": self.thresholds("hy_spread.regime")
         }
 
     def analyze_nfci(self):
@@ -1505,76 +3115,31 @@ class RiskSentimentAnalyzer:
          if 'NFCI' not in self.data.columns:
              return {"status": "unavailable", "message": "NFCI数据不可用"}
          
-         series = self.data['NFCI'].dropna()
+         series = self.data.series('NFCI')
          if len(series) < 2:
              return {"status": "insufficient_data"}
              
          current = series.iloc[-1]
-         current_date = series.index[-1]
+         features = self.features.loc['NFCI']
          
          # 统计分析
-         one_year_ago = current_date - pd.DateOffset(years=1)
-         data_in_last_year = series[series.index >= one_year_ago]
-         percentile_1y = (data_in_last_year <= current).mean() * 100 if len(data_in_last_year) > 0 else 50
+         percentile_1y = features['percentile_1y']
          
          # 变化率计算
-         change_1w = self._calculate_change(series, -5)
-         change_1m = self._calculate_change(series, -21)
-         change_3m = self._calculate_change(series, -63)
+         change_1w = features['change_1w']
+         change_1m = features['change_1m']
+         change_3m = features['change_3m']
          
          # 金融条件制度分析
-         if current > 1.0:
-             regime = "严重紧缩制度"
-             financial_condition = "极度紧缩"
-             risk_assessment = "系统性金融风险显著，经济衰退概率极高"
-             policy_transmission = "过度收紧，传导机制可能失效"
-         elif current > 0.5:
-             regime = "紧缩制度"
-             financial_condition = "明显紧缩"
-             risk_assessment = "金融摩擦增强，经济下行压力加大"
-             policy_transmission = "收紧有效，但需防范过度收缩"
-         elif current > 0:
-             regime = "轻度紧缩制度"
-             financial_condition = "轻度紧缩"
-             risk_assessment = "金融条件略偏紧，经济增长面临温和阻力"
-             policy_transmission = "政策收紧效果显现"
-         elif current > -0.5:
-             regime = "接近均衡制度"
-             financial_condition = "基本均衡"
-             risk_assessment = "金融条件接近历史平均，经济运行稳定"
-             policy_transmission = "传导机制运行正常"
-         elif current > -1.0:
-             regime = "宽松制度"
-             financial_condition = "明显宽松"
-             risk_assessment = "金融条件支撑增长，但需警惕风险积累"
-             policy_transmission = "宽松政策传导有效"
-         else:
-             regime = "极度宽松制度"
-             financial_condition = "极度宽松"
-             risk_assessment = "金融条件异常宽松，资产泡沫风险上升"
-             policy_transmission = "可能存在过度刺激"
+         regime, financial_condition, risk_assessment, policy_transmission = self.classify("nfci.regime", current)
     
          # 趋势判断
-         if change_3m > 50:
-             trend = "快速恶化"
-             macro_outlook = "经济前景显著恶化，衰退风险上升"
-         elif change_3m > 20:
-             trend = "温和恶化"
-             macro_outlook = "经济增长动能减弱"
-         elif change_3m < -50:
-             trend = "快速改善"
-             macro_outlook = "金融支持力度增强，经济复苏加速"
-         elif change_3m < -20:
-             trend = "温和改善"
-             macro_outlook = "经济环境逐步好转"
-         else:
-             trend = "基本稳定"
-             macro_outlook = "金融条件保持稳定"
+         trend, macro_outlook = self.classify("nfci.trend", change_3m)
          
          # 宏观经济领先指标
-         gdp_signal = "负面" if current > 0.3 else "正面" if current < -0.3 else "中性"
-         employment_signal = "就业压力" if current > 0.2 else "就业支撑" if current < -0.2 else "就业稳定"
-         inflation_signal = "通缩风险" if current > 0.8 else "通胀压力" if current < -0.8 else "价格稳定"
+         gdp_signal = self.classify("nfci.gdp_signal", current)
+         employment_signal = self.classify("nfci.employment_signal", current)
+         inflation_signal = self.classify("nfci.inflation_signal", current)
          
          return {
              "indicator": "芝加哥联储国家金融状况指数",
@@ -1598,13 +3163,7 @@ class RiskSentimentAnalyzer:
                  "employment_signal": employment_signal,
                  "inflation_signal": inflation_signal
              },
-             "thresholds": {
-                 "severe_tightening": 1.0,
-                 "tightening": 0.5,
-                 "mild_tightening": 0,
-                 "accommodative": -0.5,
-                 "very_accommodative": -1.0
-             }
+             "thresholds": self.thresholds("nfci.regime")
          }
 #计算框架
     def analyze_sofr(self):
@@ -1612,98 +3171,43 @@ class RiskSentimentAnalyzer:
         if 'SOFR' not in self.data.columns:
             return {"status": "unavailable", "message": "SOFR数据不可用"}
         
-        series = self.data['SOFR'].dropna()
+        series = self.data.series('SOFR')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        current_date = series.index[-1]
+        features = self.features.loc['SOFR']
         
         # 直接使用主数据中的IORB进行利差分析
         sofr_iorb_spread = None
         if 'IORB' in self.data.columns:
-             iorb_series = self.data['IORB'].dropna()
+             iorb_series = self.data.series('IORB')
              if len(iorb_series) > 0:
                  iorb_current = iorb_series.iloc[-1]
                  sofr_iorb_spread = (current - iorb_current) * 100  # 转换为基点
         
         # 统计分析（修正：使用绝对数值变化而非百分比变化）
-        change_1d_bp = (current - series.iloc[-2]) * 100 if len(series) > 1 else 0  # 基点变化
-        change_1w_bp = (current - series.iloc[-5]) * 100 if len(series) > 5 else 0  # 基点变化
-        change_1m_bp = (current - series.iloc[-21]) * 100 if len(series) > 21 else 0  # 基点变化
+        change_1d_bp = features['diff_1d'] * 100  # 基点变化
+        change_1w_bp = features['diff_1w'] * 100  # 基点变化
+        change_1m_bp = features['diff_1m'] * 100  # 基点变化
         # SOFR波动性分析（5日滚动标准差）
-        volatility_5d = (series.diff().tail(5).std() * 100) if len(series) > 5 else 0  # 基点
+        volatility_5d = features['volatility_5d'] * 100  # 基点
         # SOFR水平制度分析
-        if current > 6.0:
-            regime = "极度紧缩制度"
-            liquidity_assessment = "银行系统流动性极度紧张，融资成本异常高企"
-            market_implication = "货币市场功能严重受损，系统性风险显著"
-            policy_signal = "央行可能需要紧急干预"
-        elif current > 4.5:
-            regime = "紧缩制度"
-            liquidity_assessment = "银行短期融资成本明显上升，流动性偏紧"
-            market_implication = "货币政策收紧效果显现，银行放贷意愿收缩"
-            policy_signal = "紧缩政策传导有效"
-        elif current > 2.0:
-            regime = "中性偏紧制度"
-            liquidity_assessment = "银行融资成本处于中性偏高水平"
-            market_implication = "货币市场运行正常，政策立场中性偏紧"
-            policy_signal = "政策传导机制运行良好"
-        elif current > 0.5:
-            regime = "宽松制度"
-            liquidity_assessment = "银行系统流动性充裕，融资成本较低"
-            market_implication = "宽松货币政策环境，支持信贷投放"
-            policy_signal = "宽松政策有效传导至银行体系"
-        else:
-            regime = "极度宽松制度"
-            liquidity_assessment = "银行融资成本接近零，流动性极度充裕"
-            market_implication = "零利率政策环境，货币政策空间有限"
-            policy_signal = "接近货币政策下限"
+        regime, liquidity_assessment, market_implication, policy_signal = self.classify("sofr.regime", current)
       
         # SOFR-IORB利差分析
         spread_analysis = "不可用"
         transmission_efficiency = "无法评估"
         if sofr_iorb_spread is not None:
-            if abs(sofr_iorb_spread) < 5:
-                spread_analysis = f"利差{sofr_iorb_spread:+.1f}bp，政策传导高效"
-                transmission_efficiency = "高效"
-            elif abs(sofr_iorb_spread) < 15:
-                spread_analysis = f"利差{sofr_iorb_spread:+.1f}bp，传导效率正常"
-                transmission_efficiency = "正常"
-            else:
-                spread_analysis = f"利差{sofr_iorb_spread:+.1f}bp，传导可能受阻"
-                transmission_efficiency = "受阻"
+            # 按利差绝对值（基点）判定
+            transmission_efficiency, spread_comment = self.classify("sofr.iorb_spread", abs(sofr_iorb_spread))
+            spread_analysis = f"利差{sofr_iorb_spread:+.1f}bp，{spread_comment}"
         
          # 波动性分析
-        if volatility_5d > 20:
-             volatility_regime = "高波动"
-             stability_assessment = "货币市场压力显著，流动性分布不均"
-        elif volatility_5d > 10:
-             volatility_regime = "中等波动"
-             stability_assessment = "市场存在一定波动，需要关注流动性状况"
-        elif volatility_5d > 5:
-             volatility_regime = "低波动"
-             stability_assessment = "市场运行相对稳定"
-        else:
-             volatility_regime = "极低波动"
-             stability_assessment = "市场流动性分布均匀，运行平稳"
+        volatility_regime, stability_assessment = self.classify("sofr.volatility_regime", volatility_5d)
     
         # 趋势判断（基于基点变化）
-        if change_1w_bp > 25:
-            trend = "快速上升"
-            trend_implication = "银行融资成本快速上升，流动性收紧"
-        elif change_1w_bp > 10:
-            trend = "温和上升"
-            trend_implication = "融资成本逐步上升"
-        elif change_1w_bp < -25:
-            trend = "快速下降"
-            trend_implication = "银行融资成本快速下降，流动性改善"
-        elif change_1w_bp < -10:
-            trend = "温和下降"
-            trend_implication = "融资成本逐步下降"
-        else:
-            trend = "基本稳定"
-            trend_implication = "融资成本保持稳定"
+        trend, trend_implication = self.classify("sofr.trend", change_1w_bp)
        
         return {
              "indicator": "SOFR有担保隔夜融资利率",
@@ -1726,12 +3230,7 @@ class RiskSentimentAnalyzer:
              "spread_analysis": spread_analysis,
              "volatility_regime": volatility_regime,
              "stability_assessment": stability_assessment,
-             "thresholds": {
-                 "extreme_tight": 6.0,
-                 "tight": 4.5,
-                 "neutral_tight": 2.0,
-                 "accommodative": 0.5
-             }
+             "thresholds": self.thresholds("sofr.regime")
          }
 
 
@@ -1740,50 +3239,22 @@ class RiskSentimentAnalyzer:
         if 'CL=F' not in self.data.columns:
             return {"status": "unavailable", "message": "WTI原油数据不可用"}
         
-        series = self.data['CL=F'].dropna()
+        series = self.data.series('CL=F')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
+        features = self.features.loc['CL=F']
         
         # 变化率计算
-        change_1w = self._calculate_change(series, -5)
-        change_1m = self._calculate_change(series, -21)
+        change_1w = features['change_1w']
+        change_1m = features['change_1m']
         
         # 价格制度分析
-        if current > 100:
-            regime = "危机价格制度"
-            inflation_impact = "通胀压力极大，央行面临政策两难"
-            growth_impact = "石油净进口国经济增长显著承压"
-        elif current > 80:
-            regime = "高油价制度"
-            inflation_impact = "通胀预期上升，货币政策收紧压力"
-            growth_impact = "能源成本上升抑制消费和投资"
-        elif current >= 60:
-            regime = "均衡价格制度"
-            inflation_impact = "对通胀影响相对中性"
-            growth_impact = "经济增长环境基本健康"
-        else:
-            regime = "低油价制度"
-            inflation_impact = "通缩风险上升，支持宽松货币政策"
-            growth_impact = "降低生产成本，刺激消费需求"
+        regime, inflation_impact, growth_impact = self.classify("wti_crude.regime", current)
     
         # 趋势判断
-        if change_1m > 15:
-            trend = "强势上涨"
-            policy_pressure = "央行通胀担忧加剧"
-        elif change_1m > 5:
-            trend = "温和上涨"
-            policy_pressure = "通胀预期温和上升"
-        elif change_1m < -15:
-            trend = "大幅下跌"
-            policy_pressure = "通缩风险需要关注"
-        elif change_1m < -5:
-            trend = "温和下跌"
-            policy_pressure = "通胀压力有所缓解"
-        else:
-            trend = "区间波动"
-            policy_pressure = "价格影响相对中性"
+        trend, policy_pressure = self.classify("wti_crude.trend", change_1m)
     
         return {
             "indicator": "WTI原油期货",
@@ -1798,11 +3269,7 @@ class RiskSentimentAnalyzer:
             "inflation_impact": inflation_impact,
             "growth_impact": growth_impact,
             "policy_pressure": policy_pressure,
-            "thresholds": {
-                "crisis": 100,
-                "high": 80,
-                "equilibrium": 60
-            }
+            "thresholds": self.thresholds("wti_crude.regime")
         }
        
 #黄金价格
@@ -1811,92 +3278,32 @@ class RiskSentimentAnalyzer:
         if 'GC=F' not in self.data.columns:
             return {"status": "unavailable", "message": "黄金期货数据不可用"}
         
-        series = self.data['GC=F'].dropna()
+        series = self.data.series('GC=F')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        current_date = series.index[-1]
+        features = self.features.loc['GC=F']
         
         # 统计分析
-        one_year_ago = current_date - pd.DateOffset(years=1)
-        data_in_last_year = series[series.index >= one_year_ago]
-        percentile_1y = (data_in_last_year <= current).mean() * 100 if len(data_in_last_year) > 0 else 50
+        percentile_1y = features['percentile_1y']
         
         # 变化率计算
-        change_1w = self._calculate_change(series, -5)
-        change_1m = self._calculate_change(series, -21)
-        change_3m = self._calculate_change(series, -63)
+        change_1w = features['change_1w']
+        change_1m = features['change_1m']
+        change_3m = features['change_3m']
         
         # 黄金价格制度分析
-        if current > 2400:
-            regime = "历史高位制度"
-            market_sentiment = "极度避险"
-            macro_signal = "系统性风险担忧或通胀失控预期"
-        elif current > 2000:
-            regime = "高位制度"
-            market_sentiment = "强避险需求"
-            macro_signal = "地缘政治紧张或货币政策不确定性"
-        elif current > 1800:
-            regime = "中高位制度"
-            market_sentiment = "温和避险"
-            macro_signal = "通胀预期上升或美元疲软"
-        elif current > 1500:
-            regime = "中性制度"
-            market_sentiment = "平衡配置"
-            macro_signal = "宏观环境相对稳定"
-        else:
-            regime = "低位制度"
-            market_sentiment = "风险偏好"
-            macro_signal = "经济增长强劲或美元强势"
+        regime, market_sentiment, macro_signal = self.classify("gold.regime", current)
     
         # 避险功能评估
-        if change_1m > 10:
-            hedge_function = "强避险"
-            risk_implication = "市场风险事件频发，资金大量流入避险资产"
-        elif change_1m > 5:
-            hedge_function = "温和避险"
-            risk_implication = "市场存在不确定性，黄金发挥保值功能"
-        elif change_1m < -10:
-            hedge_function = "风险偏好"
-            risk_implication = "市场风险偏好回升，资金流出避险资产"
-        elif change_1m < -5:
-            hedge_function = "温和回调"
-            risk_implication = "风险情绪改善，黄金避险需求下降"
-        else:
-            hedge_function = "中性"
-            risk_implication = "避险需求与风险偏好基本平衡"
+        hedge_function, risk_implication = self.classify("gold.hedge_function", change_1m)
     
         # 通胀对冲评估
-        if change_3m > 15:
-            inflation_hedge = "强通胀对冲"
-            monetary_implication = "通胀预期显著上升或货币政策过度宽松"
-        elif change_3m > 8:
-            inflation_hedge = "通胀对冲"
-            monetary_implication = "通胀担忧推升黄金配置需求"
-        elif change_3m < -15:
-            inflation_hedge = "通缩预期"
-            monetary_implication = "通胀预期回落或货币政策收紧"
-        else:
-            inflation_hedge = "中性"
-            monetary_implication = "通胀预期相对稳定"
+        inflation_hedge, monetary_implication = self.classify("gold.inflation_hedge", change_3m)
     
         # 趋势判断
-        if change_1w > 3:
-            trend = "强势上涨"
-            trend_driver = "避险情绪急剧升温或突发事件冲击"
-        elif change_1w > 1:
-            trend = "温和上涨"
-            trend_driver = "支撑因素增强"
-        elif change_1w < -3:
-            trend = "快速下跌"
-            trend_driver = "风险偏好回升或美元走强"
-        elif change_1w < -1:
-            trend = "温和下跌"
-            trend_driver = "避险需求减弱"
-        else:
-            trend = "区间震荡"
-            trend_driver = "多空因素相对平衡"
+        trend, trend_driver = self.classify("gold.trend", change_1w)
     
         return {
             "indicator": "黄金期货",
@@ -1917,12 +3324,7 @@ class RiskSentimentAnalyzer:
             "risk_implication": risk_implication,
             "monetary_implication": monetary_implication,
             "trend_driver": trend_driver,
-            "thresholds": {
-                "historical_high": 2400,
-                "high": 2000,
-                "medium_high": 1800,
-                "neutral": 1500
-            }
+            "thresholds": self.thresholds("gold.regime")
         }
 #铜价
     def analyze_copper_futures(self):
@@ -1930,82 +3332,28 @@ class RiskSentimentAnalyzer:
         if 'HG=F' not in self.data.columns:
             return {"status": "unavailable", "message": "铜期货数据不可用"}
         
-        series = self.data['HG=F'].dropna()
+        series = self.data.series('HG=F')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        current_date = series.index[-1]
+        features = self.features.loc['HG=F']
         
         # 统计分析
-        one_year_ago = current_date - pd.DateOffset(years=1)
-        data_in_last_year = series[series.index >= one_year_ago]
-        percentile_1y = (data_in_last_year <= current).mean() * 100 if len(data_in_last_year) > 0 else 50
+        percentile_1y = features['percentile_1y']
         
         # 变化率计算
-        change_1m = self._calculate_change(series, -21)
-        change_3m = self._calculate_change(series, -63)
+        change_1m = features['change_1m']
+        change_3m = features['change_3m']
         
         # 铜价制度分析（铜博士的经济周期指示）
-        if current > 4.5:
-            regime = "繁荣制度"
-            economic_signal = "经济强劲扩张"
-            cycle_phase = "繁荣期"
-            demand_outlook = "工业需求旺盛，基建投资活跃"
-        elif current > 3.8:
-            regime = "温和扩张制度"
-            economic_signal = "经济稳健增长"
-            cycle_phase = "扩张期"
-            demand_outlook = "制造业需求稳定，经济活动正常"
-        elif current > 3.0:
-            regime = "中性制度"
-            economic_signal = "经济增长温和"
-            cycle_phase = "平稳期"
-            demand_outlook = "工业需求平衡，经济动能适中"
-        elif current > 2.5:
-            regime = "收缩制度"
-            economic_signal = "经济增长放缓"
-            cycle_phase = "下行期"
-            demand_outlook = "制造业需求疲软，投资活动减少"
-        else:
-            regime = "衰退制度"
-            economic_signal = "经济深度收缩"
-            cycle_phase = "衰退期"
-            demand_outlook = "工业需求萎缩，产能大量闲置"
+        regime, economic_signal, cycle_phase, demand_outlook = self.classify("copper.regime", current)
     
         # 供需平衡分析
-        if change_1m > 8:
-            supply_demand = "需求激增"
-            market_tension = "供应紧张，价格快速上涨"
-        elif change_1m > 3:
-            supply_demand = "需求偏强"
-            market_tension = "供需偏紧，价格上涨压力"
-        elif change_1m < -8:
-            supply_demand = "需求萎缩"
-            market_tension = "供应过剩，价格下跌压力"
-        elif change_1m < -3:
-            supply_demand = "需求偏弱"
-            market_tension = "供需偏松，价格承压"
-        else:
-            supply_demand = "供需平衡"
-            market_tension = "市场相对均衡"
+        supply_demand, market_tension = self.classify("copper.supply_demand", change_1m)
         
         # 通胀/增长预期
-        if change_3m > 15:
-            inflation_growth = "强通胀+强增长"
-            policy_implication = "经济过热风险，央行可能收紧政策"
-        elif change_3m > 5:
-            inflation_growth = "温和通胀+稳增长"
-            policy_implication = "经济健康扩张，政策保持稳定"
-        elif change_3m < -15:
-            inflation_growth = "通缩+衰退风险"
-            policy_implication = "经济衰退担忧，需要政策刺激"
-        elif change_3m < -5:
-            inflation_growth = "增长放缓"
-            policy_implication = "经济下行压力，政策转向宽松"
-        else:
-            inflation_growth = "稳定预期"
-            policy_implication = "经济运行平稳"
+        inflation_growth, policy_implication = self.classify("copper.inflation_growth", change_3m)
     
         return {
             "indicator": "铜期货(工业金属之王)",
@@ -2024,12 +3372,7 @@ class RiskSentimentAnalyzer:
             "market_tension": market_tension,
             "inflation_growth": inflation_growth,
             "policy_implication": policy_implication,
-            "thresholds": {
-                "boom": 4.5,
-                "expansion": 3.8,
-                "neutral": 3.0,
-                "contraction": 2.5
-            }
+            "thresholds": self.thresholds("copper.regime")
         }
 
 #大宗商品指数
@@ -2038,31 +3381,17 @@ class RiskSentimentAnalyzer:
         if 'DBC' not in self.data.columns:
             return {"status": "unavailable", "message": "DBC ETF数据不可用"}
         
-        series = self.data['DBC'].dropna()
+        series = self.data.series('DBC')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        change_1m = self._calculate_change(series, -21)
-        change_3m = self._calculate_change(series, -63)
+        features = self.features.loc['DBC']
+        change_1m = features['change_1m']
+        change_3m = features['change_3m']
         
         # DBC价格制度分析
-        if current > 25:
-            regime = "商品超级周期"
-            macro_signal = "全球通胀+增长强劲"
-            investment_implication = "商品配置价值显著"
-        elif current > 20:
-            regime = "商品牛市"
-            macro_signal = "通胀预期+需求旺盛"
-            investment_implication = "商品投资机会良好"
-        elif current > 15:
-            regime = "商品中性"
-            macro_signal = "宏观环境平稳"
-            investment_implication = "商品配置适中"
-        else:
-            regime = "商品熊市"
-            macro_signal = "通缩风险+需求疲软"
-            investment_implication = "商品投资谨慎"
+        regime, macro_signal, investment_implication = self.classify("dbc.regime", current)
         
         return {
             "indicator": "大宗商品指数ETF",
@@ -2078,31 +3407,17 @@ class RiskSentimentAnalyzer:
          if 'ZW=F' not in self.data.columns:
              return {"status": "unavailable", "message": "小麦期货数据不可用"}
          
-         series = self.data['ZW=F'].dropna()
+         series = self.data.series('ZW=F')
          if len(series) < 2:
              return {"status": "insufficient_data"}
              
          current = series.iloc[-1]
-         change_1m = self._calculate_change(series, -21)
-         change_3m = self._calculate_change(series, -63)
+         features = self.features.loc['ZW=F']
+         change_1m = features['change_1m']
+         change_3m = features['change_3m']
          
          # 小麦价格制度分析（美分/蒲式耳）
-         if current > 900:
-             regime = "粮食危机制度"
-             food_security = "全球粮食安全风险"
-             geopolitical = "地缘政治或气候冲击"
-         elif current > 700:
-             regime = "高价制度"
-             food_security = "粮食价格压力"
-             geopolitical = "供应链受扰"
-         elif current > 500:
-             regime = "正常制度"
-             food_security = "粮食供应稳定"
-             geopolitical = "市场运行正常"
-         else:
-             regime = "低价制度"
-             food_security = "供应充裕"
-             geopolitical = "丰收或需求疲软"
+         regime, food_security, geopolitical = self.classify("wheat.regime", current)
          
          return {
              "indicator": "小麦期货",
@@ -2118,31 +3433,17 @@ class RiskSentimentAnalyzer:
          if 'ZC=F' not in self.data.columns:
              return {"status": "unavailable", "message": "玉米期货数据不可用"}
          
-         series = self.data['ZC=F'].dropna()
+         series = self.data.series('ZC=F')
          if len(series) < 2:
              return {"status": "insufficient_data"}
              
          current = series.iloc[-1]
-         change_1m = self._calculate_change(series, -21)
-         change_3m = self._calculate_change(series, -63)
+         features = self.features.loc['ZC=F']
+         change_1m = features['change_1m']
+         change_3m = features['change_3m']
          
          # 玉米价格制度分析（美分/蒲式耳）
-         if current > 700:
-             regime = "供应紧张制度"
-             dual_demand = "饲料+燃料需求激增"
-             inflation_risk = "食品和能源通胀双重压力"
-         elif current > 550:
-             regime = "偏紧制度"
-             dual_demand = "需求偏强"
-             inflation_risk = "通胀压力温和上升"
-         elif current > 400:
-             regime = "均衡制度"
-             dual_demand = "供需基本平衡"
-             inflation_risk = "价格稳定"
-         else:
-             regime = "供应充裕制度"
-             dual_demand = "需求疲软"
-             inflation_risk = "通缩压力"
+         regime, dual_demand, inflation_risk = self.classify("corn.regime", current)
          
          return {
              "indicator": "玉米期货",
@@ -2158,31 +3459,17 @@ class RiskSentimentAnalyzer:
          if 'ZS=F' not in self.data.columns:
              return {"status": "unavailable", "message": "大豆期货数据不可用"}
          
-         series = self.data['ZS=F'].dropna()
+         series = self.data.series('ZS=F')
          if len(series) < 2:
              return {"status": "insufficient_data"}
              
          current = series.iloc[-1]
-         change_1m = self._calculate_change(series, -21)
-         change_3m = self._calculate_change(series, -63)
+         features = self.features.loc['ZS=F']
+         change_1m = features['change_1m']
+         change_3m = features['change_3m']
          
          # 大豆价格制度分析（美分/蒲式耳）
-         if current > 1600:
-             regime = "历史高位制度"
-             food_inflation = "食品通胀压力极大"
-             trade_impact = "贸易成本飙升，消费者负担沉重"
-         elif current > 1300:
-             regime = "高价制度"
-             food_inflation = "食品通胀压力显著"
-             trade_impact = "农产品成本上升，贸易活跃"
-         elif current > 1000:
-             regime = "正常制度"
-             food_inflation = "食品价格稳定"
-             trade_impact = "农业贸易正常，供需平衡"
-         else:
-             regime = "低价制度"
-             food_inflation = "食品通缩压力"
-             trade_impact = "农民收入承压，产能可能调整"
+         regime, food_inflation, trade_impact = self.classify("soybean.regime", current)
          
          return {
              "indicator": "大豆期货",
@@ -2198,39 +3485,20 @@ class RiskSentimentAnalyzer:
           if 'NG=F' not in self.data.columns:
               return {"status": "unavailable", "message": "天然气期货数据不可用"}
           
-          series = self.data['NG=F'].dropna()
+          series = self.data.series('NG=F')
           if len(series) < 2:
               return {"status": "insufficient_data"}
               
           current = series.iloc[-1]
-          change_1m = self._calculate_change(series, -21)
-          change_3m = self._calculate_change(series, -63)
+          features = self.features.loc['NG=F']
+          change_1m = features['change_1m']
+          change_3m = features['change_3m']
           
           # 天然气价格制度分析
-          if current > 6.0:
-              regime = "供应危机制度"
-              energy_signal = "能源安全风险"
-              economic_impact = "通胀压力显著，消费者负担加重"
-          elif current > 4.0:
-              regime = "高价制度"
-              energy_signal = "供需偏紧"
-              economic_impact = "能源成本上升，制造业承压"
-          elif current > 2.5:
-              regime = "正常制度"
-              energy_signal = "供需平衡"
-              economic_impact = "能源成本适中，经济运行稳定"
-          else:
-              regime = "低价制度"
-              energy_signal = "供应充裕"
-              economic_impact = "能源成本优势，支撑经济增长"
+          regime, energy_signal, economic_impact = self.classify("natural_gas.regime", current)
           
           # 季节性和地缘分析
-          if change_1m > 15:
-              market_driver = "供应中断或极端天气"
-          elif change_1m < -15:
-              market_driver = "供应增加或需求疲软"
-          else:
-              market_driver = "基本面稳定"
+          market_driver = self.classify("natural_gas.market_driver", change_1m)
           
           return {
               "indicator": "天然气期货",
@@ -2247,49 +3515,20 @@ class RiskSentimentAnalyzer:
         if 'JPY=X' not in self.data.columns:
             return {"status": "unavailable", "message": "日元汇率数据不可用"}
         
-        series = self.data['JPY=X'].dropna()
+        series = self.data.series('JPY=X')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        change_1w = self._calculate_change(series, -5)
-        change_1m = self._calculate_change(series, -21)
+        features = self.features.loc['JPY=X']
+        change_1w = features['change_1w']
+        change_1m = features['change_1m']
         
         # 注意：JPY=X表示1美元兑多少日元，数值越高表示日元越弱
-        if current > 155:
-            regime = "日元极度疲软"
-            monetary_policy = "BoJ可能干预汇市"
-            global_impact = "日本通胀压力加剧，全球贸易成本上升"
-        elif current > 145:
-            regime = "日元疲软"
-            monetary_policy = "货币政策分化显著"
-            global_impact = "日本出口竞争力增强，进口通胀压力"
-        elif current > 130:
-            regime = "日元中性偏弱"
-            monetary_policy = "政策立场相对宽松"
-            global_impact = "汇率波动温和"
-        elif current > 110:
-            regime = "日元中性"
-            monetary_policy = "货币政策基本均衡"
-            global_impact = "双边贸易相对均衡"
-        else:
-            regime = "日元强势"
-            monetary_policy = "避险需求推升日元"
-            global_impact = "全球风险偏好下降，避险情绪升温"
+        regime, monetary_policy, global_impact = self.classify("jpy.regime", current)
         
         # 避险功能分析
-        if change_1w < -2:  # 日元快速升值
-            safe_haven = "强避险需求"
-            risk_sentiment = "全球风险情绪恶化"
-        elif change_1w < -1:
-            safe_haven = "温和避险"
-            risk_sentiment = "市场不确定性增加"
-        elif change_1w > 2:  # 日元快速贬值
-            safe_haven = "风险偏好回升"
-            risk_sentiment = "全球风险情绪改善"
-        else:
-            safe_haven = "避险需求平衡"
-            risk_sentiment = "市场情绪相对稳定"
+        safe_haven, risk_sentiment = self.classify("jpy.safe_haven", change_1w)
         
         return {
             "indicator": "日元/美元",
@@ -2308,42 +3547,20 @@ class RiskSentimentAnalyzer:
         if 'EUR=X' not in self.data.columns:
             return {"status": "unavailable", "message": "欧元汇率数据不可用"}
         
-        series = self.data['EUR=X'].dropna()
+        series = self.data.series('EUR=X')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        change_1w = self._calculate_change(series, -5)
-        change_1m = self._calculate_change(series, -21)
+        features = self.features.loc['EUR=X']
+        change_1w = features['change_1w']
+        change_1m = features['change_1m']
         
         # EUR=X表示1欧元兑多少美元
-        if current > 1.15:
-            regime = "欧元强势"
-            ecb_policy = "货币政策收紧预期"
-            eu_economy = "欧洲经济增长强劲"
-        elif current > 1.05:
-            regime = "欧元中性偏强"
-            ecb_policy = "政策立场相对中性"
-            eu_economy = "欧洲经济稳健增长"
-        elif current > 0.95:
-            regime = "欧元中性偏弱"
-            ecb_policy = "货币政策相对宽松"
-            eu_economy = "欧洲经济增长温和"
-        else:
-            regime = "欧元疲软"
-            ecb_policy = "极度宽松货币政策"
-            eu_economy = "欧洲经济面临压力"
+        regime, ecb_policy, eu_economy = self.classify("eur.regime", current)
         
         # 政策分化分析
-        if change_1m > 3:
-            policy_divergence = "欧美政策分化缩小"
-            trade_impact = "欧洲出口竞争力下降"
-        elif change_1m < -3:
-            policy_divergence = "欧美政策分化加大"
-            trade_impact = "欧洲出口竞争力增强"
-        else:
-            policy_divergence = "政策分化相对稳定"
-            trade_impact = "贸易影响中性"
+        policy_divergence, trade_impact = self.classify("eur.policy_divergence", change_1m)
         
         return {
             "indicator": "欧元/美元",
@@ -2361,42 +3578,20 @@ class RiskSentimentAnalyzer:
         if 'CNY=X' not in self.data.columns:
             return {"status": "unavailable", "message": "人民币汇率数据不可用"}
         
-        series = self.data['CNY=X'].dropna()
+        series = self.data.series('CNY=X')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        change_1w = self._calculate_change(series, -5)
-        change_1m = self._calculate_change(series, -21)
+        features = self.features.loc['CNY=X']
+        change_1w = features['change_1w']
+        change_1m = features['change_1m']
         
         # CNY=X表示1美元兑多少人民币，数值越高表示人民币越弱
-        if current > 7.3:
-            regime = "人民币显著承压"
-            pboc_policy = "央行可能加强汇率管理"
-            china_economy = "经济增长面临挑战"
-        elif current > 7.0:
-            regime = "人民币中性偏弱"
-            pboc_policy = "汇率政策保持灵活"
-            china_economy = "经济增长稳中有忧"
-        elif current > 6.5:
-            regime = "人民币基本稳定"
-            pboc_policy = "政策工具充足"
-            china_economy = "经济运行在合理区间"
-        else:
-            regime = "人民币相对强势"
-            pboc_policy = "汇率升值压力管理"
-            china_economy = "经济增长动能强劲"
+        regime, pboc_policy, china_economy = self.classify("cny.regime", current)
         
         # 贸易与资本流动影响
-        if change_1m > 2:
-            capital_flow = "资本流出压力加大"
-            trade_competitiveness = "出口竞争力增强"
-        elif change_1m < -2:
-            capital_flow = "资本流入增加"
-            trade_competitiveness = "进口成本下降"
-        else:
-            capital_flow = "资本流动相对平衡"
-            trade_competitiveness = "贸易影响中性"
+        capital_flow, trade_competitiveness = self.classify("cny.capital_flow", change_1m)
     
         return {
             "indicator": "人民币/美元",
@@ -2414,50 +3609,21 @@ class RiskSentimentAnalyzer:
         if 'BTC-USD' not in self.data.columns:
             return {"status": "unavailable", "message": "比特币数据不可用"}
         
-        series = self.data['BTC-USD'].dropna()
+        series = self.data.series('BTC-USD')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        change_1w = self._calculate_change(series, -5)
-        change_1m = self._calculate_change(series, -21)
+        features = self.features.loc['BTC-USD']
+        change_1w = features['change_1w']
+        change_1m = features['change_1m']
         
         # 比特币价格制度分析
-        if current > 80000:
-            regime = "历史新高区域"
-            adoption_signal = "主流机构大规模采纳"
-            risk_appetite = "极度投机情绪"
-        elif current > 60000:
-            regime = "牛市高位"
-            adoption_signal = "机构采纳加速"
-            risk_appetite = "强风险偏好"
-        elif current > 40000:
-            regime = "中高位震荡"
-            adoption_signal = "采纳稳步推进"
-            risk_appetite = "温和风险偏好"
-        elif current > 20000:
-            regime = "中性区间"
-            adoption_signal = "基础建设发展"
-            risk_appetite = "谨慎乐观"
-        else:
-            regime = "熊市低位"
-            adoption_signal = "监管担忧或技术问题"
-            risk_appetite = "风险厌恶"
+        regime, adoption_signal, risk_appetite = self.classify("btc.regime", current)
     
         # 波动性分析
         abs_change = abs(change_1w)
-        if abs_change > 20:
-            volatility = "极高波动"
-            market_maturity = "市场投机性极强"
-        elif abs_change > 10:
-            volatility = "高波动"
-            market_maturity = "市场仍不成熟"
-        elif abs_change > 5:
-            volatility = "中等波动"
-            market_maturity = "市场逐步成熟"
-        else:
-            volatility = "相对稳定"
-            market_maturity = "市场趋于成熟"
+        volatility, market_maturity = self.classify("btc.volatility", abs_change)
         
         return {
             "indicator": "比特币",
@@ -2475,29 +3641,16 @@ class RiskSentimentAnalyzer:
         if 'ETH-USD' not in self.data.columns:
             return {"status": "unavailable", "message": "以太坊数据不可用"}
         
-        series = self.data['ETH-USD'].dropna()
+        series = self.data.series('ETH-USD')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        change_1w = self._calculate_change(series, -5)
-        change_1m = self._calculate_change(series, -21)
-        
-        if current > 5000:
-            regime = "历史高位"
-            defi_signal = "DeFi生态爆发式增长"
-        elif current > 3000:
-            regime = "牛市区间"
-            defi_signal = "智能合约采纳加速"
-        elif current > 2000:
-            regime = "中高位"
-            defi_signal = "生态稳步发展"
-        elif current > 1000:
-            regime = "中性区间"
-            defi_signal = "基础设施建设期"
-        else:
-            regime = "熊市区间"
-            defi_signal = "生态发展遇阻"
+        features = self.features.loc['ETH-USD']
+        change_1w = features['change_1w']
+        change_1m = features['change_1m']
+        
+        regime, defi_signal = self.classify("eth.regime", current)
         
         return {
             "indicator": "以太坊",
@@ -2512,29 +3665,16 @@ class RiskSentimentAnalyzer:
         if 'SOL-USD' not in self.data.columns:
             return {"status": "unavailable", "message": "Solana数据不可用"}
         
-        series = self.data['SOL-USD'].dropna()
+        series = self.data.series('SOL-USD')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        change_1w = self._calculate_change(series, -5)
-        change_1m = self._calculate_change(series, -21)
-        
-        if current > 200:
-            regime = "投机泡沫"
-            ecosystem_health = "生态过热"
-        elif current > 100:
-            regime = "强势上涨"
-            ecosystem_health = "生态快速发展"
-        elif current > 50:
-            regime = "健康增长"
-            ecosystem_health = "生态稳步扩张"
-        elif current > 20:
-            regime = "温和增长"
-            ecosystem_health = "基础建设期"
-        else:
-            regime = "低位整理"
-            ecosystem_health = "生态发展缓慢"
+        features = self.features.loc['SOL-USD']
+        change_1w = features['change_1w']
+        change_1m = features['change_1m']
+        
+        regime, ecosystem_health = self.classify("sol.regime", current)
         
         return {
             "indicator": "Solana",
@@ -2555,26 +3695,16 @@ class RiskSentimentAnalyzer:
         if 'WLEMUINDXD' not in self.data.columns:
             return {"status": "unavailable", "message": "世界经济政策不确定性指数数据不可用"}
         
-        series = self.data['WLEMUINDXD'].dropna()
+        series = self.data.series('WLEMUINDXD')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        change_1m = self._calculate_change(series, -21)
+        features = self.features.loc['WLEMUINDXD']
+        change_1m = features['change_1m']
         
         # 简化制度分析
-        if current > 300:
-            regime = "极高不确定性"
-            risk_level = "系统性风险显著"
-        elif current > 200:
-            regime = "高不确定性"
-            risk_level = "政策风险需关注"
-        elif current > 150:
-            regime = "中等不确定性"
-            risk_level = "风险适中"
-        else:
-            regime = "低不确定性"
-            risk_level = "政策风险较低"
+        regime, risk_level = self.classify("world_epu.regime", current)
         
         return {
             "indicator": "世界经济政策不确定性",
@@ -2589,26 +3719,16 @@ class RiskSentimentAnalyzer:
         if 'USEPUINDXD' not in self.data.columns:
             return {"status": "unavailable", "message": "美国经济政策不确定性指数数据不可用"}
         
-        series = self.data['USEPUINDXD'].dropna()
+        series = self.data.series('USEPUINDXD')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
-        change_1m = self._calculate_change(series, -21)
+        features = self.features.loc['USEPUINDXD']
+        change_1m = features['change_1m']
         
         # 简化制度分析
-        if current > 400:
-            regime = "政治危机级别"
-            impact = "强烈全球溢出"
-        elif current > 250:
-            regime = "高政策不确定"
-            impact = "显著全球溢出"
-        elif current > 150:
-            regime = "中等不确定"
-            impact = "温和影响"
-        else:
-            regime = "低不确定"
-            impact = "影响有限"
+        regime, impact = self.classify("us_epu.regime", current)
         
         return {
             "indicator": "美国经济政策不确定性",
@@ -2623,27 +3743,17 @@ class RiskSentimentAnalyzer:
         if 'MTSDS133FMS' not in self.data.columns:
             return {"status": "unavailable", "message": "美国月度财政余额数据不可用"}
         
-        series = self.data['MTSDS133FMS'].dropna()
+        series = self.data.series('MTSDS133FMS')
         if len(series) < 2:
             return {"status": "insufficient_data"}
             
         current = series.iloc[-1]
+        features = self.features.loc['MTSDS133FMS']
         current_billions = current / 1000  # 转换为十亿美元
-        change_3m = self._calculate_change(series, -63)
+        change_3m = features['change_3m']
         
         # 简化财政状况分析
-        if current_billions > 0:
-            regime = "财政盈余"
-            fiscal_health = "财政状况良好"
-        elif current_billions > -100:
-            regime = "温和赤字"
-            fiscal_health = "财政压力可控"
-        elif current_billions > -300:
-            regime = "中等赤字"
-            fiscal_health = "财政压力显现"
-        else:
-            regime = "高赤字"
-            fiscal_health = "财政状况严峻"
+        regime, fiscal_health = self.classify("fiscal_balance.regime", current_billions)
         
         return {
             "indicator": "美国月度财政余额",
@@ -2658,26 +3768,16 @@ class RiskSentimentAnalyzer:
          if 'UMCSENT' not in self.data.columns:
              return {"status": "unavailable", "message": "密歇根消费者信心指数数据不可用"}
          
-         series = self.data['UMCSENT'].dropna()
+         series = self.data.series('UMCSENT')
          if len(series) < 2:
              return {"status": "insufficient_data"}
              
          current = series.iloc[-1]
-         change_1m = self._calculate_change(series, -21)
+         features = self.features.loc['UMCSENT']
+         change_1m = features['change_1m']
          
          # 简化信心水平分析
-         if current > 90:
-             regime = "高信心"
-             economic_signal = "经济增长强劲"
-         elif current > 70:
-             regime = "中高信心"
-             economic_signal = "经济稳健增长"
-         elif current > 50:
-             regime = "中等信心"
-             economic_signal = "经济增长温和"
-         else:
-             regime = "低信心"
-             economic_signal = "经济增长承压"
+         regime, economic_signal = self.classify("consumer_sentiment.regime", current)
          
          return {
              "indicator": "密歇根消费者信心",
@@ -2692,28 +3792,18 @@ class RiskSentimentAnalyzer:
          if 'T5YIE' not in self.data.columns:
              return {"status": "unavailable", "message": "5年期通胀预期数据不可用"}
          
-         series = self.data['T5YIE'].dropna()
+         series = self.data.series('T5YIE')
          if len(series) < 2:
              return {"status": "insufficient_data"}
              
          current = series.iloc[-1]
-         change_1m = self._calculate_change(series, -21)
+         features = self.features.loc['T5YIE']
+         change_1m = features['change_1m']
          
          # 简化通胀预期分析
          target_deviation = current - 2.0  # Fed 2%目标
          
-         if current > 3.5:
-             regime = "高通胀预期"
-             fed_challenge = "央行目标面临挑战"
-         elif current > 2.5:
-             regime = "偏高通胀预期"
-             fed_challenge = "需要政策关注"
-         elif current > 1.5:
-             regime = "适中通胀预期"
-             fed_challenge = "接近政策目标"
-         else:
-             regime = "低通胀预期"
-             fed_challenge = "通缩风险担忧"
+         regime, fed_challenge = self.classify("inflation_expectation_5y.regime", current)
          
          return {
              "indicator": "5年期通胀预期",
@@ -2733,21 +3823,15 @@ class RiskSentimentAnalyzer:
         if 'CPILFESL' not in self.data.columns:
             return {"status": "unavailable"}
         
-        series = self.data['CPILFESL'].dropna()
+        series = self.data.series('CPILFESL')
         if len(series) < 2:
             return {"status": "insufficient_data"}
         
         current = series.iloc[-1]
-        yoy_change = self._calculate_change(series, -252) if len(series) > 252 else 0
-        
-        if yoy_change > 4:
-            regime = "高通胀"
-        elif yoy_change > 3:
-            regime = "通胀偏高"
-        elif yoy_change > 2:
-            regime = "温和通胀"
-        else:
-            regime = "低通胀"
+        features = self.features.loc['CPILFESL']
+        yoy_change = features['change_1y'] if len(series) > 252 else 0
+        
+        regime = self.classify("core_cpi.regime", yoy_change)
         
         return {
             "indicator": "核心CPI",
@@ -2760,21 +3844,14 @@ class RiskSentimentAnalyzer:
         if 'PAYEMS' not in self.data.columns:
             return {"status": "unavailable"}
         
-        series = self.data['PAYEMS'].dropna()
+        series = self.data.series('PAYEMS')
         if len(series) < 2:
             return {"status": "insufficient_data"}
         
         current = series.iloc[-1]
         change_1y = self._calculate_change(series, -12) if len(series) > 12 else 0
         
-        if change_1y > 3:
-            regime = "强劲就业增长"
-        elif change_1y > 1.5:
-            regime = "稳健就业增长"
-        elif change_1y > 0:
-            regime = "温和就业增长"
-        else:
-            regime = "就业增长乏力"
+        regime = self.classify("nonfarm.regime", change_1y)
         
         return {
             "indicator": "非农就业",
@@ -2788,7 +3865,7 @@ class RiskSentimentAnalyzer:
         if 'BOPGSTB' not in self.data.columns:
             return {"status": "unavailable", "message": "美国贸易差额数据不可用"}
         
-        series = self.data['BOPGSTB'].dropna()
+        series = self.data.series('BOPGSTB')
         if len(series) < 7:  # 需要至少7个月数据计算6个月变化
             return {"status": "insufficient_data"}
             
@@ -2797,31 +3874,7 @@ class RiskSentimentAnalyzer:
         change_6m = self._calculate_change(series, -6)  # 6个月变化
         
         # 根据贸易差额规模进行专业制度分析（注意：负值为逆差，正值为顺差）
-        if current_billions > 0:
-            regime = "贸易顺差"
-            fiscal_impact = "贸易盈余支撑美元，减轻财政压力"
-            global_balance = "全球贸易格局调整，美国竞争力提升"
-            policy_implication = "贸易政策成效显现，但需防范报复性措施"
-        elif current_billions > -40:
-            regime = "温和贸易逆差"
-            fiscal_impact = "逆差规模可控，对美元支撑影响有限"
-            global_balance = "全球贸易相对均衡，经济一体化正常运行"
-            policy_implication = "贸易政策保持稳定，关注结构性调整"
-        elif current_billions > -60:
-            regime = "中等贸易逆差"
-            fiscal_impact = "逆差压力显现，美元承受一定贬值压力"
-            global_balance = "全球贸易失衡加剧，需要政策协调"
-            policy_implication = "贸易政策面临调整压力，可能加强保护措施"
-        elif current_billions > -80:
-            regime = "高贸易逆差"
-            fiscal_impact = "逆差严重影响财政，美元贬值压力增大"
-            global_balance = "全球贸易严重失衡，引发贸易摩擦风险"
-            policy_implication = "贸易保护主义抬头，关税政策趋紧"
-        else:
-            regime = "极高贸易逆差"
-            fiscal_impact = "逆差威胁经济稳定，美元霸权地位受挑战"
-            global_balance = "全球贸易体系面临重构，经济脱钩风险"
-            policy_implication = "贸易战风险升级，全球供应链重塑"
+        regime, fiscal_impact, global_balance, policy_implication = self.classify("trade_balance.regime", current_billions)
     
         # 分析6个月变化趋势的含义
         if change_6m > 8:  # 6个月变化大于8%
@@ -2854,7 +3907,7 @@ class RiskSentimentAnalyzer:
         if 'EXPCH' not in self.data.columns:
             return {"status": "unavailable", "message": "中国出口数据不可用"}
         
-        series = self.data['EXPCH'].dropna()
+        series = self.data.series('EXPCH')
         if len(series) < 13:  # 需要至少13个月数据计算年度变化
             return {"status": "insufficient_data"}
             
@@ -2862,36 +3915,7 @@ class RiskSentimentAnalyzer:
         change_yoy = self._calculate_change(series, -12)  # 12个月同比变化
         
         # 根据年度同比变化进行专业制度分析
-        if change_yoy > 15:
-            regime = "出口强劲增长"
-            global_impact = "全球需求旺盛，中国制造业竞争力显著提升"
-            supply_chain = "供应链韧性强化，外贸企业盈利能力大幅改善"
-            market_signal = "全球经济复苏强劲，国际贸易环境持续改善"
-        elif change_yoy > 8:
-            regime = "出口稳定增长" 
-            global_impact = "全球贸易持续复苏，外需为经济增长提供有力支撑"
-            supply_chain = "制造业出口订单稳定增长，产业链运转顺畅"
-            market_signal = "全球需求结构性改善，中国出口竞争优势巩固"
-        elif change_yoy > 2:
-            regime = "出口温和增长"
-            global_impact = "全球需求缓慢复苏，外贸增长动能有所减弱"
-            supply_chain = "出口企业适应性调整，供应链压力总体可控"
-            market_signal = "全球经济增长分化，外需支撑力度趋缓"
-        elif change_yoy > -5:
-            regime = "出口轻微下滑"
-            global_impact = "全球需求疲软，贸易保护主义影响逐步显现"
-            supply_chain = "出口企业面临订单波动，供应链稳定性面临考验"
-            market_signal = "全球经济下行风险加大，贸易增长承压"
-        elif change_yoy > -15:
-            regime = "出口明显下滑"
-            global_impact = "全球贸易显著收缩，经济衰退风险上升"
-            supply_chain = "制造业出口受到严重冲击，供应链断裂风险增加"
-            market_signal = "全球贸易保护升级，多边贸易体系承压"
-        else:
-            regime = "出口大幅下滑"
-            global_impact = "全球经济深度衰退，外需急剧萎缩"
-            supply_chain = "出口产业链面临系统性冲击，结构重组不可避免"
-            market_signal = "全球贸易体系重构，经济脱钩风险显著"
+        regime, global_impact, supply_chain, market_signal = self.classify("china_exports.regime", change_yoy)
         
         return {
             "indicator": "中国出口",
@@ -2910,7 +3934,7 @@ class RiskSentimentAnalyzer:
         if 'IMPCH' not in self.data.columns:
             return {"status": "unavailable", "message": "中国进口数据不可用"}
         
-        series = self.data['IMPCH'].dropna()
+        series = self.data.series('IMPCH')
         if len(series) < 13:
             return {"status": "insufficient_data"}
             
@@ -2918,36 +3942,7 @@ class RiskSentimentAnalyzer:
         change_yoy = self._calculate_change(series, -12)  # 12个月同比变化
         
         # 根据年度同比变化进行专业制度分析
-        if change_yoy > 15:
-            regime = "进口强劲增长"
-            domestic_demand = "内需强劲复苏，消费升级和投资扩张并进"
-            economic_health = "经济内生动力充沛，高质量发展态势明确"
-            policy_signal = "经济过热压力显现，政策或将适度收紧"
-        elif change_yoy > 8:
-            regime = "进口稳定增长"
-            domestic_demand = "内需持续改善，消费和投资保持稳定增长"
-            economic_health = "内外需协调发展，经济运行在合理区间"
-            policy_signal = "政策环境总体稳定，支持经济持续复苏"
-        elif change_yoy > 2:
-            regime = "进口温和增长"
-            domestic_demand = "内需恢复缓慢，消费和投资动能仍显不足"
-            economic_health = "经济增长对外需依赖较重，内需潜力待释放"
-            policy_signal = "需要更多政策措施激发内需活力"
-        elif change_yoy > -5:
-            regime = "进口轻微下滑"
-            domestic_demand = "内需增长乏力，消费信心和投资意愿偏弱"
-            economic_health = "经济下行压力加大，内外需双重挑战"
-            policy_signal = "亟需扩张性政策组合提振内需"
-        elif change_yoy > -15:
-            regime = "进口明显下滑"
-            domestic_demand = "内需显著萎缩，消费和投资大幅放缓"
-            economic_health = "经济衰退风险上升，结构性问题凸显"
-            policy_signal = "需要大力度逆周期调节政策"
-        else:
-            regime = "进口大幅下滑"
-            domestic_demand = "内需严重收缩，经济面临硬着陆风险"
-            economic_health = "经济深度调整，系统性风险需高度警惕"
-            policy_signal = "必须实施危机应对级别的政策干预"
+        regime, domestic_demand, economic_health, policy_signal = self.classify("china_imports.regime", change_yoy)
         
         return {
             "indicator": "中国进口",
@@ -2963,129 +3958,393 @@ class RiskSentimentAnalyzer:
     
 #———    ———————————————————————————————————————————————
 #计算框架
-    def calculate_risk_matrix(self):
-        """生成风险矩阵JSON数据"""
-        
-        # 获取各项分析结果
-        vix_data = self.analyze_vix()
-        fed_rrp_data = self.analyze_fed_rrp()
-        dollar_data = self.analyze_dollar_index()
-        walcl_data = self.analyze_walcl()
-        skew_data = self.analyze_skew()
-        move_data = self.analyze_move() 
-        t10y2y_data = self.analyze_yield_curve_t10y2y() 
-        hy_spread_data = self.analyze_hy_credit_spread()  
-        nfci_data = self.analyze_nfci() 
-        sofr_data = self.analyze_sofr()
+    def run_analyzers(self, specs=None, parallel=False, max_workers=None, timeout=None):
+        """执行注册表中的分析方法
+        
+        单个分析方法抛出异常时记为 error，并行模式下超过 timeout 秒未完成的记为 timeout，
+        均不影响其余指标。返回 (结果字典, 各分析方法耗时毫秒)，结果按注册表顺序排列。
+        """
+        specs = ANALYZER_REGISTRY if specs is None else specs
+        
+        def run(spec):
+            started = time.perf_counter()
+            try:
+                result = getattr(self, spec.method)()
+            except Exception as e:
+                print(f"  ❌ {spec.key} 分析失败: {type(e).__name__}: {e}")
+                result = {"status": "error", "message": f"{type(e).__name__}: {e}"}
+            return result, round((time.perf_counter() - started) * 1000, 1)
+        
+        results, timings = {}, {}
+        if not parallel:
+            for spec in specs:
+                results[spec.key], timings[spec.key] = run(spec)
+            return results, timings
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers or min(8, len(specs) or 1))
+        futures = {spec.key: executor.submit(run, spec) for spec in specs}
+        deadline = time.monotonic() + timeout if timeout else None
+        for spec in specs:
+            try:
+                remaining = max(0.0, deadline - time.monotonic()) if deadline else None
+                results[spec.key], timings[spec.key] = futures[spec.key].result(timeout=remaining)
+            except FuturesTimeout:
+                print(f"  ⏱️ {spec.key} 分析超时 (>{timeout}s)")
+                results[spec.key] = {"status": "timeout", "message": f"分析超过 {timeout}s 未完成"}
+                timings[spec.key] = None
+        # 超时的任务无法中断，不再等待其结束
+        executor.shutdown(wait=False, cancel_futures=True)
+        return results, timings
 
-   
-        # 大宗商品分析
-        wti_crude_data = self.analyze_wti_crude()
-        gold_data = self.analyze_gold_futures()
-        copper_data = self.analyze_copper_futures()
-        natural_gas_data = self.analyze_natural_gas()
-        soybean_data = self.analyze_soybean()
-        corn_data = self.analyze_corn()
-        wheat_data = self.analyze_wheat()
-        dbc_data = self.analyze_dbc_etf()
-
-         #汇率风险分析
-        jpy_data = self.analyze_jpy_usd()
-        eur_data = self.analyze_eur_usd()
-        cny_data = self.analyze_cny_usd()
-        #gbp_data = self.analyze_gbp_usd()
-        btc_data = self.analyze_btc_usd()
-        eth_data = self.analyze_eth_usd()
-        sol_data = self.analyze_sol_usd()
-
-        # 经济政策不确定性分析
-        world_epu_data = self.analyze_world_epu()
-        us_epu_data = self.analyze_us_epu()
-        fiscal_balance_data = self.analyze_us_fiscal_balance()
-        consumer_sentiment_data = self.analyze_michigan_consumer_sentiment()
-        inflation_expectation_5y_data = self.analyze_5y_inflation_expectation()
-        #宏观经济
-        core_cpi_data = self.analyze_core_cpi(),
-        nonfarm_data = self.analyze_nonfarm_payrolls(),
-        trade_balance_data = self.analyze_trade_balance(),
-        china_exports_data = self.analyze_china_exports(),
-        china_imports_data = self.analyze_china_imports()
-            
+    def calculate_risk_matrix(self, parallel=None, max_workers=None, timeout=None, specs=None):
+        """生成风险矩阵JSON数据
+        
+        parallel 为 True 时用线程池并行执行各分析方法，默认读取环境变量 ANALYZER_PARALLEL；
+        max_workers/timeout 默认读取 ANALYZER_WORKERS/ANALYZER_TIMEOUT（秒，仅并行模式生效）；
+        specs 为要执行的分析器（见 select_analyzers），默认全部。
+        """
+        if parallel is None:
+            parallel = os.getenv('ANALYZER_PARALLEL', 'false').lower() == 'true'
+        if max_workers is None:
+            max_workers = int(os.getenv('ANALYZER_WORKERS', '8'))
+        if timeout is None:
+            timeout = float(os.getenv('ANALYZER_TIMEOUT', '60')) or None
+        
+        started = time.perf_counter()
+        indicators, timings = self.run_analyzers(specs, parallel=parallel, max_workers=max_workers, timeout=timeout)
+        total_ms = round((time.perf_counter() - started) * 1000, 1)
+        return self.build_risk_matrix(indicators, timings, "parallel" if parallel else "sequential", total_ms)
+    
+    def add_long_term_percentiles(self, indicators):
+        """把主要指标最新值的3年/5年百分位（特征表）写入各分析结果的 statistics，历史不足时不写入"""
+        inputs = {spec.key: spec.inputs[0] for spec in ANALYZER_REGISTRY}
+        for key, result in indicators.items():
+            symbol = inputs.get(key)
+            # 只处理成功的结果（不可用/出错的结果带 status）
+            if not isinstance(result, dict) or "status" in result or symbol not in self.features.index:
+                continue
+            for column in FEATURE_PERCENTILE_COLUMNS:
+                value = self.features.at[symbol, column]
+                if pd.notna(value):
+                    result.setdefault("statistics", {})[column] = round(float(value), 1)
+    
+    def build_risk_matrix(self, indicators, timings, mode, total_ms, **execution):
+        """由各分析方法的结果组装风险矩阵JSON数据，execution 为附加的执行信息"""
+        failed = [key for key, result in indicators.items()
+                  if isinstance(result, dict) and result.get("status") in ("error", "timeout")]
+        label = {"parallel": "并行", "sequential": "顺序", "streaming": "流式"}.get(mode, mode)
+        print(f"🧮 完成 {len(indicators)} 项指标分析 ({label}, {total_ms:.0f}ms)"
+              + (f"，失败: {', '.join(failed)}" if failed else ""))
+        self.add_long_term_percentiles(indicators)
+        indicators = {key: [result] if key in LIST_WRAPPED_OUTPUTS else result
+                      for key, result in indicators.items()}
         
         # 构建完整的JSON数据
         risk_matrix = {
             "metadata": {
                 "report_type": "全球风险情绪综合仪表盘",
                 "analysis_time": datetime.now().strftime('%Y-%m-%d %H:%M'),
-                "data_date": self.data.index.max().strftime('%Y-%m-%d'),
-                "version": "1.0"
-            },
-            "main_indicators": {
-                "vix": vix_data,
-                "fed_rrp": fed_rrp_data,
-                "dollar_index": dollar_data,
-                "walcl": walcl_data,
-                "skew": skew_data  # 修正：使用 "skew" 键
-                ,"move": move_data 
-                ,"t10y2y": t10y2y_data
-                ,"hy_spread": hy_spread_data
-                ,"nfci": nfci_data 
-                ,"sofr": sofr_data
-                ,"wti_crude": wti_crude_data 
-                ,"gold": gold_data
-                ,"copper": copper_data
-                ,"natural_gas": natural_gas_data
-                ,"soybean": soybean_data
-                ,"corn": corn_data
-                ,"wheat": wheat_data
-                ,"dbc": dbc_data
-                ,"jpy": jpy_data,
-                "eur": eur_data,
-                "cny": cny_data,
-                #"gbp": gbp_data,
-                "btc": btc_data,
-                "eth": eth_data,
-                "sol": sol_data
-                ,"world_epu": world_epu_data,
-                "us_epu": us_epu_data,
-                "fiscal_balance": fiscal_balance_data,
-                "consumer_sentiment": consumer_sentiment_data,
-                "inflation_expectation_5y": inflation_expectation_5y_data
-                ,"core_cpi":core_cpi_data
-                ,"nonfarm":nonfarm_data
-                ,"trade_balance":trade_balance_data
-                ,"china_exports":china_exports_data
-                ,"china_imports":china_imports_data
+                "data_date": self.data.last_date.strftime('%Y-%m-%d') if self.data.last_date is not None else None,
+                "version": "1.0",
+                "data_sources": self.data.attrs.get('sources', {}),
+                "execution": {
+                    "mode": mode,
+                    "total_ms": total_ms,
+                    "analyzer_ms": timings,
+                    "failed": failed,
+                    **execution
+                }
             },
+            "main_indicators": indicators,
             #"other_indicators": other_data
         }
         
         return risk_matrix
 
 
+def stream_analysis(loader, start_date='2018-01-01', end_date=None, categories=None, specs=None, symbols=None):
+    """流水线模式：边下载边分析，返回 (风险矩阵, 按分类组织的原始数据, FrequencyFrames)
     
-     
-if __name__ == "__main__":
-    # 修正：正确创建分析器并获取数据
-    risk_analyzer = RiskSentimentAnalyzer()
-    data = risk_analyzer.calculate_risk_matrix()
+    消费 loader.stream_all_data 逐个产出的指标序列，每个分析方法在其 inputs 全部到达
+    （下载失败也算到达）后立即在当前线程执行，与仍在进行的下载重叠；数据流结束后
+    再执行输入不在本次下载范围内的分析方法。结果与 calculate_risk_matrix 一致。
+    specs 为要执行的分析器，symbols 为按需下载计划（见 plan_fetch）。
+    """
+    specs = ANALYZER_REGISTRY if specs is None else specs
+    analyzer = RiskSentimentAnalyzer(FrequencyFrames())
+    waiting = {spec.key: set(spec.inputs) for spec in specs}
+    all_data, results, timings = {}, {}, {}
+    
+    def run(ready):
+        for spec in ready:
+            del waiting[spec.key]
+            result, timing = analyzer.run_analyzers(specs=[spec])
+            results.update(result)
+            timings.update(timing)
+    
+    started = time.perf_counter()
+    for category, symbol, series in loader.stream_all_data(start_date, end_date, categories, symbols):
+        all_data.setdefault(category, {})[symbol] = series
+        if not series.empty:
+            analyzer.add_series(symbol, series, loader.get_indicator_info(symbol).get('freq'), category)
+        ready = []
+        for spec in specs:
+            if symbol in waiting.get(spec.key, ()):
+                waiting[spec.key].discard(symbol)
+                if not waiting[spec.key]:
+                    ready.append(spec)
+        run(ready)
+    run([spec for spec in specs if spec.key in waiting])
+    wall_ms = round((time.perf_counter() - started) * 1000, 1)
+    
+    frames = analyzer.data
+    frames.attrs = {
+        'download_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'total_indicators': len(frames),
+        'categories': list(DATA_CATEGORIES.keys()),
+        'sources': loader.source_status(set(frames.columns))
+    }
+    if not len(frames):
+        print("❌ 没有有效数据")
+        return None, all_data, frames
+    
+    indicators = {spec.key: results[spec.key] for spec in specs}
+    risk_matrix = analyzer.build_risk_matrix(indicators, timings, "streaming",
+                                             round(sum(t for t in timings.values() if t), 1), wall_ms=wall_ms)
+    print(f"⏱️ 流水线总耗时 {wall_ms / 1000:.1f}s（下载与分析重叠执行）")
+    return risk_matrix, all_data, frames
+
+
+# ==================== 输出 ====================
+# JSON编码方案：pretty 为带缩进的人读版本；compact 去掉缩进和空白；
+# orjson 与 compact 格式相同但编码更快（需要安装orjson，NaN会写为null）
+JSON_ENCODING_PROFILES = ('pretty', 'compact', 'orjson')
+
+
+def encode_risk_matrix(data, profile='pretty'):
+    """把风险矩阵序列化为UTF-8字节"""
+    if profile == 'orjson':
+        try:
+            import orjson
+            return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        except ImportError:
+            print("⚠️ 未安装orjson，改用compact编码")
+            profile = 'compact'
+    if profile == 'compact':
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if profile == 'pretty':
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    raise ValueError(f"未知的JSON编码方案: {profile}，可选: {', '.join(JSON_ENCODING_PROFILES)}")
+
+
+def write_atomic(path, payload):
+    """先写入同目录临时文件再原子替换，读取方不会看到写了一半的文件"""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def link_atomic(source, path, payload=None):
+    """让 path 指向与 source 相同的内容：优先硬链接后原子替换，不支持硬链接时写入 payload"""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        os.link(source, tmp_path)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if payload is None:
+            with open(source, 'rb') as f:
+                payload = f.read()
+        write_atomic(path, payload)
+
+
+def save_risk_matrix(data, output_dir="data", date=None, machine_profile=None, latest=True):
+    """保存风险矩阵：只序列化一次，写入当日文件后将 latest 链接到同一份内容
+    
+    machine_profile 为 compact/orjson 时额外写出 risk-matrix-latest.min.json 供程序读取，
+    默认读取环境变量 RISK_MATRIX_MACHINE_FORMAT（为空则不写）。latest 为 False 时只写当日文件
+    （部分输出不能替换 latest）。返回写出的文件路径列表。
+    """
+    if machine_profile is None:
+        machine_profile = os.getenv('RISK_MATRIX_MACHINE_FORMAT', '').strip().lower() or None
+    date = date or datetime.now().strftime("%Y-%m-%d")
+    os.makedirs(output_dir, exist_ok=True)
+    
+    payload = encode_risk_matrix(data, 'pretty')
+    dated_path = os.path.join(output_dir, f"risk-matrix-{date}.json")
+    latest_path = os.path.join(output_dir, "risk-matrix-latest.json")
+    write_atomic(dated_path, payload)
+    written = [dated_path]
+    if latest:
+        link_atomic(dated_path, latest_path, payload)
+        written.append(latest_path)
+    
+    if machine_profile and latest:
+        machine_path = os.path.join(output_dir, "risk-matrix-latest.min.json")
+        write_atomic(machine_path, encode_risk_matrix(data, machine_profile))
+        written.append(machine_path)
+    
+    for path in written:
+        print(f"✅ 数据已保存到 {os.path.basename(path)} ({os.path.getsize(path) / 1024:.1f} KB)")
+    return written
+
+
+def save_fetch_metrics(metrics, output_dir="data", date=None, latest=True):
+    """保存下载阶段的运行报告（fetch-metrics-{date}.json，latest 指向同一内容），返回文件路径"""
+    report = metrics.summary()
+    date = date or datetime.now().strftime("%Y-%m-%d")
+    os.makedirs(output_dir, exist_ok=True)
+    
+    payload = encode_risk_matrix(report, 'pretty')
+    dated_path = os.path.join(output_dir, f"fetch-metrics-{date}.json")
+    write_atomic(dated_path, payload)
+    if latest:
+        link_atomic(dated_path, os.path.join(output_dir, "fetch-metrics-latest.json"), payload)
+    
+    for source, stats in report['sources'].items():
+        latency = stats['latency_s']
+        print(f"⏱️ {source:6}: {stats['requests']} 次请求 (缓存 {stats['cached']}, 重试 {stats['retries']}), "
+              f"p50 {latency['p50'] or 0:.2f}s / p90 {latency['p90'] or 0:.2f}s, "
+              f"{stats['bytes_received']['total'] / 1024:.0f} KB, 限速等待 {stats['rate_limit_sleep_s']:.1f}s")
+    print(f"✅ 下载统计已保存到 {os.path.basename(dated_path)}")
+    return dated_path
+
+
+# ==================== 命令行入口 ====================
+def run_analysis(risk_analyzer, parallel=None, output_dir="data", date=None, specs=None, latest=True):
+    """生成并保存风险矩阵，返回风险矩阵数据"""
+    data = risk_analyzer.calculate_risk_matrix(parallel=parallel, specs=specs)
+    
+    # 保存到本地文件（当日文件与latest共用一次序列化结果）
+    save_risk_matrix(data, output_dir=output_dir, date=date, latest=latest)
+    return data
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="全球宏观数据下载与风险情绪分析")
+    parser.add_argument('--check-fred', action='store_true', help="启动时发送一次请求验证FRED API Key")
+    
+    fetch_options = argparse.ArgumentParser(add_help=False)
+    fetch_options.add_argument('--start', default='2018-01-01', help="起始日期 (默认 2018-01-01)")
+    fetch_options.add_argument('--end', default=None, help="结束日期 (默认今天)")
+    fetch_options.add_argument('--categories', nargs='+', default=None, help="只下载指定分类")
+    fetch_options.add_argument('--export', nargs='+', default=None, choices=EXPORT_FORMATS, metavar='FORMAT',
+                               help=f"宽表导出格式: {', '.join(EXPORT_FORMATS)} (默认 parquet)")
+    
+    subparsers = parser.add_subparsers(dest='command')
+    list_parser = subparsers.add_parser('list', help="列出分类和指标（不联网）")
+    list_parser.add_argument('--category', default=None, help="只列出指定分类的指标")
+    subparsers.add_parser('fetch', parents=[fetch_options], help="下载数据并保存快照和宽表")
+    analyze_parser = subparsers.add_parser('analyze', parents=[fetch_options],
+                                           help="下载数据并生成风险矩阵JSON（默认命令）")
+    analyze_parser.add_argument('--parallel', action='store_true', default=None, help="并行执行各项分析")
+    analyze_parser.add_argument('--stream', action='store_true', default=None,
+                                help="流水线模式：各指标下载完成即执行依赖它的分析（默认读取 PIPELINE_STREAM）")
+    analyze_parser.add_argument('--only', default=None, metavar='OUTPUTS',
+                                type=lambda value: [v.strip() for v in value.split(',') if v.strip()],
+                                help="只生成指定分析器的结果并只下载其所需指标，逗号分隔（如 vix,sofr）；"
+                                     "结果写入 data/partial，不更新 latest 和数据快照")
+    analyze_parser.add_argument('--full', action='store_true',
+                                help="下载分类中的全部指标（默认只下载风险矩阵用到的指标）")
+    analyze_parser.add_argument('--snapshot', nargs='?', const=snapshot_path(), default=None, metavar='PATH',
+                                help="使用已保存的数据快照而不重新下载（默认最新快照）")
+    analyze_parser.add_argument('--as-of', default=None, help="历史回放：只使用该日期及之前的数据，结果写入 data/replay")
+    backfill_parser = subparsers.add_parser('backfill', help="由数据快照回填历史每日的制度表")
+    backfill_parser.add_argument('--snapshot', default=None, metavar='PATH', help="数据快照路径（默认最新快照）")
+    backfill_parser.add_argument('--start', default='2018-01-01', help="起始日期 (默认 2018-01-01)")
+    backfill_parser.add_argument('--end', default=None, help="结束日期 (默认快照最新日期)")
+    backfill_parser.add_argument('--output', default="data/backfill/regimes.parquet", help="输出文件 (.parquet/.csv)")
+    subparsers.add_parser('publish', help="上传风险矩阵JSON到COS")
+    return parser
+
+
+def cli(argv=None):
+    """命令行入口：重量级依赖只在需要的子命令中加载"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        # 未指定子命令时保持原有行为：下载数据并生成风险矩阵
+        args = parser.parse_args(['--check-fred', 'analyze'] if args.check_fred else ['analyze'])
     
-    # 创建数据目录
-    if not os.path.exists("data"):
-        os.makedirs("data")
+    if args.command == 'list':
+        merge_saved_config()
+        list_categories()
+        list_indicators(args.category)
+        return 0
     
-    # 保存到本地文件
-    today = datetime.now().strftime("%Y-%m-%d")
-    with open(f"data/risk-matrix-{today}.json", "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    if args.command == 'backfill':
+        started = time.perf_counter()
+        table = RiskSentimentAnalyzer.from_snapshot(args.snapshot).backfill_regimes(args.start, args.end)
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        if args.output.endswith('.csv'):
+            table.to_csv(args.output, encoding='utf-8-sig')
+        else:
+            table.to_parquet(args.output)
+        print(f"✅ 制度回填完成: {table.shape[0]:,} 个日期 × {table.shape[1]} 项指标 "
+              f"({time.perf_counter() - started:.2f}s) -> {args.output}")
+        return 0
+    
+    if args.command == 'publish':
+        from data_uploader import upload_to_cos
+        results = upload_to_cos()
+        return 1 if 'failed' in results.values() else 0
     
-    # 同时保存为latest.json
-    with open("data/risk-matrix-latest.json", "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    stream = args.command == 'analyze' and (
+        args.stream if args.stream is not None else os.getenv('PIPELINE_STREAM', 'false').lower() == 'true')
+    # analyze 按分析器声明的输入只下载需要的指标；fetch 仍下载全部指标
+    specs, symbols = ANALYZER_REGISTRY, None
+    if args.command == 'analyze':
+        try:
+            specs = select_analyzers(args.only)
+            if not (args.snapshot or args.as_of or args.full):
+                symbols = plan_fetch(args.only, args.categories)
+        except ValueError as e:
+            parser.error(str(e))
+    # 只生成部分分析器时结果写入单独目录，不替换 latest 和数据快照（publish 只上传完整结果）
+    output_dir = "data/replay" if args.command == 'analyze' and args.as_of else "data"
+    partial = args.command == 'analyze' and bool(args.only) and RISK_MATRIX_OUTPUT not in args.only
+    if partial:
+        output_dir = os.path.join(output_dir, "partial", "_".join(spec.key for spec in specs))
     
-    print(f"✅ 数据已保存到 risk-matrix-{today}.json")
-    print(f"✅ 数据已保存到 risk-matrix-latest.json")
+    if args.command == 'analyze' and (args.snapshot or args.as_of):
+        risk_analyzer = RiskSentimentAnalyzer.from_snapshot(args.snapshot, as_of=args.as_of)
+    elif stream:
+        # 风险矩阵先落盘，快照、下载统计和宽表导出随后写出
+        loader = create_loader(args.check_fred)
+        data, raw_data, frames = stream_analysis(loader, args.start, args.end, args.categories, specs, symbols)
+        if data is None:
+            return 1
+        save_risk_matrix(data, output_dir, latest=not partial)
+        if not partial:
+            save_snapshot(frames)
+        try:
+            save_fetch_metrics(loader.metrics, output_dir, latest=not partial)
+            export_frames(frames, args.export)
+        except Exception as e:
+            print(f"⚠️ 下载统计或数据文件保存失败: {e}")
+        return 0
+    else:
+        frames, raw_data, loader = main(args.start, args.end, args.categories, check_fred=args.check_fred,
+                                         exports=args.export, symbols=symbols, output_dir=output_dir,
+                                         latest=not partial)
+        if frames is None:
+            return 1
+        if not partial:
+            save_snapshot(frames)
+        if args.command != 'analyze':
+            return 0
+        risk_analyzer = RiskSentimentAnalyzer(frames)
     
-    # 展示分析结果
-    risk_analyzer.display_analysis_results(data)
+    run_analysis(risk_analyzer, args.parallel, output_dir=output_dir, date=args.as_of, specs=specs,
+                 latest=not partial)
+    return 0
 
+
+if __name__ == "__main__":
+    sys.exit(cli())
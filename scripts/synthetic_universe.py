@@ -0,0 +1,313 @@
+"""
+合成数据宇宙：生成与 download_all_data 返回结构一致的 {分类: {代码: Series}} 数据，用于规模基准测试
+
+包含 DATA_CATEGORIES 中的全部真实指标（数值量级接近真实数据），以及任意数量的合成指标；
+序列带有交易日历与节假日、上市前空白、停更缺口、零星缺失值，Yahoo序列的索引带交易所时区。
+
+    python scripts/synthetic_universe.py --symbols 2000 --years 30
+    python scripts/synthetic_universe.py --symbols 200 --years 10 --snapshot-dir data/snapshot
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import risk_matrix_calculator as rmc  # noqa: E402
+from risk_matrix_calculator import DATA_CATEGORIES, pd, np  # noqa: E402
+
+# 频率对应的日期规则（FRED月度/季度观测日期为期初，周度为周五）
+FREQ_RULES = {'daily': 'B', 'weekly': 'W-FRI', 'monthly': 'MS', 'quarterly': 'QS'}
+# AR(1) 在各频率下的持续性
+AR_PERSISTENCE = {'daily': 0.998, 'weekly': 0.99, 'monthly': 0.95, 'quarterly': 0.9}
+# 合成指标的频率分布
+FREQ_MIX = {'daily': 0.7, 'weekly': 0.15, 'monthly': 0.12, 'quarterly': 0.03}
+# Yahoo序列的交易日历与交易所时区
+YAHOO_MARKETS = {
+    'us': ('America/New_York', 'us'),
+    'fx': ('Europe/London', 'weekdays'),
+    'crypto': ('UTC', 'all'),
+    'asia': ('Asia/Tokyo', 'asia'),
+    'china': ('Asia/Shanghai', 'asia')
+}
+
+# 真实指标的数值模型: (模型, 参数...)
+#   gbm(初值, 日波动) 价格；ar(均值, 标准差[, 下限]) 利率/利差；
+#   logar(均值, 对数标准差) 恒为正的水平值；trend(初值, 每期增长) 累积型指数
+SYMBOL_PROFILES = {
+    'RRPONTSYD': ('logar', 400, 1.2), 'WALCL': ('trend', 4.2e6, 0.0015), 'WTREGEN': ('logar', 600e3, 0.3),
+    'VIXCLS': ('logar', 18, 0.35), '^MOVE': ('logar', 95, 0.3), '^SKEW': ('ar', 135, 8),
+    'DX-Y.NYB': ('gbm', 98, 0.004), 'VWO': ('gbm', 42, 0.012), 'URTH': ('gbm', 100, 0.01),
+    'DGS10': ('ar', 3.0, 1.2, 0.3), 'DGS2': ('ar', 2.5, 1.5, 0.1), 'T10Y2Y': ('ar', 0.5, 0.7),
+    'IRLTLT01JPM156N': ('ar', 0.3, 0.3), 'IRLTLT01DEM156N': ('ar', 1.5, 1.2),
+    'BAMLH0A0HYM2': ('logar', 4.5, 0.3), 'BAMLC0A0CM': ('logar', 1.3, 0.25),
+    'SOFR': ('ar', 2.5, 2.0, 0.01), 'EFFR': ('ar', 2.5, 2.0, 0.05), 'IORB': ('ar', 2.6, 2.0, 0.1),
+    'NFCI': ('ar', -0.4, 0.25), 'HYG': ('gbm', 80, 0.006), 'JNK': ('gbm', 95, 0.006),
+    'JPY=X': ('gbm', 125, 0.006), 'EUR=X': ('gbm', 0.9, 0.005), 'CNY=X': ('gbm', 6.9, 0.003),
+    'GBP=X': ('gbm', 0.78, 0.005), 'BTC-USD': ('gbm', 30000, 0.035), 'ETH-USD': ('gbm', 2000, 0.045),
+    'SOL-USD': ('gbm', 50, 0.06), 'CL=F': ('gbm', 70, 0.02), 'BZ=F': ('gbm', 75, 0.019),
+    'NG=F': ('gbm', 3, 0.035), 'GC=F': ('gbm', 1800, 0.009), 'HG=F': ('gbm', 3.8, 0.014),
+    'ZS=F': ('gbm', 1200, 0.012), 'ZC=F': ('gbm', 500, 0.014), 'ZW=F': ('gbm', 600, 0.017),
+    'DBC': ('gbm', 20, 0.011), 'WLEMUINDXD': ('logar', 150, 0.4), 'USEPUINDXD': ('logar', 120, 0.5),
+    'MTSDS133FMS': ('ar', -100000, 150000), 'UMCSENT': ('ar', 80, 10), 'T5YIE': ('ar', 2.2, 0.4),
+    'CPILFESL': ('trend', 250, 0.0025), 'UNRATE': ('ar', 4.5, 1.5, 2.5), 'CIVPART': ('ar', 63, 0.8),
+    'PAYEMS': ('trend', 150000, 0.001), 'GDP': ('trend', 20000, 0.012), 'MORTGAGE30US': ('ar', 5, 1.5, 2.5),
+    'BOPGSTB': ('ar', -60000, 15000), 'DTP10J28': ('ar', 1, 0.8), 'EXPCH': ('trend', 12000, 0.005),
+    'IMPCH': ('trend', 40000, 0.004)
+}
+
+
+def symbol_rng(symbol, seed=0):
+    """按代码和种子生成独立的随机数发生器，结果与生成顺序无关"""
+    digest = hashlib.md5(f"{seed}:{symbol}".encode('utf-8')).hexdigest()
+    return np.random.default_rng(int(digest[:16], 16))
+
+
+_calendar_cache = {}
+
+
+def trading_dates(freq, start, end, calendar='weekdays'):
+    """按频率与交易日历生成日期；asia 日历每年随机去掉约12个节假日"""
+    key = (freq, str(start), str(end), calendar)
+    if key not in _calendar_cache:
+        if freq != 'daily':
+            dates = pd.date_range(start, end, freq=FREQ_RULES[freq])
+        elif calendar == 'all':
+            dates = pd.date_range(start, end, freq='D')
+        elif calendar == 'us':
+            from pandas.tseries.holiday import USFederalHolidayCalendar
+            from pandas.tseries.offsets import CustomBusinessDay
+            dates = pd.date_range(start, end, freq=CustomBusinessDay(calendar=USFederalHolidayCalendar()))
+        else:
+            dates = pd.date_range(start, end, freq='B')
+        if calendar == 'asia' and freq == 'daily':
+            holiday_rng = np.random.default_rng(len(dates))
+            dates = dates[holiday_rng.random(len(dates)) >= 12 / 260]
+        _calendar_cache[key] = dates
+    return _calendar_cache[key]
+
+
+def simulate_values(profile, n, freq, rng):
+    """按数值模型生成长度为 n 的序列"""
+    model, *params = profile
+    if model == 'gbm':
+        level, vol = params
+        vol = vol * np.sqrt({'daily': 1, 'weekly': 5, 'monthly': 21, 'quarterly': 63}[freq])
+        return level * np.exp(np.cumsum(rng.normal(0, vol, n)))
+    if model == 'trend':
+        level, growth = params
+        return level * np.exp(np.cumsum(growth + rng.normal(0, abs(growth) / 2, n)))
+
+    phi = AR_PERSISTENCE[freq]
+    shocks = rng.normal(0, np.sqrt(1 - phi ** 2), n)
+    shocks[0] = rng.normal()
+    # 标准化AR(1): x_t = phi * x_{t-1} + e_t，借助 ewm(adjust=False) 的递推 y_t = phi * y_{t-1} + (1 - phi) * z_t
+    scaled = shocks / (1 - phi)
+    scaled[0] = shocks[0]
+    path = pd.Series(scaled).ewm(alpha=1 - phi, adjust=False).mean().to_numpy()
+    if model == 'logar':
+        mean, sd = params
+        return mean * np.exp(sd * path - sd ** 2 / 2)
+    mean, sd, *floor = params
+    values = mean + sd * path
+    return np.maximum(values, floor[0]) if floor else values
+
+
+def synthetic_series(symbol, freq='daily', start='2000-01-03', end=None, profile=None, source='fred',
+                     market=None, gaps=False, seed=0):
+    """生成单个合成序列
+
+    source 为 fred 时索引不带时区，日频序列在美国节假日保留日期但值为NaN（与FRED一致）；
+    source 为 yahoo 时按 market 的交易日历取日期，索引为交易所当地时区的零点（与yfinance一致）。
+    gaps 为 True 时随机加入上市前空白、停更缺口和零星缺失值。
+    """
+    rng = symbol_rng(symbol, seed)
+    end = end or datetime.now().strftime('%Y-%m-%d')
+    profile = profile or SYMBOL_PROFILES.get(symbol) or default_profile(symbol, freq, source, rng)
+    if source == 'yahoo':
+        tz, calendar = YAHOO_MARKETS[market or yahoo_market(symbol)]
+        dates = trading_dates(freq, start, end, calendar)
+    else:
+        tz, calendar = None, 'weekdays'
+        dates = trading_dates(freq, start, end, calendar)
+
+    values = simulate_values(profile, len(dates), freq, rng)
+    series = pd.Series(values, index=dates, name=symbol)
+
+    if source == 'fred' and freq == 'daily':
+        holidays = dates.difference(trading_dates('daily', start, end, 'us'))
+        series[holidays] = np.nan
+
+    if gaps and len(series) > 10:
+        keep = np.ones(len(series), dtype=bool)
+        if rng.random() < 0.3:
+            # 上市较晚：前段没有数据
+            keep[:int(rng.uniform(0, 0.6) * len(series))] = False
+        if rng.random() < 0.2:
+            # 1-3 次停更缺口（5-90个观测）
+            for _ in range(rng.integers(1, 4)):
+                length = int(rng.integers(5, 91))
+                begin = int(rng.integers(0, max(1, len(series) - length)))
+                keep[begin:begin + length] = False
+        series = series[keep]
+        series[rng.random(len(series)) < 0.002] = np.nan
+
+    if tz is not None:
+        series.index = series.index.tz_localize(tz)
+    return series
+
+
+def yahoo_market(symbol):
+    """根据代码形态推断交易市场"""
+    if symbol.endswith('-USD'):
+        return 'crypto'
+    if symbol.endswith('=X'):
+        return 'fx'
+    if symbol.endswith('.T'):
+        return 'asia'
+    if symbol.endswith('.SS'):
+        return 'china'
+    return 'us'
+
+
+def default_profile(symbol, freq, source, rng):
+    """未配置模型的指标：Yahoo按价格、FRED日/周频按利率、月/季频按累积指数"""
+    if source == 'yahoo':
+        return ('gbm', float(10 ** rng.uniform(0, 3)), float(rng.uniform(0.005, 0.03)))
+    if freq in ('monthly', 'quarterly'):
+        return ('trend', float(10 ** rng.uniform(1, 5)), float(rng.uniform(0.0005, 0.006)))
+    return ('ar', float(rng.uniform(-1, 6)), float(rng.uniform(0.1, 2)))
+
+
+def generate_universe(n_symbols=0, years=30, end=None, seed=0, gaps=True):
+    """生成数据宇宙，返回 (data, catalog)
+
+    data 与 download_all_data 的返回结构一致（不含衍生指标）：{分类: {代码: Series}}；
+    catalog 为合成指标的配置 {分类: {代码: 指标信息}}，结构同 DATA_CATEGORIES。
+    真实指标全部包含在内，另外生成 n_symbols 个合成指标并轮流分配到各分类。
+    """
+    end = pd.Timestamp(end or datetime.now().strftime('%Y-%m-%d'))
+    start = (end - pd.DateOffset(years=years)).strftime('%Y-%m-%d')
+    end = end.strftime('%Y-%m-%d')
+    rng = np.random.default_rng(seed)
+    categories = list(DATA_CATEGORIES)
+    markets = list(YAHOO_MARKETS)
+
+    data = {category: {} for category in categories}
+    catalog = {category: {} for category in categories}
+    for category, cat_info in DATA_CATEGORIES.items():
+        for symbol, info in cat_info['indicators'].items():
+            data[category][symbol] = synthetic_series(
+                symbol, info.get('freq', 'daily'), start, end, source=info.get('source', 'yahoo'),
+                gaps=False, seed=seed)
+
+    freqs, weights = zip(*FREQ_MIX.items())
+    for i in range(n_symbols):
+        category = categories[i % len(categories)]
+        freq = str(rng.choice(freqs, p=weights))
+        source = 'yahoo' if freq == 'daily' and rng.random() < 0.5 else 'fred'
+        market = str(rng.choice(markets)) if source == 'yahoo' else None
+        symbol = f"SYN{i:05d}{'.T' if market == 'asia' else '.SS' if market == 'china' else ''}"
+        data[category][symbol] = synthetic_series(symbol, freq, start, end, source=source, market=market,
+                                                  gaps=gaps, seed=seed)
+        catalog[category][symbol] = {'name': f"合成指标{i}", 'source': source, 'freq': freq}
+    return data, catalog
+
+
+def register_catalog(catalog):
+    """把合成指标加入 DATA_CATEGORIES，使频率、来源等查询与真实指标一致"""
+    for category, indicators in catalog.items():
+        DATA_CATEGORIES.setdefault(category, {'description': '', 'indicators': {}})['indicators'].update(indicators)
+
+
+def run_scale_benchmark(data, trace=True, parallel=False):
+    """依次测量 衍生指标 → 合并宽表 → 按频率整理 → 风险矩阵 的耗时与峰值内存，返回 (报告, frames)"""
+    os.environ.update({'HTTP_CACHE': 'false', 'SERIES_STORE': 'false', 'YAHOO_METHOD_MEMORY': 'false'})
+    loader = rmc.GlobalMacroDataLoader()
+    report = {}
+
+    def stage(name, func):
+        if trace:
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        result = func()
+        report[name] = {
+            'seconds': round(time.perf_counter() - started, 3),
+            'peak_mb': round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 1) if trace else None
+        }
+        print(f"⏱️ {name:8}: {report[name]['seconds']:8.2f}s" +
+              (f"  峰值 {report[name]['peak_mb']:.0f} MB" if trace else ""))
+        return result
+
+    flat = {symbol: series for cat_data in data.values() for symbol, series in cat_data.items()}
+    derived = stage('derived', lambda: loader.calculate_derived_indicators(flat))
+    all_data = {**data, '衍生指标': derived} if derived else data
+    df = stage('merge', lambda: loader.create_analysis_dataframe(all_data))
+    frames = stage('frames', lambda: loader.create_frequency_frames(all_data))
+    stage('analyze', lambda: rmc.RiskSentimentAnalyzer(frames).calculate_risk_matrix(parallel=parallel))
+    report['shape'] = list(df.shape)
+    report['frames_kb'] = round(frames.memory_usage() / 1024)
+    return report, frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成合成数据宇宙并运行规模基准测试")
+    parser.add_argument('--symbols', type=int, default=2000, help="合成指标数量（不含真实指标）")
+    parser.add_argument('--years', type=int, default=30, help="历史年数")
+    parser.add_argument('--end', default=None, help="结束日期 (默认今天)")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    parser.add_argument('--no-gaps', action='store_true', help="不加入缺口和缺失值")
+    parser.add_argument('--parallel', action='store_true', help="并行执行分析")
+    parser.add_argument('--no-tracemalloc', action='store_true', help="不统计峰值内存")
+    parser.add_argument('--snapshot-dir', default=None,
+                        help="把生成的数据保存为快照 risk-data-synthetic.parquet（可供离线替身服务 --snapshot 使用）")
+    parser.add_argument('--output', default="data/benchmark/scale-latest.json", help="结果JSON路径")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    snapshot_dir = os.path.abspath(args.snapshot_dir) if args.snapshot_dir else None
+    trace = not args.no_tracemalloc
+    if trace:
+        tracemalloc.start()
+
+    started = time.perf_counter()
+    data, catalog = generate_universe(args.symbols, args.years, args.end, args.seed, gaps=not args.no_gaps)
+    register_catalog(catalog)
+    n_series = sum(len(cat_data) for cat_data in data.values())
+    n_points = sum(len(s) for cat_data in data.values() for s in cat_data.values())
+    print(f"🧬 已生成 {n_series} 个序列、{n_points:,} 个观测值 ({time.perf_counter() - started:.1f}s)")
+
+    # 加载器会写出配置文件等，在临时目录中运行
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="risk-matrix-scale-")
+    try:
+        os.chdir(workdir)
+        report, frames = run_scale_benchmark(data, trace, args.parallel)
+        if snapshot_dir:
+            rmc.save_snapshot(frames, output_dir=snapshot_dir, date='synthetic')
+    finally:
+        os.chdir(cwd)
+        if trace:
+            tracemalloc.stop()
+
+    result = {
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'series': n_series,
+        'observations': n_points,
+        'stages': report
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"✅ 基准结果已保存: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())